@@ -3,40 +3,82 @@ Fetal Health AI Agent
 Intelligent agent for natural language interaction with the fetal health prediction system.
 """
 
-import joblib
 import os
 import json
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
+from inference_core import InferenceCore, FEATURE_NAMES, FEATURE_RANGES, EXAMPLE_CASES
+from validation import FeatureValidator
+
 
 class FetalHealthAgent:
-    def __init__(self, model_path: str = None):
-        """Initialize the agent with the ML model."""
-        if model_path is None:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            model_path = os.path.join(base_dir, "models", "fetal_health.pkl")
-        
-        self.model_path = model_path
-        self.model = None
+    def __init__(self, model_path: str = None, engine: Optional[str] = None,
+                 core: Optional[InferenceCore] = None):
+        """Initialize the agent with the ML model.
+
+        engine selects the inference engine (see engines.py); by default the
+        INFERENCE_ENGINE environment variable is used. Passing core shares
+        an already created InferenceCore (and its model) with the caller.
+        """
+        self.core = core or InferenceCore(model_path, engine)
+        self.model_path = self.core.model_path
+        self.engine_name = self.core.engine_name
+        self.startup = self.core.startup
+        self.prediction_cache = self.core.prediction_cache
         self.labels = ['NORMAL', 'SUSPECT', 'PATHOLOGICAL']
-        self.feature_names = [
-            'prolongued_decelerations',
-            'abnormal_short_term_variability', 
-            'percentage_abnormal_long_term_variability',
-            'histogram_variance',
-            'histogram_median',
-            'mean_long_term_variability',
-            'histogram_mode',
-            'accelerations'
-        ]
+        self.feature_names = list(FEATURE_NAMES)
+        self.feature_ranges = dict(FEATURE_RANGES)
+        # Range checks compiled into bound arrays in feature order
+        self.validator = FeatureValidator(self.feature_names, self.feature_ranges)
         self.load_model()
         
+    @property
+    def serving(self):
+        """The ServingModel being served, or None."""
+        return self.core.serving
+
+    @property
+    def model_watcher(self):
+        """Watcher hot-swapping a replaced model, if reloading is enabled."""
+        return self.core.model_watcher
+
+    @property
+    def shadow_scorer(self):
+        """Shadow scorer of the registry's shadow models, if any."""
+        return self.core.shadow_scorer
+
+    @property
+    def model(self):
+        """The model being served, or None."""
+        return self.serving.model if self.serving else None
+
+    @property
+    def engine(self):
+        """Inference engine of the model being served."""
+        return self.serving.engine if self.serving else None
+
+    @property
+    def coalescer(self):
+        """Coalescer of the model being served, if coalescing is enabled."""
+        return self.serving.coalescer if self.serving else None
+
+    @property
+    def model_labels(self) -> List[str]:
+        """Labels in predict_proba column order."""
+        return self.serving.labels if self.serving else []
+
+    @property
+    def model_version(self) -> Optional[str]:
+        """Version of the model being served."""
+        return self.serving.version if self.serving else None
+
     def load_model(self) -> bool:
         """Load the ML model."""
         try:
             if os.path.exists(self.model_path):
-                self.model = joblib.load(self.model_path)
+                if self.core.load() is None:
+                    return False
                 print(f"✅ Agent model loaded successfully from {self.model_path}")
                 return True
             else:
@@ -46,43 +88,48 @@ class FetalHealthAgent:
             print(f"❌ Error loading model: {e}")
             return False
     
-    def validate_input(self, data: Dict[str, float]) -> tuple[bool, str]:
-        """Validate input data for prediction."""
+    def warmup(self) -> Dict[str, Any]:
+        """Time a first prediction and warm up every engine; returns the startup report."""
+        if self.model is not None:
+            if not self.startup.has("first_prediction"):
+                with self.startup.phase("first_prediction"):
+                    self.make_prediction(self.get_sample_data())
+            self.core.warm_up([self.get_sample_data(), *self.get_example_cases().values()])
+        return self.startup.report()
+    
+    def _describe_error(self, data, row, missing: int, invalid: int, violated: int) -> str:
+        """Format the first validation error of a failing row from its bitmasks."""
+        if missing:
+            names = [self.feature_names[j] for j in self.validator.features(missing)]
+            return f"Missing features: {', '.join(names)}"
+        # Values that are not numbers are NaN and so out of range as well
+        j = self.validator.features(violated)[0]
+        feature = self.feature_names[j]
+        if invalid >> j & 1:
+            return f"Invalid data type for {feature}: expected number, got {type(data[feature])}"
+        min_val, max_val = self.feature_ranges[feature]
+        return f"Value for {feature} should be between {min_val} and {max_val}"
+
+    def _check_record(self, data: Dict[str, float]) -> Tuple[Optional[List[float]], Optional[str]]:
+        """Convert one record to a feature row; returns (row, first error or None)."""
         try:
-            # Check if all required features are present
-            missing_features = [f for f in self.feature_names if f not in data]
-            if missing_features:
-                return False, f"Missing features: {', '.join(missing_features)}"
-            
-            # Validate data types and ranges
-            ranges = {
-                'prolongued_decelerations': (0.0, 0.005),
-                'abnormal_short_term_variability': (12.0, 87.0),
-                'percentage_abnormal_long_term_variability': (0.0, 91.0),
-                'histogram_variance': (0.0, 269.0),
-                'histogram_median': (77.0, 186.0),
-                'mean_long_term_variability': (0.0, 50.7),
-                'histogram_mode': (60.0, 187.0),
-                'accelerations': (0.0, 0.019)
-            }
-            
-            for feature, value in data.items():
-                if not isinstance(value, (int, float)):
-                    return False, f"Invalid data type for {feature}: expected number, got {type(value)}"
-                
-                if feature in ranges:
-                    min_val, max_val = ranges[feature]
-                    if not (min_val <= value <= max_val):
-                        return False, f"Value for {feature} should be between {min_val} and {max_val}"
-            
-            return True, "Input validation successful"
-            
+            row, missing, invalid, violated = self.validator.check(data, strict=True)
+            if not violated:
+                return row, None
+            return row, self._describe_error(data, row, missing, invalid, violated)
         except Exception as e:
-            return False, f"Validation error: {str(e)}"
+            return None, f"Validation error: {str(e)}"
+
+    def validate_input(self, data: Dict[str, float]) -> tuple[bool, str]:
+        """Validate input data for prediction."""
+        error = self._check_record(data)[1]
+        if error is not None:
+            return False, error
+        return True, "Input validation successful"
     
     def make_prediction(self, data: Dict[str, float]) -> Dict[str, Any]:
         """Make a prediction using the loaded model."""
-        if self.model is None:
+        if self.core.current() is None:
             return {
                 "success": False,
                 "error": "Model not loaded",
@@ -90,39 +137,55 @@ class FetalHealthAgent:
                 "confidence": None
             }
         
-        # Validate input
-        is_valid, message = self.validate_input(data)
-        if not is_valid:
+        # Validate input, converted to a row in feature order
+        row, error = self._check_record(data)
+        return self._predict_row(data, row, error)
+
+    def make_prediction_json(self, body: bytes) -> Dict[str, Any]:
+        """Make a prediction from a raw JSON request body.
+
+        The body is decoded and converted to a feature row in one step (see
+        FeatureValidator.parse) and keys other than the features are
+        rejected. Raises ValueError when the body is not a JSON object.
+        """
+        data, row, missing, invalid, violated, unknown = self.validator.parse(body, strict=True)
+        if self.core.current() is None:
+            return {
+                "success": False,
+                "error": "Model not loaded",
+                "prediction": None,
+                "confidence": None
+            }
+
+        error = None
+        if missing or violated:
+            error = self._describe_error(data, row, missing, invalid, violated)
+        elif unknown:
+            error = f"Unknown features: {', '.join(unknown)}"
+        return self._predict_row(data, row, error)
+
+    def _predict_row(self, data: Dict[str, float], row: Optional[List[float]],
+                     error: Optional[str]) -> Dict[str, Any]:
+        """Score a validated row; data is echoed back as the input."""
+        if error is not None:
             return {
                 "success": False,
-                "error": message,
+                "error": error,
                 "prediction": None,
                 "confidence": None
             }
         
         try:
-            # Prepare data for prediction
-            features = [data[feature] for feature in self.feature_names]
-            X = np.array([features])
+            features = row
             
-            # Make prediction
-            prediction = self.model.predict(X)[0]
-            # Map model classes [1.0, 2.0, 3.0] to array indices [0, 1, 2]
-            class_index = int(prediction) - 1
-            result = self.labels[class_index]
-            
-            # Get prediction probabilities
-            confidence = None
-            if hasattr(self.model, 'predict_proba'):
-                probabilities = self.model.predict_proba(X)[0]
-                confidence = {
-                    label: float(prob) for label, prob in zip(self.labels, probabilities)
-                }
+            # Make prediction (cached, coalesced and shadow-scored by the core)
+            result, confidence, version = self.core.predict(features)
             
             return {
                 "success": True,
                 "prediction": result,
                 "confidence": confidence,
+                "model_version": version,
                 "timestamp": datetime.now().isoformat(),
                 "input_data": data
             }
@@ -135,6 +198,10 @@ class FetalHealthAgent:
                 "confidence": None
             }
     
+    def make_prediction_batch(self, records) -> Dict[str, Any]:
+        """Make predictions for many records with a single model call."""
+        return self.core.predict_records(records, self.validator, self._describe_error, strict=True)
+    
     def get_sample_data(self) -> Dict[str, float]:
         """Return sample data for testing."""
         return {
@@ -203,39 +270,51 @@ class FetalHealthAgent:
     
     def get_example_cases(self) -> Dict[str, Dict[str, float]]:
         """Return example cases for each classification."""
-        return {
-            "NORMAL": {
-                "prolongued_decelerations": 0.0,
-                "abnormal_short_term_variability": 85.0,
-                "percentage_abnormal_long_term_variability": 5.0,
-                "histogram_variance": 80.0,
-                "histogram_median": 170.0,
-                "mean_long_term_variability": 5.0,
-                "histogram_mode": 170.0,
-                "accelerations": 0.015
-            },
-            "SUSPECT": {
-                "prolongued_decelerations": 0.0,
-                "abnormal_short_term_variability": 73.0,
-                "percentage_abnormal_long_term_variability": 43.0,
-                "histogram_variance": 73.0,
-                "histogram_median": 121.0,
-                "mean_long_term_variability": 2.4,
-                "histogram_mode": 120.0,
-                "accelerations": 0.0
-            },
-            "PATHOLOGICAL": {
-                "prolongued_decelerations": 0.002,
-                "abnormal_short_term_variability": 26.0,
-                "percentage_abnormal_long_term_variability": 0.0,
-                "histogram_variance": 170.0,
-                "histogram_median": 107.0,
-                "mean_long_term_variability": 0.0,
-                "histogram_mode": 76.0,
-                "accelerations": 0.001
-            }
-        }
+        return {label: dict(case) for label, case in EXAMPLE_CASES.items()}
     
+    def get_performance_summary(self) -> str:
+        """Describe the served model from its manifest (see model_manifest.py).
+
+        Falls back to the figures reported for the original model when the
+        model has no current manifest.
+        """
+        manifest = self.core.manifest() or {}
+        metrics = manifest.get("metrics", {})
+        if "accuracy" in metrics:
+            accuracy = f"{metrics['accuracy']:.2%}"
+        elif "dataset_accuracy" in metrics:
+            accuracy = f"{metrics['dataset_accuracy']:.2%} (on the full dataset)"
+        else:
+            accuracy = "95.92%"
+        importances = manifest.get("feature_importances") or {
+            'abnormal_short_term_variability': 0.2283,
+            'percentage_abnormal_long_term_variability': 0.1952,
+            'histogram_median': 0.1337,
+            'histogram_mode': 0.1236
+        }
+        ranked = sorted(importances.items(), key=lambda item: -item[1])[:4]
+        ranking = "\n".join(f"{i}. {name.replace('_', ' ').title()} ({value:.2%})"
+                             for i, (name, value) in enumerate(ranked, 1))
+        trees = f" ({manifest['n_trees']} trees)" if manifest.get("n_trees") else ""
+        version = f"\n• **Version:** {manifest['sha256'][:12]}" if manifest.get("sha256") else ""
+        return f"""
+📊 **Model Performance:**
+
+• **Overall Accuracy:** {accuracy}
+• **Algorithm:** Random Forest Classifier{trees}
+• **Training Data:** {metrics.get('dataset_rows', 2126):,} fetal health records
+• **Features:** {manifest.get('n_features', len(self.feature_names))} medical parameters
+• **Classes:** {len(manifest.get('labels', self.labels))} fetal health conditions{version}
+
+**Feature Importance:**
+{ranking}
+
+**Clinical Validation:**
+✅ Suitable for medical screening
+✅ High reliability for decision support
+⚠️ Requires clinical oversight
+"""
+
     def process_query(self, query: str, data: Optional[Dict[str, float]] = None) -> str:
         """Process natural language queries from users."""
         query_lower = query.lower()
@@ -318,26 +397,7 @@ This system is for clinical decision support only. Always combine with professio
 """
         
         elif "accuracy" in query_lower or "performance" in query_lower:
-            return """
-📊 **Model Performance:**
-
-• **Overall Accuracy:** 95.92%
-• **Algorithm:** Random Forest Classifier
-• **Training Data:** 2,126 fetal health records
-• **Features:** 8 medical parameters
-• **Classes:** 3 fetal health conditions
-
-**Feature Importance:**
-1. Abnormal Short Term Variability (22.83%)
-2. Percentage Abnormal Long Term Variability (19.52%)
-3. Histogram Median (13.37%)
-4. Histogram Mode (12.36%)
-
-**Clinical Validation:**
-✅ Suitable for medical screening
-✅ High reliability for decision support
-⚠️ Requires clinical oversight
-"""
+            return self.get_performance_summary()
         
         else:
             return """
@@ -3,13 +3,24 @@ Fetal Health AI Agent Web Application
 Flask web interface for the intelligent fetal health agent.
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from flask import Flask, request, render_template, jsonify
 from agent import FetalHealthAgent
+from inference_core import get_inference_core
+from threading_policy import get_threading_policy
+from worker_stats import worker_report
+from binary_format import CONTENT_TYPE as BINARY_CONTENT_TYPE, handle_binary_request
 import json
 import os
 
 app = Flask(__name__)
-agent = FetalHealthAgent()
+_import_seconds = time.perf_counter() - _IMPORT_STARTED
+# The agent scores with the process-wide inference core, so when this app is
+# served together with app.py (see server.py) the model is loaded only once
+agent = FetalHealthAgent(core=get_inference_core())
+agent.startup.record("import", _import_seconds)
 
 @app.route("/")
 def home():
@@ -48,8 +59,13 @@ def chat():
 def predict():
     """Handle prediction requests."""
     try:
-        data = request.get_json()
-        result = agent.make_prediction(data)
+        try:
+            result = agent.make_prediction_json(request.get_data(cache=False))
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
         return jsonify(result)
         
     except Exception as e:
@@ -58,6 +74,41 @@ def predict():
             "error": str(e)
         }), 500
 
+@app.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """Handle batch prediction requests."""
+    try:
+        data = request.get_json()
+        # Accept a bare list of records, {"records": [...]} or one column per
+        # feature, {feature: [values]}
+        records = data.get('records', data) if isinstance(data, dict) else data
+        if not isinstance(records, (list, dict)):
+            return jsonify({
+                "success": False,
+                "error": "Expected a list of records or a column per feature"
+            }), 400
+
+        result = agent.make_prediction_batch(records)
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route("/api/predict/binary", methods=["POST"])
+def predict_binary_batch():
+    """Handle batch prediction requests in the packed binary format (see binary_format)."""
+    status, payload, headers = handle_binary_request(
+        agent.core, agent.validator, request.mimetype, request.get_data(cache=False))
+    if status != 200:
+        return jsonify({
+            "success": False,
+            "error": payload
+        }), status
+    return app.response_class(payload, mimetype=BINARY_CONTENT_TYPE, headers=headers)
+
 @app.route("/api/sample")
 def get_sample():
     """Get sample data."""
@@ -79,10 +130,32 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "agent_ready": agent.model is not None,
+        "ready": agent.core.ready,
+        **agent.core.stats(),
+        "threading": get_threading_policy().report(),
+        "worker": worker_report(),
+        "startup": agent.startup.report(),
         "timestamp": agent.get_sample_data()  # Reuse for timestamp
     })
 
+@app.route("/admin/warmup", methods=["POST"])
+def warmup():
+    """Warm the model up ahead of real traffic."""
+    try:
+        report = agent.warmup()
+        return jsonify({
+            "success": agent.core.ready,
+            "model_version": agent.model_version,
+            "startup": report
+        }), 200 if agent.core.ready else 503
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
+    agent.warmup()
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -3,82 +3,100 @@ Fetal Health Prediction System - Main Application
 A Flask web application for predicting fetal health conditions.
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from flask import Flask, request, render_template, jsonify
-import joblib
 import os
 import numpy as np
 from datetime import datetime
+from inference_core import get_inference_core, CLASS_LABELS, FEATURE_NAMES, FEATURE_RANGES, EXAMPLE_CASES
+from threading_policy import get_threading_policy
+from worker_stats import worker_report
+from validation import FeatureValidator
+from binary_format import CONTENT_TYPE as BINARY_CONTENT_TYPE, handle_binary_request
 
 app = Flask(__name__)
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(BASE_DIR, "models", "fetal_health.pkl")
-
-# Load the ML model
-try:
-    model = joblib.load(MODEL_PATH)
-    print(f"✅ Model loaded successfully from {MODEL_PATH}")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
-
-# Class labels mapping
-CLASS_LABELS = {
-    1.0: "NORMAL",
-    2.0: "SUSPECT", 
-    3.0: "PATHOLOGICAL"
-}
 
-# Feature names in correct order
-FEATURE_NAMES = [
-    'prolongued_decelerations',
-    'abnormal_short_term_variability',
-    'percentage_abnormal_long_term_variability',
-    'histogram_variance',
-    'histogram_median',
-    'mean_long_term_variability',
-    'histogram_mode',
-    'accelerations'
-]
-
-# Feature validation ranges
-FEATURE_RANGES = {
-    'prolongued_decelerations': (0.0, 0.005),
-    'abnormal_short_term_variability': (12.0, 87.0),
-    'percentage_abnormal_long_term_variability': (0.0, 91.0),
-    'histogram_variance': (0.0, 269.0),
-    'histogram_median': (77.0, 186.0),
-    'mean_long_term_variability': (0.0, 50.7),
-    'histogram_mode': (60.0, 187.0),
-    'accelerations': (0.0, 0.019)
+# Model, engine, prediction cache, reload watcher and shadow scorer, shared
+# with the agent when both are served from one process (see server.py). The
+# model is loaded lazily, on the first prediction or by warmup() (POST
+# /admin/warmup, run by gunicorn on boot), so importing this module does not
+# unpickle the forest
+core = get_inference_core()
+MODEL_PATH = core.model_path
+
+# Durations of the import, unpickling, engine build, first prediction and warm-up
+startup = core.startup
+
+# LRU cache of predictions keyed by the bins of the features among the
+# forest's split thresholds
+prediction_cache = core.prediction_cache
+
+# Range checks compiled into bound arrays in FEATURE_NAMES order
+validator = FeatureValidator(FEATURE_NAMES, FEATURE_RANGES)
+
+# Input used to warm up the model and returned by /api/sample
+SAMPLE_DATA = {
+    'prolongued_decelerations': 0.002,
+    'abnormal_short_term_variability': 50.0,
+    'percentage_abnormal_long_term_variability': 45.0,
+    'histogram_variance': 134.0,
+    'histogram_median': 130.0,
+    'mean_long_term_variability': 25.0,
+    'histogram_mode': 120.0,
+    'accelerations': 0.01
 }
 
-def validate_input(data):
-    """Validate input data for prediction."""
+def load_inference_model():
+    """Load the model and build its engine on first use; returns the model."""
+    current = core.load()
+    return current.model if current is not None else None
+
+def warmup():
+    """Load the model, time a first prediction and warm up every engine.
+
+    The sample input and the example cases are scored along with a sample
+    of dataset rows (see InferenceCore.warm_up); returns the startup report.
+    """
+    if load_inference_model() is not None:
+        if not startup.has("first_prediction"):
+            with startup.phase("first_prediction"):
+                make_prediction(SAMPLE_DATA)
+        core.warm_up([SAMPLE_DATA, *EXAMPLE_CASES.values()])
+    return startup.report()
+
+def _describe_errors(row, missing, invalid, violated):
+    """Format the messages of one failing row from its feature bitmasks."""
     errors = []
-    
-    # Check if all required features are present
-    missing_features = [f for f in FEATURE_NAMES if f not in data]
-    if missing_features:
-        errors.append(f"Missing features: {', '.join(missing_features)}")
-    
-    # Validate data types and ranges
-    for feature, value in data.items():
-        if feature in FEATURE_RANGES:
-            try:
-                value = float(value)
-                min_val, max_val = FEATURE_RANGES[feature]
-                if not (min_val <= value <= max_val):
-                    errors.append(f"{feature}: value {value} outside range [{min_val}, {max_val}]")
-            except (ValueError, TypeError):
-                errors.append(f"{feature}: invalid numeric value")
-    
+    if missing:
+        errors.append(f"Missing features: {', '.join(FEATURE_NAMES[j] for j in validator.features(missing))}")
+    for j in validator.features(violated & ~missing):
+        feature = FEATURE_NAMES[j]
+        if invalid >> j & 1:
+            errors.append(f"{feature}: invalid numeric value")
+        else:
+            min_val, max_val = FEATURE_RANGES[feature]
+            errors.append(f"{feature}: value {row[j]} outside range [{min_val}, {max_val}]")
     return errors
 
+def _check_record(data):
+    """Convert one record to a feature row; returns (row, error messages)."""
+    row, missing, invalid, violated = validator.check(data)
+    if not violated:
+        return row, []
+    return row, _describe_errors(row, missing, invalid, violated)
+
+def validate_input(data):
+    """Validate input data for prediction."""
+    return _check_record(data)[1]
+
 def make_prediction(data):
     """Make prediction using the loaded model."""
-    if model is None:
+    if core.current() is None:
         return {
             "success": False,
             "error": "Model not loaded",
@@ -86,8 +104,36 @@ def make_prediction(data):
             "confidence": None
         }
     
-    # Validate input
-    errors = validate_input(data)
+    # Validate input, converted to a row in FEATURE_NAMES order
+    row, errors = _check_record(data)
+    return _predict_row(data, row, errors)
+
+def make_prediction_json(body):
+    """Make prediction from a raw JSON request body.
+
+    The body is decoded and converted to a row in FEATURE_NAMES order in one
+    step (see FeatureValidator.parse), without the intermediate passes of
+    make_prediction. Keys other than the features are rejected. Raises
+    ValueError when the body is not a JSON object.
+    """
+    data, row, missing, invalid, violated, unknown = validator.parse(body)
+    if not data:
+        raise ValueError("No JSON data provided")
+    if core.current() is None:
+        return {
+            "success": False,
+            "error": "Model not loaded",
+            "prediction": None,
+            "confidence": None
+        }
+
+    errors = [f"Unknown features: {', '.join(unknown)}"] if unknown else []
+    if violated:
+        errors += _describe_errors(row, missing, invalid, violated)
+    return _predict_row(data, row, errors)
+
+def _predict_row(data, row, errors):
+    """Score a validated row; data is echoed back as the input."""
     if errors:
         return {
             "success": False,
@@ -97,28 +143,16 @@ def make_prediction(data):
         }
     
     try:
-        # Prepare features in correct order
-        features = [float(data[feature]) for feature in FEATURE_NAMES]
-        X = np.array([features])
+        features = row
         
-        # Make prediction
-        prediction = model.predict(X)[0]
-        result = CLASS_LABELS[prediction]
-        
-        # Get confidence scores
-        confidence = None
-        if hasattr(model, 'predict_proba'):
-            probabilities = model.predict_proba(X)[0]
-            confidence = {
-                "NORMAL": float(probabilities[0]),
-                "SUSPECT": float(probabilities[1]),
-                "PATHOLOGICAL": float(probabilities[2])
-            }
+        # Make prediction (cached, coalesced and shadow-scored by the core)
+        result, confidence, version = core.predict(features)
         
         return {
             "success": True,
             "prediction": result,
             "confidence": confidence,
+            "model_version": version,
             "timestamp": datetime.now().isoformat(),
             "input_data": data
         }
@@ -131,6 +165,12 @@ def make_prediction(data):
             "confidence": None
         }
 
+def make_prediction_batch(records):
+    """Make predictions for many records with a single model call."""
+    return core.predict_records(
+        records, validator,
+        lambda record, row, missing, invalid, violated: "; ".join(_describe_errors(row, missing, invalid, violated)))
+
 @app.route("/")
 def home():
     """Home page."""
@@ -169,31 +209,53 @@ def predict():
 @app.route("/api/predict", methods=["POST"])
 def api_predict():
     """API endpoint for predictions."""
+    try:
+        body = request.get_data(cache=False)
+        if not body:
+            return jsonify({"success": False, "error": "No JSON data provided"}), 400
+
+        try:
+            result = make_prediction_json(body)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route("/api/predict/batch", methods=["POST"])
+def api_predict_batch():
+    """API endpoint for batch predictions."""
     try:
         data = request.get_json()
         if not data:
             return jsonify({"success": False, "error": "No JSON data provided"}), 400
-        
-        result = make_prediction(data)
+
+        # Accept a bare list of records, {"records": [...]} or one column per
+        # feature, {feature: [values]}
+        records = data.get("records", data) if isinstance(data, dict) else data
+        if not isinstance(records, (list, dict)):
+            return jsonify({"success": False, "error": "Expected a list of records or a column per feature"}), 400
+
+        result = make_prediction_batch(records)
         return jsonify(result)
-        
+
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route("/api/predict/binary", methods=["POST"])
+def api_predict_binary():
+    """API endpoint for batch predictions in the packed binary format (see binary_format)."""
+    status, payload, headers = handle_binary_request(
+        core, validator, request.mimetype, request.get_data(cache=False))
+    if status != 200:
+        return jsonify({"success": False, "error": payload}), status
+    return app.response_class(payload, mimetype=BINARY_CONTENT_TYPE, headers=headers)
+
 @app.route("/api/sample")
 def api_sample():
     """Get sample input data."""
-    sample_data = {
-        'prolongued_decelerations': 0.002,
-        'abnormal_short_term_variability': 50.0,
-        'percentage_abnormal_long_term_variability': 45.0,
-        'histogram_variance': 134.0,
-        'histogram_median': 130.0,
-        'mean_long_term_variability': 25.0,
-        'histogram_mode': 120.0,
-        'accelerations': 0.01
-    }
-    return jsonify(sample_data)
+    return jsonify(SAMPLE_DATA)
 
 @app.route("/api/features")
 def api_features():
@@ -212,10 +274,29 @@ def health_check():
     """Health check endpoint."""
     return jsonify({
         "status": "healthy",
-        "model_loaded": model is not None,
+        "model_loaded": core.serving is not None,
+        "ready": core.ready,
+        **core.stats(),
+        "threading": get_threading_policy().report(),
+        "worker": worker_report(),
+        "startup": startup.report(),
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route("/admin/warmup", methods=["POST"])
+def admin_warmup():
+    """Load the model and warm it up ahead of real traffic."""
+    try:
+        report = warmup()
+        current = core.serving
+        return jsonify({
+            "success": core.ready,
+            "model_version": current.version if current else None,
+            "startup": report
+        }), 200 if core.ready else 503
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
@@ -226,7 +307,10 @@ def internal_error(error):
     """Handle 500 errors."""
     return render_template("error.html", error="Internal server error"), 500
 
+startup.record("import", time.perf_counter() - _IMPORT_STARTED)
+
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
+    warmup()
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Fetal Health Prediction System - Inference Benchmark
+Times every inference engine against the stock sklearn traversal on
+data/fetal_health.csv and checks that their probabilities agree.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+from dataset import load_dataset
+from engines import ENGINES, build_engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.environ.get('MODEL_PATH', os.path.join(BASE_DIR, "models", "fetal_health.pkl"))
+
+
+def time_call(func, repeats):
+    """Return the median wall time of func() in seconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def benchmark_engine(engine, X, reference, repeats=200, batch_repeats=5):
+    """Benchmark one engine on single rows and on the whole of X."""
+    row = X[:1]
+    return {
+        "parity": bool(np.array_equal(engine.predict_proba(X), reference)),
+        "single_row_us": time_call(lambda: engine.predict_proba(row), repeats) * 1e6,
+        "batch_ms": time_call(lambda: engine.predict_proba(X), batch_repeats) * 1e3,
+        "batch_rows": len(X)
+    }
+
+
+def run_benchmark(model, X, names=None, repeats=200, model_path=None):
+    """Benchmark the named engines (default: all) and return {name: results}."""
+    reference = model.predict_proba(X)
+    results = {}
+    for name in names or ENGINES:
+        start = time.perf_counter()
+        engine = build_engine(model, name, model_path)
+        build_seconds = time.perf_counter() - start
+        results[name] = dict(benchmark_engine(engine, X, reference, repeats), build_s=build_seconds)
+    return results
+
+
+def engine_nbytes(engine):
+    """Bytes held in the engine's NumPy arrays (including lists of arrays)."""
+    total = 0
+    for value in vars(engine).values():
+        arrays = value if isinstance(value, list) else [value]
+        total += sum(array.nbytes for array in arrays if isinstance(array, np.ndarray))
+    return total
+
+
+def forest_nbytes(model):
+    """Bytes held in the node and value arrays of a fitted forest's trees."""
+    total = 0
+    for estimator in model.estimators_:
+        state = estimator.tree_.__getstate__()
+        total += state['nodes'].nbytes + state['values'].nbytes
+    return total
+
+
+def float32_parity_report(model, X, names=None):
+    """Compare float32 engines with their float64 builds on X.
+
+    Splits are exact in float32 (thresholds are rounded down), so only the
+    stored leaf distributions lose precision; the report shows how far the
+    probabilities move and whether any predicted class flips. A worker
+    serving an array engine releases the sklearn trees once the engine is
+    validated, so the engine's arrays are what it holds; forest_bytes is
+    what a worker holds with the sklearn engine instead.
+    """
+    reference = model.predict_proba(X)
+    forest_bytes = forest_nbytes(model)
+    report = {}
+    for name in names or ENGINES:
+        engine_class = ENGINES[name]
+        if not getattr(engine_class, 'supports_float32', False):
+            continue
+        full = engine_class(model)
+        compact = engine_class(model, float32=True)
+        proba = compact.predict_proba(X)
+        report[name] = {
+            "float64_bytes": engine_nbytes(full),
+            "float32_bytes": engine_nbytes(compact),
+            "forest_bytes": forest_bytes,
+            "max_abs_diff": float(np.abs(proba - reference).max()),
+            "class_flips": int((proba.argmax(axis=1) != reference.argmax(axis=1)).sum()),
+            "rows": len(X)
+        }
+    return report
+
+
+def print_float32_report(report):
+    """Print a float32 parity report."""
+    if report:
+        forest = next(iter(report.values()))["forest_bytes"]
+        print(f"sklearn forest: {forest / 1e6:.2f} MB "
+              f"(what a worker holds with INFERENCE_ENGINE=sklearn)\n")
+    print(f"{'':<14}{'worker MB':>24}")
+    print(f"{'Engine':<14}{'float64':>12}{'float32':>12}{'max |dp|':>12}  class flips")
+    for name, result in report.items():
+        print(f"{name:<14}{result['float64_bytes'] / 1e6:>12.2f}{result['float32_bytes'] / 1e6:>12.2f}"
+              f"{result['max_abs_diff']:>12.2e}  {result['class_flips']} / {result['rows']}")
+
+
+def _peak_bytes(func, repeats):
+    """Median bytes allocated above the starting point during one func() call."""
+    import tracemalloc
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeats):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return float(np.median(peaks))
+
+
+def allocation_report(model, X, names=None, repeats=200, model_path=None):
+    """Compare per-request allocations of single-record scoring per engine.
+
+    Both paths validate the record the same way. "fresh" then scores
+    np.array([values]) into a new probability array; "buffered" copies the
+    values into the thread's reusable input row and has the engine write
+    into the reusable output row (see ScoringBuffers). The sklearn engine
+    still allocates its own result and copies it into the output row, so
+    it gains nothing from the buffers. Reports the bytes allocated at the
+    peak of a call, traced with tracemalloc, and the time per call.
+    """
+    from inference_core import FEATURE_NAMES, FEATURE_RANGES, ScoringBuffers
+    from validation import FeatureValidator
+
+    record = dict(zip(FEATURE_NAMES, X[0].tolist()))
+    validator = FeatureValidator(FEATURE_NAMES, FEATURE_RANGES)
+    buffers = ScoringBuffers()
+    n_classes = len(model.classes_)
+    report = {}
+    for name in names or ENGINES:
+        engine = build_engine(model, name, model_path)
+
+        def fresh():
+            values = validator.check(record)[0]
+            return engine.predict_proba(np.array([values]))[0].tolist()
+
+        def buffered():
+            values = validator.check(record)[0]
+            buffers.X[0] = values
+            return engine.predict_proba(buffers.X, buffers.output(n_classes))[0].tolist()
+
+        assert fresh() == buffered()
+        report[name] = {
+            path: {
+                "peak_bytes": _peak_bytes(func, min(repeats, 50)),
+                "single_row_us": time_call(func, repeats) * 1e6
+            }
+            for path, func in (("fresh", fresh), ("buffered", buffered))
+        }
+    return report
+
+
+def print_allocation_report(report):
+    """Print an allocation report."""
+    print(f"{'Engine':<14}{'fresh bytes':>13}{'buffered':>10}{'fresh us':>10}{'buffered':>10}")
+    for name, result in report.items():
+        fresh, buffered = result["fresh"], result["buffered"]
+        print(f"{name:<14}{fresh['peak_bytes']:>13,.0f}{buffered['peak_bytes']:>10,.0f}"
+              f"{fresh['single_row_us']:>10.1f}{buffered['single_row_us']:>10.1f}")
+
+
+def print_results(results):
+    """Print benchmark results relative to the sklearn engine."""
+    baseline = results.get("sklearn")
+    print(f"{'Engine':<14}{'build s':>9}{'1-row us':>12}{'batch ms':>11}{'speedup':>10}  parity")
+    for name, result in results.items():
+        speedup = baseline["single_row_us"] / result["single_row_us"] if baseline else float('nan')
+        parity = "✅" if result["parity"] else "❌"
+        print(f"{name:<14}{result['build_s']:>9.3f}{result['single_row_us']:>12.1f}"
+              f"{result['batch_ms']:>11.2f}{speedup:>9.1f}x  {parity}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Benchmark the fetal health inference engines')
+    parser.add_argument('--model', default=MODEL_PATH, help='Model to benchmark')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), help='Engines to run (default: all)')
+    parser.add_argument('--rows', type=int, help='Limit the number of CSV rows used')
+    parser.add_argument('--repeats', type=int, default=200, help='Single-row repetitions (default: 200)')
+    parser.add_argument('--float32', action='store_true',
+                        help='Report float32 parity and memory instead of timings')
+    parser.add_argument('--allocations', action='store_true',
+                        help='Report per-request allocations of single-record scoring instead')
+    parser.add_argument('--json', help='Also write the results as JSON to this path')
+    args = parser.parse_args()
+
+    import joblib
+    model = joblib.load(args.model)
+    X, _ = load_dataset(limit=args.rows)
+
+    if args.allocations:
+        print(f"🔍 Measuring single-record allocations...\n")
+        results = allocation_report(model, X, args.engines, args.repeats, args.model)
+        print_allocation_report(results)
+        passed = True
+    elif args.float32:
+        print(f"🔍 Checking float32 parity on {len(X)} records...\n")
+        results = float32_parity_report(model, X, args.engines)
+        print_float32_report(results)
+        passed = all(result["class_flips"] == 0 for result in results.values())
+    else:
+        print(f"⏱️ Benchmarking on {len(X)} records...\n")
+        results = run_benchmark(model, X, args.engines, args.repeats, args.model)
+        print_results(results)
+        passed = all(result["parity"] for result in results.values())
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
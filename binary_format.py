@@ -0,0 +1,151 @@
+"""
+Fetal Health Prediction System - Binary Batch Format
+A packed request and response format for POST /api/predict/binary, so bulk
+integrations skip JSON encoding entirely: feature rows arrive as raw
+little-endian floats and are scored where they lie in the request body.
+
+Request (application/octet-stream):
+    16-byte header: magic b"FHRQ", format version (uint8), bytes per value
+    (uint8, 4 for float32 or 8 for float64), features per row (uint16),
+    rows (uint32), reserved (uint32, 0); then rows x features values in
+    FEATURE_NAMES order.
+
+Response (application/octet-stream):
+    16-byte header: magic b"FHRS", format version (uint8), bytes per
+    probability (uint8, same as the request), classes (uint16), rows
+    (uint32), valid rows (uint32); then rows x classes probabilities (NaN
+    for rejected rows), one uint32 violation mask per row (bit j set when
+    feature j is out of range or NaN) and one uint8 class code per row (an
+    index into the X-Class-Labels response header, 255 for rejected rows).
+"""
+
+import struct
+
+import numpy as np
+
+CONTENT_TYPE = "application/octet-stream"
+FORMAT_VERSION = 1
+REQUEST_MAGIC = b"FHRQ"
+RESPONSE_MAGIC = b"FHRS"
+HEADER = struct.Struct("<4sBBHII")
+# Little-endian value types by their size in bytes
+DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+REJECTED = 255
+
+
+def _dtype(itemsize):
+    if itemsize not in DTYPES:
+        raise ValueError(f"Unsupported value size {itemsize}: expected 4 (float32) or 8 (float64)")
+    return DTYPES[itemsize]
+
+
+def pack_request(X, dtype=np.float32):
+    """Pack an (N, n_features) matrix into a request body."""
+    X = np.ascontiguousarray(X, dtype=np.dtype(dtype).newbyteorder("<"))
+    if X.ndim != 2:
+        raise ValueError("Expected a 2-D matrix of features")
+    header = HEADER.pack(REQUEST_MAGIC, FORMAT_VERSION, X.itemsize, X.shape[1], X.shape[0], 0)
+    return header + X.tobytes()
+
+
+def unpack_request(body, n_features):
+    """Wrap the rows of a request body as an (N, n_features) matrix without copying.
+
+    The matrix is a read-only view of body. Raises ValueError when the
+    header or the body length do not match.
+    """
+    if len(body) < HEADER.size:
+        raise ValueError(f"Body shorter than the {HEADER.size}-byte header")
+    magic, version, itemsize, columns, rows, _ = HEADER.unpack_from(body)
+    if magic != REQUEST_MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} {REQUEST_MAGIC.decode()} request")
+    if columns != n_features:
+        raise ValueError(f"Expected {n_features} features per row, got {columns}")
+    dtype = _dtype(itemsize)
+    expected = HEADER.size + rows * columns * itemsize
+    if len(body) != expected:
+        raise ValueError(f"Expected {expected} bytes for {rows} rows, got {len(body)}")
+    return np.frombuffer(body, dtype=dtype, count=rows * columns, offset=HEADER.size).reshape(rows, columns)
+
+
+def pack_response(probabilities, codes, violations, dtype):
+    """Pack the results of N rows into a response body.
+
+    probabilities is (N, n_classes) with NaN rows for rejected records,
+    codes the class indexes (REJECTED for rejected records) and violations
+    the per-row masks.
+    """
+    probabilities = np.ascontiguousarray(probabilities, dtype=np.dtype(dtype).newbyteorder("<"))
+    rows, classes = probabilities.shape
+    valid = int(np.count_nonzero(codes != REJECTED))
+    header = HEADER.pack(RESPONSE_MAGIC, FORMAT_VERSION, probabilities.itemsize, classes, rows, valid)
+    return b"".join([
+        header,
+        probabilities.tobytes(),
+        np.asarray(violations, dtype="<u4").tobytes(),
+        np.asarray(codes, dtype=np.uint8).tobytes()
+    ])
+
+
+def unpack_response(body):
+    """Read a response body back into (codes, probabilities, violation masks)."""
+    magic, version, itemsize, classes, rows, _ = HEADER.unpack_from(body)
+    if magic != RESPONSE_MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} {RESPONSE_MAGIC.decode()} response")
+    offset = HEADER.size
+    probabilities = np.frombuffer(body, dtype=_dtype(itemsize), count=rows * classes, offset=offset)
+    offset += probabilities.nbytes
+    violations = np.frombuffer(body, dtype="<u4", count=rows, offset=offset)
+    codes = np.frombuffer(body, dtype=np.uint8, count=rows, offset=offset + violations.nbytes)
+    return codes, probabilities.reshape(rows, classes), violations
+
+
+def predict_binary(core, validator, body):
+    """Score a binary request body on core; returns (response body, ServingModel).
+
+    Rows are range-checked in bulk with validator and only the rows that
+    pass are scored, in a single engine call on the request's own memory
+    when every row passes. Returns None when no model is loaded and raises
+    ValueError for a malformed body.
+    """
+    X = unpack_request(body, len(validator.feature_names))
+    if not len(X):
+        raise ValueError("No records provided")
+    current = core.current()
+    if current is None:
+        return None
+
+    violations = validator.violations(X)
+    valid = violations == 0
+    probabilities = np.full((len(X), len(current.labels)), np.nan)
+    codes = np.full(len(X), REJECTED, dtype=np.uint8)
+    if valid.all():
+        current, probabilities = core.predict_batch(X)
+    elif valid.any():
+        current, probabilities[valid] = core.predict_batch(X[valid])
+    codes[valid] = probabilities[valid].argmax(axis=1)
+    return pack_response(probabilities, codes, violations, X.dtype), current
+
+
+def handle_binary_request(core, validator, mimetype, body):
+    """Serve one POST /api/predict/binary request for either application.
+
+    Returns (status, payload, headers): the packed response body with the
+    X-Model-Version and X-Class-Labels headers on success, otherwise an
+    error message for the JSON error response.
+    """
+    if mimetype != CONTENT_TYPE:
+        return 415, f"Expected {CONTENT_TYPE}", {}
+    try:
+        scored = predict_binary(core, validator, body)
+    except ValueError as e:
+        return 400, f"Invalid batch: {str(e)}", {}
+    except Exception as e:
+        return 500, str(e), {}
+    if scored is None:
+        return 503, "Model not loaded", {}
+    payload, current = scored
+    return 200, payload, {
+        "X-Model-Version": current.version,
+        "X-Class-Labels": ",".join(current.labels)
+    }
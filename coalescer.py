@@ -0,0 +1,180 @@
+"""
+Fetal Health Prediction System - Request Coalescer
+Micro-batches concurrent single-record predictions into one forest call.
+"""
+
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from process_local import ProcessLocal, start_daemon
+
+
+class _Pending:
+    """A caller waiting for the probabilities of its rows."""
+
+    __slots__ = ('X', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, X):
+        self.X = X
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PredictionCoalescer:
+    """Collect concurrent predict_proba calls and score them as one batch.
+
+    Callers block while a background thread gathers requests for up to
+    max_wait seconds or max_rows rows, runs a single predict_proba on the
+    stacked rows and hands each caller its slice of the result. Inputs that
+    are already at least max_rows long skip the queue. Each process gets its
+    own worker thread (see process_local). close() lets the thread finish
+    what is queued and exit; later calls are scored directly.
+    """
+
+    def __init__(self, engine, max_rows=64, max_wait=0.002):
+        self.engine = engine
+        self.name = engine.name
+        self.classes_ = engine.classes_
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        # The queue and the thread scoring it, per process
+        self._worker = ProcessLocal(self._start_worker, self._stop_worker)
+        self._closed = False
+        self._put_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._max_batch_rows = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def predict_proba(self, X, out=None):
+        # X may be the caller's reusable buffer; the caller blocks until
+        # the batch holding it is scored, so it is not overwritten meanwhile
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) >= self.max_rows or self._closed:
+            return self.engine.predict_proba(X, out)
+
+        pending = _Pending(X)
+        with self._put_lock:
+            # Nothing may be queued behind the close() or stop() sentinel
+            if self._closed:
+                return self.engine.predict_proba(X, out)
+            requests, _ = self._worker.get()
+            requests.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        if out is None:
+            return pending.result
+        out[...] = pending.result
+        return out
+
+    def _start_worker(self):
+        requests = queue.Queue()
+        return requests, start_daemon(self._run, "prediction-coalescer", requests)
+
+    @staticmethod
+    def _stop_worker(worker):
+        requests, thread = worker
+        requests.put(None)
+        thread.join()
+
+    def close(self):
+        """Stop the worker thread once the requests already queued are scored."""
+        with self._put_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._worker.stop()
+
+    def stop(self):
+        """Stop this process's worker thread like close(), but let the next call start a new one."""
+        with self._put_lock:
+            self._worker.stop()
+
+    def _run(self, requests):
+        while True:
+            first = requests.get()
+            if first is None:
+                return
+            batch, rows = [first], len(first.X)
+            closing = False
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_rows:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if pending is None:
+                    closing = True
+                    break
+                batch.append(pending)
+                rows += len(pending.X)
+            self._score(batch, rows)
+            if closing:
+                return
+
+    def _score(self, batch, rows):
+        started = time.perf_counter()
+        try:
+            proba = self.engine.predict_proba(np.concatenate([p.X for p in batch]))
+            start = 0
+            for pending in batch:
+                pending.result = proba[start:start + len(pending.X)]
+                start += len(pending.X)
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+
+        waits = [started - pending.enqueued for pending in batch]
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._rows += rows
+            self._max_batch_rows = max(self._max_batch_rows, rows)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+        for pending in batch:
+            pending.done.set()
+
+    def stats(self):
+        """Return batch size and queue wait metrics for /health."""
+        with self._stats_lock:
+            requests = self._requests
+            return {
+                "max_rows": self.max_rows,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self._batches,
+                "requests": requests,
+                "rows": self._rows,
+                "mean_batch_rows": self._rows / self._batches if self._batches else 0.0,
+                "max_batch_rows": self._max_batch_rows,
+                "mean_queue_wait_ms": self._wait_total / requests * 1000 if requests else 0.0,
+                "max_queue_wait_ms": self._wait_max * 1000
+            }
+
+
+def build_coalescer(engine):
+    """Wrap engine in a PredictionCoalescer when PREDICTION_COALESCE is set.
+
+    COALESCE_WINDOW_MS and COALESCE_MAX_ROWS bound how long and how many
+    rows a batch collects. Returns None when coalescing is disabled.
+    """
+    if os.environ.get('PREDICTION_COALESCE', 'false').lower() not in ('1', 'true', 'yes'):
+        return None
+    return PredictionCoalescer(
+        engine,
+        max_rows=int(os.environ.get('COALESCE_MAX_ROWS', 64)),
+        max_wait=float(os.environ.get('COALESCE_WINDOW_MS', 2)) / 1000
+    )
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Fetal Health Prediction System - Forest Compaction Tool
+Produces a smaller, faster RandomForest from models/fetal_health.pkl whose
+accuracy on data/fetal_health.csv stays within a configured delta of the
+original model's accuracy on the same records.
+"""
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import sys
+import time
+import numpy as np
+
+from dataset import load_dataset
+from engines import _node_distributions
+from model_manifest import write_model_manifest, sidecar_path
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "models", "fetal_health.pkl")
+OUTPUT_PATH = os.path.join(BASE_DIR, "models", "fetal_health_compact.pkl")
+
+# Held-out accuracy reported for the trained model (see the agent's "accuracy"
+# answer); shown for reference only, as it was not measured on the records
+# the candidates are scored on
+REPORTED_ACCURACY = 0.9592
+
+
+def prune_tree(estimator, max_depth=None):
+    """Return a copy of a fitted tree with redundant and too-deep splits removed.
+
+    Nodes at max_depth become leaves carrying the class distribution of the
+    training samples that reached them. Splits whose two leaf children hold
+    identical distributions are merged into a single leaf, bottom-up, which
+    leaves predict_proba unchanged.
+    """
+    tree = estimator.tree_
+    n_classes = int(tree.n_classes[0])
+    state = tree.__getstate__()
+    nodes, values = state['nodes'], state['values'].copy()
+    left, right = tree.children_left, tree.children_right
+    distribution = _node_distributions(tree, n_classes)
+
+    # Pre-order walk recording depths; reversed it visits children first
+    order, depth = [], np.zeros(tree.node_count, dtype=np.intp)
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+            stack.extend((right[node], left[node]))
+
+    is_leaf = left == -1
+    for node in reversed(order):
+        if is_leaf[node]:
+            continue
+        if max_depth is not None and depth[node] >= max_depth:
+            is_leaf[node] = True
+        elif (is_leaf[left[node]] and is_leaf[right[node]]
+              and np.array_equal(distribution[left[node]], distribution[right[node]])):
+            is_leaf[node] = True
+            values[node] = values[left[node]]
+            distribution[node] = distribution[left[node]]
+
+    # Re-number the surviving nodes in pre-order
+    kept, stack = [], [0]
+    while stack:
+        node = stack.pop()
+        kept.append(node)
+        if not is_leaf[node]:
+            stack.extend((right[node], left[node]))
+    index = {old: new for new, old in enumerate(kept)}
+
+    new_nodes = nodes[kept].copy()
+    for new, old in enumerate(kept):
+        if is_leaf[old]:
+            new_nodes[new]['left_child'] = new_nodes[new]['right_child'] = -1
+            new_nodes[new]['feature'] = -2
+            new_nodes[new]['threshold'] = -2.0
+        else:
+            new_nodes[new]['left_child'] = index[left[old]]
+            new_nodes[new]['right_child'] = index[right[old]]
+
+    pruned = type(tree)(tree.n_features, tree.n_classes, tree.n_outputs)
+    pruned.__setstate__({
+        'max_depth': int(depth[kept].max()),
+        'node_count': len(kept),
+        'nodes': np.ascontiguousarray(new_nodes),
+        'values': np.ascontiguousarray(values[kept])
+    })
+    compact = copy.copy(estimator)
+    compact.tree_ = pruned
+    return compact
+
+
+def build_forest(model, estimators):
+    """Return a shallow copy of model that uses the given trees."""
+    forest = copy.copy(model)
+    forest.estimators_ = list(estimators)
+    forest.n_estimators = len(estimators)
+    return forest
+
+
+def search(model, X, y, target_accuracy, depths, min_trees=1):
+    """Find the smallest (depth, tree subset) forest meeting target_accuracy.
+
+    For each depth limit the trees are pruned, ranked by their individual
+    accuracy, and every prefix of that ranking is scored from cumulative
+    probability sums. Returns the candidate with the fewest nodes.
+    """
+    best = None
+    for max_depth in depths:
+        trees = [prune_tree(estimator, max_depth) for estimator in model.estimators_]
+        per_tree = np.stack([tree.predict_proba(X) for tree in trees])
+        tree_accuracy = (model.classes_[per_tree.argmax(axis=2)] == y).mean(axis=1)
+        ranking = np.argsort(-tree_accuracy, kind='stable')
+
+        cumulative = np.cumsum(per_tree[ranking], axis=0)
+        accuracy = (model.classes_[cumulative.argmax(axis=2)] == y).mean(axis=1)
+        node_counts = np.cumsum([trees[i].tree_.node_count for i in ranking])
+
+        for k in range(min_trees, len(trees) + 1):
+            if accuracy[k - 1] < target_accuracy:
+                continue
+            candidate = (node_counts[k - 1], k, max_depth)
+            if best is None or candidate[:2] < best[0][:2]:
+                best = (candidate, [trees[i] for i in ranking[:k]])
+            break
+    if best is None:
+        return None
+    (_, _, max_depth), estimators = best
+    return build_forest(model, estimators), max_depth
+
+
+def measure(model, X, y, repeats=50):
+    """Return size, accuracy and latency figures for a forest."""
+    row = X[:1]
+    single = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        single.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    predictions = model.classes_[model.predict_proba(X).argmax(axis=1)]
+    batch = time.perf_counter() - start
+    return {
+        "trees": len(model.estimators_),
+        "nodes": int(sum(e.tree_.node_count for e in model.estimators_)),
+        "max_depth": int(max(e.tree_.max_depth for e in model.estimators_)),
+        "pickle_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "accuracy": float((predictions == y).mean()),
+        "single_row_ms": float(np.median(single) * 1000),
+        "batch_ms": batch * 1000
+    }
+
+
+def compact(model, X, y, baseline=None, max_delta=0.005, min_trees=10, depths=None):
+    """Compact model and return (compact_model, report), or (None, report).
+
+    The compact forest may lose at most max_delta of accuracy against
+    baseline, which defaults to the original model's accuracy on X, y.
+    """
+    if depths is None:
+        deepest = max(e.tree_.max_depth for e in model.estimators_)
+        depths = [None] + list(range(deepest - 1, 3, -1))
+    original = measure(model, X, y)
+    if baseline is None:
+        baseline = original["accuracy"]
+    target = baseline - max_delta
+    result = search(model, X, y, target, depths, min_trees)
+    report = {"baseline_accuracy": baseline, "reported_accuracy": REPORTED_ACCURACY,
+              "max_delta": max_delta, "target_accuracy": target, "original": original}
+    if result is None:
+        return None, report
+    forest, max_depth = result
+    report["depth_limit"] = max_depth
+    report["compact"] = measure(forest, X, y)
+    original, compacted = report["original"], report["compact"]
+    report["agreement"] = float(np.mean(model.predict(X) == forest.predict(X)))
+    report["savings"] = {
+        "nodes": 1 - compacted["nodes"] / original["nodes"],
+        "pickle_bytes": 1 - compacted["pickle_bytes"] / original["pickle_bytes"],
+        "single_row_latency": 1 - compacted["single_row_ms"] / original["single_row_ms"],
+        "batch_latency": 1 - compacted["batch_ms"] / original["batch_ms"]
+    }
+    return forest, report
+
+
+def print_report(report):
+    """Print a compaction report."""
+    original = report["original"]
+    print(f"🎯 Target accuracy: {report['target_accuracy']:.2%} "
+          f"(baseline {report['baseline_accuracy']:.2%} - {report['max_delta']:.2%}; "
+          f"reported held-out accuracy {report['reported_accuracy']:.2%})")
+    if "compact" not in report:
+        print("❌ No compact forest meets the target accuracy")
+        return
+    compacted = report["compact"]
+    print(f"\n{'':<16}{'original':>14}{'compact':>14}")
+    for key, label in [("trees", "Trees"), ("nodes", "Nodes"), ("max_depth", "Max depth"),
+                       ("pickle_bytes", "Pickle bytes"), ("accuracy", "Accuracy"),
+                       ("single_row_ms", "1-row ms"), ("batch_ms", "Batch ms")]:
+        fmt = "{:>14.2%}" if key == "accuracy" else "{:>14.3f}" if key.endswith("_ms") else "{:>14,}"
+        print(f"{label:<16}" + fmt.format(original[key]) + fmt.format(compacted[key]))
+    print(f"\n✅ Agreement with original: {report['agreement']:.2%}")
+    for key, saving in report["savings"].items():
+        print(f"   {key.replace('_', ' ')} saved: {saving:.1%}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Compact the fetal health Random Forest')
+    parser.add_argument('--model', default=MODEL_PATH, help='Model to compact')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='Where to write the compact model')
+    parser.add_argument('--data', default=None, help='Evaluation CSV (default: data/fetal_health.csv)')
+    parser.add_argument('--baseline', type=float, default=None,
+                        help="Reference accuracy (default: the original model's on the evaluation data)")
+    parser.add_argument('--max-delta', type=float, default=0.005,
+                        help='Allowed accuracy loss below the baseline (default: 0.005)')
+    parser.add_argument('--min-trees', type=int, default=10,
+                        help='Smallest number of trees to consider (default: 10)')
+    parser.add_argument('--report', help='Also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    import joblib
+    model = joblib.load(args.model)
+    X, y = load_dataset(args.data) if args.data else load_dataset()
+
+    print(f"🔍 Compacting {args.model} on {len(X)} records...")
+    forest, report = compact(model, X, y, args.baseline, args.max_delta, args.min_trees)
+    print_report(report)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    if forest is None:
+        return 1
+
+    joblib.dump(forest, args.output)
+    from inference_core import CLASS_LABELS, FEATURE_NAMES
+    write_model_manifest(args.output, forest, CLASS_LABELS, FEATURE_NAMES, {
+        "dataset_accuracy": report['compact']['accuracy'],
+        "dataset_rows": int(len(y))
+    })
+    print(f"\n💾 Compact model written to {args.output} (manifest: {sidecar_path(args.output)})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Fetal Health Prediction System - Dataset Helpers
+Load the CTG records in data/fetal_health.csv in the model's feature order.
+"""
+
+import os
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "data", "fetal_health.csv")
+
+# CSV columns of the model features, in the same order as FEATURE_NAMES
+DATASET_COLUMNS = [
+    'prolongued_decelerations',
+    'abnormal_short_term_variability',
+    'percentage_of_time_with_abnormal_long_term_variability',
+    'histogram_variance',
+    'histogram_median',
+    'mean_value_of_long_term_variability',
+    'histogram_mode',
+    'accelerations'
+]
+
+TARGET_COLUMN = 'fetal_health'
+
+
+def load_dataset(path=DATA_PATH, limit=None):
+    """Return (X, y) with X as an (N, 8) float64 matrix in model feature order."""
+    import pandas as pd
+
+    df = pd.read_csv(path, nrows=limit)
+    X = df[DATASET_COLUMNS].to_numpy(dtype=np.float64)
+    y = df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+    return X, y
@@ -0,0 +1,571 @@
+"""
+Fetal Health Prediction System - Inference Engines
+Forest evaluators that reproduce RandomForestClassifier.predict_proba for the
+loaded model, selectable with the INFERENCE_ENGINE environment variable.
+Every engine's predict_proba(X, out=None) writes into out, an (N, n_classes)
+float64 buffer, when the caller passes one.
+"""
+
+import os
+import sys
+import hashlib
+import itertools
+import marshal
+import numpy as np
+
+from threading_policy import get_threading_policy
+
+DEFAULT_ENGINE = "sklearn"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Where compiled engines are cached between restarts (ENGINE_CACHE_DIR)
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, "temp", "engine_cache")
+
+
+class SklearnEngine:
+    """Delegate to the model's own predict_proba.
+
+    The threading policy decides per call whether the forest's trees are
+    spread over joblib threads, instead of the n_jobs pickled with it.
+    sklearn always allocates its result, so an out buffer is filled with a
+    copy rather than saving the allocation.
+    """
+
+    name = "sklearn"
+
+    def __init__(self, model, model_path=None):
+        self.model = model
+        self.classes_ = model.classes_
+        self.policy = get_threading_policy()
+        self.policy.prepare(model)
+
+    def predict_proba(self, X, out=None):
+        with self.policy.parallel(len(X)):
+            return _store(self.model.predict_proba(X), out)
+
+
+class FlatForestEngine:
+    """Evaluate every tree of the forest at once over flat node arrays.
+
+    The nodes of all trees are concatenated into contiguous arrays and each
+    row walks all trees in lock-step with NumPy fancy indexing, so a call
+    costs max_depth vectorized steps instead of a Python loop over trees.
+    Leaves point back at themselves, which lets every walk run for exactly
+    max_depth steps without masking.
+    """
+
+    name = "flat"
+    supports_float32 = True
+
+    def __init__(self, model, model_path=None, float32=False):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        counts = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            value.append(_node_distributions(tree, len(model.classes_)))
+
+        self.classes_ = model.classes_
+        self.n_trees = len(trees)
+        self.roots = offsets.astype(np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.value = np.concatenate(value)
+        if float32:
+            self.threshold = _float32_thresholds(self.threshold)
+            self.value = self.value.astype(np.float32)
+        self.max_depth = int(max(tree.max_depth for tree in trees))
+
+    # Node arrays returned by to_arrays() and accepted by from_arrays()
+    ARRAY_NAMES = ('roots', 'feature', 'threshold', 'left', 'right', 'value')
+
+    def to_arrays(self):
+        """Return the engine's node arrays by name."""
+        return {name: getattr(self, name) for name in self.ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, arrays, classes, max_depth):
+        """Build an engine over existing (e.g. memory-mapped) node arrays."""
+        engine = cls.__new__(cls)
+        for name in cls.ARRAY_NAMES:
+            setattr(engine, name, arrays[name])
+        engine.classes_ = classes
+        engine.n_trees = len(arrays['roots'])
+        engine.max_depth = max_depth
+        return engine
+
+    def apply(self, X):
+        """Return the (N, n_trees) global indices of the leaf reached per tree."""
+        X = _tree_inputs(X)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X, out=None):
+        return _average_leaf_values(self.value, self.apply(X), out)
+
+
+class CodegenEngine:
+    """Evaluate the forest with generated Python source.
+
+    Every tree becomes a block of nested comparisons that adds its leaf
+    distribution to running per-class sums, all inside one function. The
+    compiled code object is cached on disk keyed by the SHA-256 of the model
+    artifact, so workers only pay for code generation once per model. The
+    key also holds the scikit-learn version, which decides how the leaf
+    distributions are read from the trees (see _node_distributions).
+    """
+
+    name = "codegen"
+
+    # Bump when the generated source changes so stale caches are ignored
+    CODEGEN_VERSION = 1
+
+    def __init__(self, model, model_path=None, cache_dir=None):
+        self.classes_ = model.classes_
+        self.n_trees = len(model.estimators_)
+        self.cache_path = None
+        self.loaded_from_cache = False
+
+        if model_path is not None and os.path.exists(model_path):
+            if cache_dir is None:
+                cache_dir = os.environ.get('ENGINE_CACHE_DIR', DEFAULT_CACHE_DIR)
+            import sklearn
+            from model_manifest import artifact_sha256
+            key = (f"{artifact_sha256(model_path)}-sklearn{sklearn.__version__}"
+                   f"-{sys.implementation.cache_tag}-v{self.CODEGEN_VERSION}")
+            self.cache_path = os.path.join(cache_dir, f"forest-{key}.marshal")
+
+        code = self._load_cached()
+        if code is None:
+            code = compile(generate_forest_source(model), "<forest>", "exec")
+            self._store_cached(code)
+
+        namespace = {}
+        exec(code, namespace)
+        self._predict_row = namespace['predict_row']
+
+    def _load_cached(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                code = marshal.load(f)
+            self.loaded_from_cache = True
+            return code
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def _store_cached(self, code):
+        if self.cache_path is None:
+            return
+        # Write to a temporary file and rename so concurrent workers never
+        # read a partially written cache entry
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(code, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not cache compiled engine: {e}")
+
+    def predict_proba(self, X, out=None):
+        rows = _tree_inputs(X).tolist()
+        predict_row = self._predict_row
+        if out is None:
+            proba = np.array([predict_row(*row) for row in rows], dtype=np.float64)
+            proba = proba.reshape(len(rows), len(self.classes_))
+        else:
+            # The sums are written straight into the caller's buffer
+            proba = out
+            for i, row in enumerate(rows):
+                proba[i] = predict_row(*row)
+        proba /= self.n_trees
+        return proba
+
+
+class QuickScorerEngine:
+    """Evaluate the forest with QuickScorer-style leaf bitvectors.
+
+    Leaves of each tree are numbered left to right and every split owns a
+    mask that clears the leaves of its left subtree, i.e. the leaves ruled
+    out when the test x <= threshold is false. The exit leaf of a tree is
+    the leftmost leaf that survives the masks of all its false splits.
+
+    With only eight features the forest has few distinct thresholds per
+    feature, so the AND of the masks of all splits with threshold below a
+    value is precomputed per feature. Scoring a row is then one binary
+    search per feature, an AND of eight prefix masks per tree and a
+    lowest-set-bit lookup, shared by all trees at once.
+    """
+
+    name = "quickscorer"
+    supports_float32 = True
+
+    def __init__(self, model, model_path=None, float32=False):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        n_classes = len(model.classes_)
+        n_leaves = int(max(tree.n_leaves for tree in trees))
+        n_words = (n_leaves + 63) // 64
+        all_ones = (1 << (64 * n_words)) - 1
+
+        self.classes_ = model.classes_
+        self.n_trees = len(trees)
+        self.leaf_value = np.zeros((len(trees), n_leaves, n_classes))
+        splits = {feature: [] for feature in range(model.n_features_in_)}
+
+        for t, tree in enumerate(trees):
+            distribution = _node_distributions(tree, n_classes)
+            ranges = _leaf_ranges(tree)
+            for node, (first, _) in ranges.items():
+                left = tree.children_left[node]
+                if left == -1:
+                    self.leaf_value[t, first] = distribution[node]
+                    continue
+                left_first, left_last = ranges[left]
+                cleared = ((1 << (left_last - left_first)) - 1) << left_first
+                splits[tree.feature[node]].append((tree.threshold[node], t, _to_words(all_ones ^ cleared, n_words)))
+
+        self.thresholds = []
+        self.prefix_masks = []
+        for feature in range(model.n_features_in_):
+            current = np.full((len(trees), n_words), np.iinfo(np.uint64).max, dtype=np.uint64)
+            thresholds, masks = [], [current.copy()]
+            for threshold, group in itertools.groupby(sorted(splits[feature], key=lambda split: split[0]),
+                                                      key=lambda split: split[0]):
+                for _, t, mask in group:
+                    current[t] &= mask
+                thresholds.append(threshold)
+                masks.append(current.copy())
+            self.thresholds.append(_float32_thresholds(np.array(thresholds)) if float32 else np.array(thresholds))
+            self.prefix_masks.append(np.stack(masks))
+        if float32:
+            self.leaf_value = self.leaf_value.astype(np.float32)
+
+    def apply(self, X):
+        """Return the (N, n_trees) exit leaf index of every tree."""
+        X = _tree_inputs(X).astype(self.thresholds[0].dtype)
+        bits = None
+        for feature, (thresholds, masks) in enumerate(zip(self.thresholds, self.prefix_masks)):
+            # Splits with threshold < x evaluate false
+            false_count = np.searchsorted(thresholds, X[:, feature], side='left')
+            bits = masks[false_count] if bits is None else bits & masks[false_count]
+
+        word = (bits != 0).argmax(axis=2)
+        value = np.take_along_axis(bits, word[..., np.newaxis], axis=2)[..., 0]
+        lowest = value & (~value + np.uint64(1))
+        return word * 64 + np.log2(lowest.astype(np.float64)).astype(np.intp)
+
+    def predict_proba(self, X, out=None):
+        leaves = self.apply(X)
+        per_tree = self.leaf_value[np.arange(self.n_trees), leaves].transpose(1, 0, 2)
+        proba = np.add.accumulate(per_tree, axis=0, dtype=np.float64)[-1]
+        return np.divide(proba, self.n_trees, out=proba if out is None else out)
+
+
+def _leaf_ranges(tree):
+    """Map every node to the [first, last) range of its leaves, numbered left to right."""
+    ranges = {}
+    next_leaf = 0
+    stack = [(0, False)]
+    while stack:
+        node, visited = stack.pop()
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == -1:
+            ranges[node] = (next_leaf, next_leaf + 1)
+            next_leaf += 1
+        elif visited:
+            ranges[node] = (ranges[left][0], ranges[right][1])
+        else:
+            stack.extend(((node, True), (right, False), (left, False)))
+    return ranges
+
+
+def _to_words(bits, n_words):
+    """Split a Python int bitvector into n_words little-endian uint64 words."""
+    word_mask = (1 << 64) - 1
+    return np.array([(bits >> (64 * w)) & word_mask for w in range(n_words)], dtype=np.uint64)
+
+
+class GemmEngine:
+    """Evaluate the forest with matrix products over all split decisions.
+
+    Following the GEMM strategy of Hummingbird, the forest is compiled into
+    a split selection (feature index and threshold per internal node), a
+    sparse path matrix with +1 where a leaf lies in a node's left subtree
+    and -1 where it lies in the right one, and the number of left turns on
+    each leaf's path. A leaf is reached exactly when the product of the
+    split decisions with the path matrix equals its left-turn count, and a
+    leaf matrix turns the reached indicators back into leaf ids. Rows are
+    scored in chunks to bound the size of the decision matrix; the fixed
+    per-call cost makes the engine suited to large batches only.
+    """
+
+    name = "gemm"
+    supports_float32 = True
+
+    def __init__(self, model, model_path=None, chunk_rows=512, float32=False):
+        from scipy import sparse
+
+        n_classes = len(model.classes_)
+        feature, threshold, leaf_value = [], [], []
+        path_rows, path_cols, path_signs, left_turns = [], [], [], []
+        tree_leaf_starts = []
+        internal_offset = leaf_offset = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            distribution = _node_distributions(tree, n_classes)
+            is_leaf = tree.children_left == -1
+            internal_index = np.cumsum(~is_leaf) - 1 + internal_offset
+            leaf_index = np.cumsum(is_leaf) - 1 + leaf_offset
+
+            # Walk each root-to-leaf path recording the turns taken
+            stack = [(0, [])]
+            while stack:
+                node, path = stack.pop()
+                if is_leaf[node]:
+                    for ancestor, sign in path:
+                        path_rows.append(internal_index[ancestor])
+                        path_cols.append(leaf_index[node])
+                        path_signs.append(sign)
+                    left_turns.append((leaf_index[node], sum(sign > 0 for _, sign in path)))
+                    continue
+                stack.append((tree.children_right[node], path + [(node, -1)]))
+                stack.append((tree.children_left[node], path + [(node, 1)]))
+
+            tree_leaf_starts.append(leaf_offset)
+            feature.append(tree.feature[~is_leaf])
+            threshold.append(tree.threshold[~is_leaf])
+            leaf_value.append(distribution[is_leaf])
+            internal_offset += int((~is_leaf).sum())
+            leaf_offset += int(is_leaf.sum())
+
+        self.classes_ = model.classes_
+        self.n_trees = len(model.estimators_)
+        self.chunk_rows = chunk_rows
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = _float32_thresholds(np.concatenate(threshold))
+        self.leaf_value = np.concatenate(leaf_value)
+        if float32:
+            self.leaf_value = self.leaf_value.astype(np.float32)
+        # Leaf matrix: row t holds the ids of tree t's leaves, so multiplying
+        # it with the reached-leaf indicators yields each tree's exit leaf
+        tree_of_leaf = np.repeat(np.arange(self.n_trees), np.diff(tree_leaf_starts + [leaf_offset]))
+        self.leaf_matrix = sparse.csr_matrix(
+            (np.arange(leaf_offset, dtype=np.float32), (tree_of_leaf, np.arange(leaf_offset))),
+            shape=(self.n_trees, leaf_offset)
+        )
+        self.left_turns = np.zeros(leaf_offset, dtype=np.float32)
+        for leaf, turns in left_turns:
+            self.left_turns[leaf] = turns
+        # Transposed so the product is path.T @ decisions.T, sparse @ dense
+        self.path_t = sparse.csr_matrix(
+            (np.array(path_signs, dtype=np.float32), (path_cols, path_rows)),
+            shape=(leaf_offset, internal_offset)
+        )
+
+    def apply(self, X):
+        """Return the (N, n_trees) global indices of the leaf reached per tree."""
+        X = _tree_inputs(X)
+        leaves = np.empty((len(X), self.n_trees), dtype=np.intp)
+        for start in range(0, len(X), self.chunk_rows):
+            chunk = X[start:start + self.chunk_rows]
+            decisions = (chunk[:, self.feature] <= self.threshold).astype(np.float32)
+            reached = (self.path_t @ decisions.T) == self.left_turns[:, np.newaxis]
+            # Exactly one leaf per tree is reached; ids stay exact in float32
+            leaves[start:start + len(chunk)] = (self.leaf_matrix @ reached.astype(np.float32)).T
+        return leaves
+
+    def predict_proba(self, X, out=None):
+        return _average_leaf_values(self.leaf_value, self.apply(X), out)
+
+
+class SizeDispatchEngine:
+    """Route small inputs to one engine and large batches to another."""
+
+    def __init__(self, small, large, min_rows):
+        self.small = small
+        self.large = large
+        self.min_rows = min_rows
+        self.name = f"{small.name}+{large.name}"
+        self.classes_ = small.classes_
+
+    def predict_proba(self, X, out=None):
+        engine = self.large if len(X) >= self.min_rows else self.small
+        return engine.predict_proba(X, out)
+
+
+def engine_parts(engine):
+    """The engines behind engine, i.e. both sides of a size dispatch."""
+    if isinstance(engine, SizeDispatchEngine):
+        return engine_parts(engine.small) + engine_parts(engine.large)
+    return [engine]
+
+
+def generate_forest_source(model):
+    """Generate the source of predict_row(x0, ..., x7) for a fitted forest.
+
+    predict_row returns the per-class sums of the tree probabilities, added
+    in estimator order so dividing by the tree count matches predict_proba.
+    """
+    n_classes = len(model.classes_)
+    n_features = model.n_features_in_
+    sums = [f"p{c}" for c in range(n_classes)]
+    args = ", ".join(f"x{i}" for i in range(n_features))
+
+    lines = [f"def predict_row({args}):", f"    {' = '.join(sums)} = 0.0"]
+    for index, estimator in enumerate(model.estimators_):
+        tree = estimator.tree_
+        value = _node_distributions(tree, n_classes)
+        lines.append(f"    # tree {index}")
+        stack = [(0, 1)]
+        while stack:
+            node, depth = stack.pop()
+            indent = "    " * depth
+            if node == 'else':
+                lines.append(f"{indent}else:")
+                continue
+            if tree.children_left[node] == -1:
+                updates = [f"{sums[c]} += {float(value[node, c])!r}" for c in range(n_classes) if value[node, c] != 0.0]
+                lines.append(indent + ("; ".join(updates) or "pass"))
+                continue
+            lines.append(f"{indent}if x{tree.feature[node]} <= {float(tree.threshold[node])!r}:")
+            # Pushed in reverse so the left subtree is emitted first
+            stack.append((tree.children_right[node], depth + 1))
+            stack.append(('else', depth))
+            stack.append((tree.children_left[node], depth + 1))
+    lines.append(f"    return {', '.join(sums)}")
+    return "\n".join(lines) + "\n"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the hex SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tree_inputs(X):
+    """X as sklearn's trees compare it: rounded to float32, against float64 thresholds."""
+    return np.asarray(X, dtype=np.float32)
+
+
+def _float32_thresholds(threshold):
+    """Round float64 thresholds down to float32 without changing any split.
+
+    Inputs are rounded to float32 before comparison, exactly as sklearn's
+    trees do. For a float32 input x, x <= t holds exactly when x <= t32,
+    where t32 is the largest float32 not above t: any float32 that is at
+    most t is at most t32, and t32 itself is at most t. Rounding to nearest
+    instead could move t32 above t and send inputs in (t, t32] left.
+    """
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _sklearn_normalizes_proba():
+    """Whether tree predict_proba renormalizes node values (sklearn < 1.4).
+
+    Newer releases store class fractions in tree_.value and return them as
+    is; older ones divide the stored values by their sum on every call.
+    """
+    import sklearn
+    major, minor = (int(part) for part in sklearn.__version__.split('.')[:2])
+    return (major, minor) < (1, 4)
+
+
+def _node_distributions(tree, n_classes):
+    """Per-node class distributions exactly as tree predict_proba returns them."""
+    proba = tree.value[:, 0, :n_classes].copy()
+    if _sklearn_normalizes_proba():
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+    return proba
+
+
+def _average_leaf_values(value, leaves, out=None):
+    """Average leaf distributions over trees, bit-identical to sklearn.
+
+    The forest accumulates tree probabilities one tree at a time and then
+    divides by the tree count. np.add.accumulate is strictly sequential
+    along the tree axis, unlike np.add.reduce which may sum pairwise.
+    Sums are kept in float64 even when leaf values are stored as float32.
+    The result is written to out when one is given.
+    """
+    per_tree = value[leaves.T]
+    proba = np.add.accumulate(per_tree, axis=0, dtype=np.float64)[-1]
+    return np.divide(proba, leaves.shape[1], out=proba if out is None else out)
+
+
+def _store(proba, out):
+    """Return proba, copied into out when the caller passed a buffer."""
+    if out is None:
+        return proba
+    out[...] = proba
+    return out
+
+
+ENGINES = {
+    SklearnEngine.name: SklearnEngine,
+    FlatForestEngine.name: FlatForestEngine,
+    CodegenEngine.name: CodegenEngine,
+    QuickScorerEngine.name: QuickScorerEngine,
+    GemmEngine.name: GemmEngine,
+}
+
+
+def build_engine(model, name=None, model_path=None):
+    """Build the inference engine named by name or INFERENCE_ENGINE.
+
+    model_path identifies the artifact the model was loaded from, which
+    engines with on-disk caches use as their cache key. When the engine is
+    taken from the environment and BATCH_ENGINE is set, inputs of at least
+    BATCH_ENGINE_MIN_ROWS rows are routed to that engine instead.
+    INFERENCE_FLOAT32 stores thresholds and leaf distributions as float32
+    in the engines that support it. Memory-mapped artifacts (see
+    model_artifact.py) always use their own flat engine.
+    """
+    get_threading_policy()
+    # Memory-mapped artifacts carry a flat engine over their mapped arrays
+    if hasattr(model, 'engine') and not hasattr(model, 'estimators_'):
+        return model.engine
+    if name is not None:
+        return _create_engine(model, name, model_path)
+
+    engine = _create_engine(model, os.environ.get('INFERENCE_ENGINE', DEFAULT_ENGINE), model_path)
+    batch_name = os.environ.get('BATCH_ENGINE')
+    if batch_name and batch_name.lower() != engine.name:
+        min_rows = int(os.environ.get('BATCH_ENGINE_MIN_ROWS', 512))
+        engine = SizeDispatchEngine(engine, _create_engine(model, batch_name, model_path), min_rows)
+    return engine
+
+
+def _create_engine(model, name, model_path):
+    name = name.lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown inference engine '{name}'. Available: {', '.join(ENGINES)}")
+    engine_class = ENGINES[name]
+    if getattr(engine_class, 'supports_float32', False):
+        float32 = os.environ.get('INFERENCE_FLOAT32', 'false').lower() in ('1', 'true', 'yes')
+        return engine_class(model, model_path=model_path, float32=float32)
+    return engine_class(model, model_path=model_path)
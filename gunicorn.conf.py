@@ -0,0 +1,73 @@
+"""
+Fetal Health Prediction System - Gunicorn Configuration
+Preloads the application (and its model) once in the master, warms it up and
+freezes the heap before forking so workers share the model copy-on-write.
+Without preloading every worker warms itself up after it boots.
+
+Used by run.py, the Procfile, the Dockerfile and docker-compose.yml:
+    gunicorn --config gunicorn.conf.py app:app
+    gunicorn --config gunicorn.conf.py server:app   # both apps, one worker pool
+Set GUNICORN_PRELOAD=false to load the application in every worker instead.
+"""
+
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+
+def warm_up(app, log):
+    """Load the model and run a first prediction through POST /admin/warmup."""
+    try:
+        # werkzeug's client drives any WSGI app, including server.py's dispatcher
+        from werkzeug.test import Client
+        response = Client(app).post('/admin/warmup')
+        startup = (response.get_json() or {}).get('startup') or {}
+        if response.status_code != 200:
+            log.warning(f"Warm-up returned HTTP {response.status_code}")
+            return
+        phases = ", ".join(f"{key[:-len('_seconds')]}={value * 1000:.1f} ms"
+                           for key, value in startup.items()
+                           if key.endswith('_seconds') and value is not None)
+        log.info(f"Application warmed up ({phases})")
+    except Exception as e:
+        log.warning(f"Warm-up failed: {e}")
+
+
+def when_ready(server):
+    """Warm the preloaded application and freeze the heap before forking."""
+    if not preload_app:
+        return
+    warm_up(server.app.wsgi(), server.log)
+    # Warming up started the model watcher (and any coalescer and shadow
+    # threads); stop them so none is holding a lock when the workers fork.
+    # Each worker starts its own on first use
+    from inference_core import get_inference_core
+    get_inference_core().stop_background()
+    # Objects created so far (the model above all) move to a permanent
+    # generation the collector never touches, so refcount and GC bookkeeping
+    # in the workers do not dirty the pages they share with the master
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Froze {gc.get_freeze_count()} objects before forking workers")
+
+
+def post_fork(server, worker):
+    """Start the worker's boot clock."""
+    from worker_stats import mark_worker_start
+    mark_worker_start(preloaded=preload_app)
+
+
+def post_worker_init(worker):
+    """Warm the worker if needed, then report its boot time and memory."""
+    from worker_stats import mark_worker_ready, worker_report
+    if not preload_app:
+        warm_up(worker.wsgi, worker.log)
+    mark_worker_ready()
+    report = worker_report()
+    memory = report["memory"]
+    worker.log.info(
+        f"Worker {report['pid']} ready in {report['startup_seconds'] * 1000:.1f} ms "
+        f"(preloaded={report['preloaded']}, rss={memory.get('rss_kb', memory.get('max_rss_kb'))} kB, "
+        f"private={memory.get('private_dirty_kb', 'n/a')} kB dirty)"
+    )
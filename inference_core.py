@@ -0,0 +1,449 @@
+"""
+Fetal Health Prediction System - Inference Core
+The model, engine, prediction cache, reload watcher and shadow scorer that
+the main application and the AI agent score with. One core per process is
+shared by both, so a server hosting both UIs holds the model once.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+from engines import engine_parts
+from model_reload import build_serving_model, build_model_watcher, release_forest
+from model_registry import build_model_registry
+from model_manifest import read_model_manifest
+from shadow_scoring import build_shadow_scorer
+from prediction_cache import build_prediction_cache, split_thresholds
+from startup_timing import StartupTimer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Class labels mapping
+CLASS_LABELS = {
+    1.0: "NORMAL",
+    2.0: "SUSPECT",
+    3.0: "PATHOLOGICAL"
+}
+
+# Feature names in correct order
+FEATURE_NAMES = [
+    'prolongued_decelerations',
+    'abnormal_short_term_variability',
+    'percentage_abnormal_long_term_variability',
+    'histogram_variance',
+    'histogram_median',
+    'mean_long_term_variability',
+    'histogram_mode',
+    'accelerations'
+]
+
+# Feature validation ranges
+FEATURE_RANGES = {
+    'prolongued_decelerations': (0.0, 0.005),
+    'abnormal_short_term_variability': (12.0, 87.0),
+    'percentage_abnormal_long_term_variability': (0.0, 91.0),
+    'histogram_variance': (0.0, 269.0),
+    'histogram_median': (77.0, 186.0),
+    'mean_long_term_variability': (0.0, 50.7),
+    'histogram_mode': (60.0, 187.0),
+    'accelerations': (0.0, 0.019)
+}
+
+# Typical inputs for each classification, used as examples and to validate
+# a reloaded model before it is swapped in
+EXAMPLE_CASES = {
+    "NORMAL": {
+        "prolongued_decelerations": 0.0,
+        "abnormal_short_term_variability": 85.0,
+        "percentage_abnormal_long_term_variability": 5.0,
+        "histogram_variance": 80.0,
+        "histogram_median": 170.0,
+        "mean_long_term_variability": 5.0,
+        "histogram_mode": 170.0,
+        "accelerations": 0.015
+    },
+    "SUSPECT": {
+        "prolongued_decelerations": 0.0,
+        "abnormal_short_term_variability": 73.0,
+        "percentage_abnormal_long_term_variability": 43.0,
+        "histogram_variance": 73.0,
+        "histogram_median": 121.0,
+        "mean_long_term_variability": 2.4,
+        "histogram_mode": 120.0,
+        "accelerations": 0.0
+    },
+    "PATHOLOGICAL": {
+        "prolongued_decelerations": 0.002,
+        "abnormal_short_term_variability": 26.0,
+        "percentage_abnormal_long_term_variability": 0.0,
+        "histogram_variance": 170.0,
+        "histogram_median": 107.0,
+        "mean_long_term_variability": 0.0,
+        "histogram_mode": 76.0,
+        "accelerations": 0.001
+    }
+}
+
+
+def load_warmup_rows(count=None):
+    """Return count evenly spaced rows of data/fetal_health.csv in FEATURE_NAMES order.
+
+    count defaults to WARMUP_SAMPLE_ROWS (64); returns an empty matrix when
+    it is 0 or the dataset is not available.
+    """
+    if count is None:
+        count = int(os.environ.get('WARMUP_SAMPLE_ROWS', 64))
+    if count <= 0:
+        return np.empty((0, len(FEATURE_NAMES)))
+    try:
+        from dataset import load_dataset
+        X, _ = load_dataset()
+    except Exception as e:
+        print(f"⚠️ No dataset rows for warm-up: {e}")
+        return np.empty((0, len(FEATURE_NAMES)))
+    return X[np.linspace(0, len(X) - 1, min(count, len(X))).astype(int)]
+
+
+class ScoringBuffers(threading.local):
+    """Per-thread input row and probability row reused by every predict().
+
+    A request writes its parsed values into X and the engine writes the
+    class probabilities into proba, so single-record scoring allocates no
+    input or output arrays of its own (the sklearn engine still allocates
+    its result and copies it into proba). Each thread gets its own pair, and
+    a request is done with them before its thread serves the next one.
+    """
+
+    def __init__(self, n_features=len(FEATURE_NAMES)):
+        self.X = np.empty((1, n_features))
+        self.proba = np.empty((1, 0))
+
+    def output(self, n_classes):
+        """The (1, n_classes) probability buffer, resized if the model changed."""
+        if self.proba.shape[1] != n_classes:
+            self.proba = np.empty((1, n_classes))
+        return self.proba
+
+
+def default_model_path(registry=None):
+    """The registry's primary version if there is one, else MODEL_PATH."""
+    if registry is not None and registry.primary:
+        return registry.artifact_path(registry.primary)
+    return os.environ.get('MODEL_PATH', os.path.join(BASE_DIR, "models", "fetal_health.pkl"))
+
+
+class InferenceCore:
+    """Loads, serves, caches, reloads and shadow-scores one model.
+
+    The model is loaded on the first call to load() or current(). serving
+    holds the model with its inference engine (INFERENCE_ENGINE), optional
+    coalescer, labels in predict_proba column order and version; a reload
+    replaces the whole object at once and each request reads it once.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, engine: Optional[str] = None, registry=None):
+        # Optional model registry (MODEL_REGISTRY); its primary version is
+        # served and its shadow versions score the same inputs
+        self.model_registry = registry if registry is not None else build_model_registry()
+        self.model_path = model_path or default_model_path(self.model_registry)
+        self.engine_name = engine
+        self.serving = None
+        # Hot-swaps validated replacements of model_path (MODEL_RELOAD_INTERVAL)
+        self.model_watcher = None
+        # Scores served inputs on the registry's shadow models in the background
+        self.shadow_scorer = None
+        # Durations of the import, unpickling, engine build and first prediction
+        self.startup = StartupTimer()
+        # LRU cache of predictions keyed by the feature vector's bins among
+        # the forest's split thresholds; it is tagged with the model version
+        # and given its thresholds once the model is loaded
+        self.prediction_cache = build_prediction_cache()
+        # A reloaded model must label each example case as its key
+        self.validation_inputs = [[case[f] for f in FEATURE_NAMES] for case in EXAMPLE_CASES.values()]
+        # Rows every engine scored before the process reported ready
+        self.warmup_inputs = None
+        self.warmup_engines = []
+        self.buffers = ScoringBuffers()
+        self._lock = threading.Lock()
+        self._warmup_lock = threading.Lock()
+        self._attempted = False
+
+    def _load_candidate(self, path):
+        """Build a replacement ServingModel, warmed up on the same inputs."""
+        candidate = build_serving_model(path, CLASS_LABELS, self.engine_name)
+        if self.warmup_inputs is not None:
+            try:
+                self._score_warmup(candidate, self.warmup_inputs)
+            except Exception:
+                candidate.close()
+                raise
+        return candidate
+
+    @staticmethod
+    def _score_warmup(serving, X):
+        """Score X row by row and as one batch on every engine of serving.
+
+        Single rows go through the coalescer too, so its thread is running
+        before the first request. Returns the names of the engines scored.
+        """
+        engines = engine_parts(serving.engine)
+        if serving.coalescer is not None:
+            for row in X:
+                serving.predict_proba(row[np.newaxis])
+        for engine in engines:
+            for row in X:
+                engine.predict_proba(row[np.newaxis])
+            engine.predict_proba(X)
+        return [engine.name for engine in engines]
+
+    @property
+    def ready(self):
+        """Whether the model is loaded and warmed up."""
+        return self.serving is not None and self.startup.has("warmup")
+
+    def warm_up(self, records):
+        """Score records and a sample of dataset rows through every enabled engine.
+
+        records are feature dicts (the sample input and the example cases);
+        WARMUP_SAMPLE_ROWS rows of the dataset are added to them. The serving
+        engine (both engines when BATCH_ENGINE is set), the coalescer and
+        the shadow models each score every row singly and all rows as one
+        batch, so lazy imports and cold caches are paid before the first
+        request. The duration is recorded as the "warmup" startup phase
+        once every engine has scored the rows; later calls do nothing. When
+        an engine fails, nothing is recorded and the next call tries again.
+        Returns whether the core is ready.
+        """
+        current = self.load()
+        if current is None:
+            return False
+        with self._warmup_lock:
+            if self.startup.has("warmup"):
+                return True
+            try:
+                with self.startup.phase("warmup"):
+                    X = np.array([[record[f] for f in FEATURE_NAMES] for record in records], dtype=np.float64)
+                    X = np.vstack([X.reshape(-1, len(FEATURE_NAMES)), load_warmup_rows()])
+                    engines = self._score_warmup(current, X)
+                    if self.shadow_scorer:
+                        for name, shadow in self.shadow_scorer.shadows.items():
+                            engines += [f"{name}:{engine}" for engine in self._score_warmup(shadow, X)]
+            except Exception as e:
+                print(f"❌ Warm-up failed: {e}")
+                return False
+            self.warmup_inputs = X
+            self.warmup_engines = engines
+            print(f"✅ Warmed up {', '.join(engines)} on {len(X)} rows")
+        return True
+
+    def _swap(self, candidate):
+        """Publish candidate as the serving model and retire the previous one."""
+        previous = self.serving
+        # Invalidate first: requests still running on the previous model can
+        # neither read nor store results once the cache moved to the new version
+        if self.prediction_cache:
+            self.prediction_cache.ensure_version(
+                candidate.version, split_thresholds(candidate.model, len(FEATURE_NAMES)))
+        try:
+            release_forest(candidate, self.validation_inputs)
+        except ValueError as e:
+            print(f"⚠️ Keeping the sklearn forest in memory: {e}")
+        self.serving = candidate
+        if previous is not None:
+            previous.close()
+
+    def load(self):
+        """Load the model and build its engine on first use; returns the ServingModel.
+
+        Thread-safe and idempotent: later calls return the model being
+        served (or None if loading failed) without touching the disk.
+        """
+        if not self._attempted:
+            with self._lock:
+                if not self._attempted:
+                    try:
+                        loaded = build_serving_model(self.model_path, CLASS_LABELS, self.engine_name, self.startup)
+                        print(f"✅ Model loaded successfully from {self.model_path}")
+                        print(f"✅ Using {loaded.engine.name} inference engine")
+                        self._swap(loaded)
+                        self.shadow_scorer = build_shadow_scorer(self.model_registry, self._load_candidate)
+                    except Exception as e:
+                        print(f"❌ Error loading model: {e}")
+                    # Watched even when the first load failed, so an artifact
+                    # that appears or is fixed later is served without a restart
+                    self.model_watcher = build_model_watcher(
+                        self.model_path, self._load_candidate, lambda: self.serving,
+                        self._swap, self.validation_inputs, list(EXAMPLE_CASES))
+                    self._attempted = True
+        return self.serving
+
+    def current(self):
+        """Return the ServingModel to score a request with, or None.
+
+        Loads the model on first use and keeps the model watcher running in
+        this (possibly freshly forked) process.
+        """
+        if not self._attempted:
+            self.load()
+        if self.model_watcher is not None:
+            self.model_watcher.ensure_running()
+        return self.serving
+
+    def stop_background(self):
+        """Stop the model watcher, coalescer and shadow threads of this process.
+
+        Each waits for the work it has in hand, so afterwards no background
+        thread can hold a lock or be half-way through loading a model. The
+        threads start again on first use, as in a freshly forked worker.
+        gunicorn's master calls this after warming up and before forking.
+        """
+        if self.model_watcher is not None:
+            self.model_watcher.stop()
+        shadows = list(self.shadow_scorer.shadows.values()) if self.shadow_scorer else []
+        if self.shadow_scorer:
+            self.shadow_scorer.stop()
+        for serving in [self.serving, *shadows]:
+            if serving is not None and serving.coalescer is not None:
+                serving.coalescer.stop()
+
+    def predict(self, features: List[float]):
+        """Score one feature vector in FEATURE_NAMES order.
+
+        The vector is scored from this thread's ScoringBuffers.
+
+        Returns (label, {label: probability}, model version), or None when
+        no model is loaded.
+        """
+        current = self.current()
+        if current is None:
+            return None
+        cache = self.prediction_cache
+        cached = cache.get(features, current.version) if cache else None
+
+        if cached is not None:
+            result, confidence = cached[0], dict(cached[1])
+        else:
+            buffers = self.buffers
+            X = buffers.X
+            X[0] = features
+            proba = current.predict_proba(X, buffers.output(len(current.labels)))
+            # The class is the first argmax of the probabilities, exactly as
+            # RandomForestClassifier.predict derives it
+            probabilities = proba[0].tolist()
+            result = current.labels[probabilities.index(max(probabilities))]
+            confidence = dict(zip(current.labels, probabilities))
+            if cache:
+                cache.put(features, (result, dict(confidence)), current.version)
+
+        if self.shadow_scorer:
+            self.shadow_scorer.submit([features], [result])
+        return result, confidence, current.version
+
+    def predict_batch(self, X):
+        """Score the rows of X with a single engine call.
+
+        Returns (ServingModel, probabilities), or None when no model is
+        loaded; labels and version are read off the returned ServingModel.
+        """
+        current = self.current()
+        if current is None:
+            return None
+        probabilities = current.engine.predict_proba(X)
+        if self.shadow_scorer and len(X):
+            self.shadow_scorer.submit(X, [current.labels[i] for i in probabilities.argmax(axis=1)])
+        return current, probabilities
+
+    def predict_records(self, records, validator, describe: Callable, strict: bool = False) -> Dict[str, object]:
+        """Validate and score a batch with a single engine call; returns the batch response.
+
+        records is any batch FeatureValidator.batch accepts. Rows that fail
+        validation get a failed result whose error is
+        describe(record, row, missing, invalid, violated), formatted only
+        for those rows; the valid rows are scored in one predict_batch call.
+        """
+        current = self.current()
+        if current is None:
+            return {"success": False, "error": "Model not loaded", "results": []}
+
+        if records is None or len(records) == 0:
+            return {"success": False, "error": "No records provided", "results": []}
+
+        try:
+            X, missing, invalid, violated, objects = validator.batch(records, strict)
+        except (ValueError, TypeError) as e:
+            return {"success": False, "error": f"Invalid batch: {str(e)}", "results": []}
+
+        valid = violated == 0
+        results = [None] * len(X)
+        for i in np.flatnonzero(~valid):
+            record = validator.record(records, i) if objects[i] else None
+            results[i] = {
+                "success": False,
+                "error": (describe(record, X[i], int(missing[i]), int(invalid[i]), int(violated[i]))
+                          if record is not None else "Record must be a JSON object"),
+                "prediction": None,
+                "confidence": None
+            }
+
+        try:
+            if valid.any():
+                current, probabilities = self.predict_batch(X[valid])
+                for i, proba in zip(np.flatnonzero(valid), probabilities):
+                    results[i] = {
+                        "success": True,
+                        "prediction": current.labels[int(proba.argmax())],
+                        "confidence": {label: float(p) for label, p in zip(current.labels, proba)}
+                    }
+        except Exception as e:
+            return {"success": False, "error": f"Prediction error: {str(e)}", "results": []}
+
+        return {
+            "success": True,
+            "count": len(results),
+            "valid_count": int(valid.sum()),
+            "model_version": current.version,
+            "results": results,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def manifest(self):
+        """Sidecar manifest of the served model (or of model_path before loading), or None.
+
+        Read from disk without unpickling anything, so it is available
+        before the model is loaded.
+        """
+        current = self.serving
+        return read_model_manifest(current.path if current else self.model_path)
+
+    def stats(self) -> Dict[str, object]:
+        """Return the model version and component counters for /health."""
+        current = self.serving
+        return {
+            "model_version": current.version if current else None,
+            "model_manifest": self.manifest(),
+            "warmup": {
+                "rows": len(self.warmup_inputs),
+                "engines": list(self.warmup_engines)
+            } if self.warmup_inputs is not None else None,
+            "model_reload": self.model_watcher.stats() if self.model_watcher else None,
+            "shadow": self.shadow_scorer.stats() if self.shadow_scorer else None,
+            "coalescer": current.coalescer.stats() if current and current.coalescer else None,
+            "prediction_cache": self.prediction_cache.stats() if self.prediction_cache else None
+        }
+
+
+_core = None
+_core_lock = threading.Lock()
+
+
+def get_inference_core():
+    """Return the process-wide core shared by the main application and the agent."""
+    global _core
+    if _core is None:
+        with _core_lock:
+            if _core is None:
+                _core = InferenceCore()
+    return _core
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Fetal Health Prediction System - Memory-Mapped Model Artifact
+Stores the forest's flat node arrays as raw .npy files that every worker of
+both applications maps read-only, so the operating system keeps a single
+copy of the model in memory per host.
+
+Convert the pickled model with:
+    python model_artifact.py models/fetal_health.pkl models/fetal_health.forest
+and point the applications at it with MODEL_PATH=models/fetal_health.forest.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import numpy as np
+
+from engines import FlatForestEngine, file_sha256
+
+ARTIFACT_FORMAT = "fetal-health-forest"
+ARTIFACT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class MappedForest:
+    """Read-only forest backed by memory-mapped node arrays.
+
+    Exposes the parts of the RandomForestClassifier interface the
+    applications use (classes_, n_features_in_, predict_proba, predict).
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a {ARTIFACT_FORMAT} artifact")
+        if self.manifest.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version {self.manifest.get('version')}")
+
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            for name in FlatForestEngine.ARRAY_NAMES
+        }
+        self.path = path
+        self.classes_ = np.array(self.manifest["classes"])
+        self.n_features_in_ = self.manifest["n_features"]
+        self.engine = FlatForestEngine.from_arrays(arrays, self.classes_, self.manifest["max_depth"])
+
+    def predict_proba(self, X, out=None):
+        return self.engine.predict_proba(X, out)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def export_forest(model, path, source_path=None):
+    """Write model as a memory-mappable artifact directory and return its manifest.
+
+    The artifact is written into a sibling staging directory and renamed
+    into place, so the files of an artifact already at path are never
+    rewritten: workers that have them mapped keep reading the previous
+    model until they reload.
+    """
+    engine = FlatForestEngine(model)
+    path = os.path.normpath(path)
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        digest = hashlib.sha256()
+        for name, array in engine.to_arrays().items():
+            array = np.ascontiguousarray(array)
+            np.save(os.path.join(staging, f"{name}.npy"), array)
+            digest.update(name.encode())
+            digest.update(array.tobytes())
+
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "version": ARTIFACT_VERSION,
+            "sha256": digest.hexdigest(),
+            "source_sha256": file_sha256(source_path) if source_path else None,
+            "n_trees": engine.n_trees,
+            "n_nodes": int(len(engine.feature)),
+            "max_depth": engine.max_depth,
+            "n_features": int(model.n_features_in_),
+            "classes": [float(c) for c in model.classes_]
+        }
+        with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        _replace_directory(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _replace_directory(staging, path):
+    """Move the directory staging to path, retiring a directory already there.
+
+    rename() only replaces empty directories, so an existing artifact is
+    renamed aside first and removed afterwards; files a worker still has
+    mapped stay readable until it unmaps them. path is missing only
+    between the two renames, and the model watcher skips a missing
+    artifact until it is back.
+    """
+    if os.path.isdir(path) and not os.path.islink(path):
+        retired = f"{path}.old-{os.getpid()}"
+        os.rename(path, retired)
+        os.rename(staging, path)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.replace(staging, path)
+
+
+def is_mapped_artifact(path):
+    """Whether path is an artifact directory rather than a pickle."""
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def load_model(path):
+    """Load a pickled model, or map an artifact directory."""
+    if is_mapped_artifact(path):
+        return MappedForest(path)
+    import joblib
+    return joblib.load(path)
+
+
+def model_version(path):
+    """Short content hash identifying the model at path.
+
+    Taken from the sidecar manifest (see model_manifest.py) while it is
+    current, so the artifact is not read to compute it.
+    """
+    from model_manifest import artifact_sha256
+    return artifact_sha256(path)[:12]
+
+
+def main():
+    """Convert a pickled model into a memory-mapped artifact."""
+    parser = argparse.ArgumentParser(description='Convert a pickled forest into a memory-mapped artifact')
+    parser.add_argument('model', help='Pickled model (e.g. models/fetal_health.pkl)')
+    parser.add_argument('output', help='Artifact directory to write (e.g. models/fetal_health.forest)')
+    args = parser.parse_args()
+
+    import joblib
+    model = joblib.load(args.model)
+    manifest = export_forest(model, args.output, args.model)
+    print(f"✅ Wrote {manifest['n_trees']} trees / {manifest['n_nodes']} nodes to {args.output}")
+    print(f"   Version: {manifest['sha256'][:12]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
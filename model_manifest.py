@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Fetal Health Prediction System - Model Manifest
+A JSON sidecar written next to a model artifact that describes it (content
+hash, feature order, class labels, tree count, training metrics), so health
+checks and status answers never unpickle the forest.
+
+Write or refresh it with:
+    python model_manifest.py models/fetal_health.pkl --accuracy 0.9592
+which creates models/fetal_health.pkl.manifest.json.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+MANIFEST_FORMAT = "fetal-health-model-manifest"
+MANIFEST_VERSION = 1
+SIDECAR_SUFFIX = ".manifest.json"
+
+
+def sidecar_path(path):
+    """Path of the manifest describing the artifact at path."""
+    return os.path.normpath(path) + SIDECAR_SUFFIX
+
+
+def _artifact_stat(path):
+    """(size, mtime_ns) of the artifact, or of its manifest for a directory."""
+    if os.path.isdir(path):
+        from model_artifact import MANIFEST_NAME
+        path = os.path.join(path, MANIFEST_NAME)
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+# Result of the last check of each artifact's manifest, with the artifact
+# and sidecar stats it was made for
+_checked = {}
+
+
+def read_model_manifest(path):
+    """Return the sidecar manifest of the artifact at path, or None.
+
+    A manifest is returned while the artifact still has the size and
+    modification time it was written for. When only the time differs (a
+    fresh checkout or a copy) the artifact is hashed, which is still far
+    cheaper than unpickling it, and the manifest is returned if the hash
+    matches. A missing, unreadable or stale manifest reads as None. The
+    outcome is kept for as long as neither file changes, so repeated reads
+    cost two stat calls.
+    """
+    try:
+        size, mtime_ns = _artifact_stat(path)
+        sidecar = os.stat(sidecar_path(path))
+    except OSError:
+        return None
+    stamp = (size, mtime_ns, sidecar.st_size, sidecar.st_mtime_ns)
+    key = os.path.normpath(path)
+    checked = _checked.get(key)
+    if checked is None or checked[0] != stamp:
+        checked = _checked[key] = (stamp, _check_manifest(path, size, mtime_ns))
+    manifest = checked[1]
+    return dict(manifest) if manifest is not None else None
+
+
+def _check_manifest(path, size, mtime_ns):
+    """Load the sidecar of path and return it if it describes the artifact, else None."""
+    try:
+        with open(sidecar_path(path)) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != MANIFEST_FORMAT or manifest.get("artifact_size") != size:
+            return None
+        if manifest.get("artifact_mtime_ns") != mtime_ns and manifest.get("sha256") != _hash_artifact(path):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return manifest
+
+
+def artifact_sha256(path):
+    """SHA-256 of the artifact at path, taken from its manifest when current."""
+    manifest = read_model_manifest(path)
+    if manifest is not None:
+        return manifest["sha256"]
+    return _hash_artifact(path)
+
+
+def _hash_artifact(path):
+    """Hash the artifact itself; a directory carries its hash in its own manifest."""
+    from model_artifact import is_mapped_artifact, MANIFEST_NAME
+    if is_mapped_artifact(path):
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            return json.load(f)["sha256"]
+    from engines import file_sha256
+    return file_sha256(path)
+
+
+def build_model_manifest(path, model, class_labels, feature_names, metrics=None):
+    """Describe model, loaded from the artifact at path, as a manifest dict.
+
+    class_labels maps model classes to labels and feature_names gives the
+    input order the applications use. metrics holds training or evaluation
+    figures such as accuracy and dataset_rows.
+    """
+    size, mtime_ns = _artifact_stat(path)
+    importances = getattr(model, 'feature_importances_', None)
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "artifact": os.path.basename(os.path.normpath(path)),
+        "sha256": _hash_artifact(path),
+        "artifact_size": size,
+        "artifact_mtime_ns": mtime_ns,
+        "model_type": type(model).__name__,
+        # Memory-mapped forests only know their tree count through their engine
+        "n_trees": len(model.estimators_) if hasattr(model, 'estimators_') else model.engine.n_trees,
+        "n_features": int(model.n_features_in_),
+        "feature_names": list(feature_names),
+        # Column names the model was fitted on, in the same order
+        "training_columns": [str(c) for c in getattr(model, 'feature_names_in_', ())] or None,
+        "classes": [float(c) for c in model.classes_],
+        "labels": [class_labels[c] for c in model.classes_],
+        "feature_importances": (
+            {name: float(value) for name, value in zip(feature_names, importances)}
+            if importances is not None else None
+        ),
+        "metrics": dict(metrics or {}),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def write_model_manifest(path, model, class_labels, feature_names, metrics=None):
+    """Write the sidecar manifest of the artifact at path and return it."""
+    manifest = build_model_manifest(path, model, class_labels, feature_names, metrics)
+    write_json(sidecar_path(path), manifest)
+    return manifest
+
+
+def write_json(path, data):
+    """Write data to path as JSON atomically, so readers never see a partial file."""
+    staged = f"{path}.{os.getpid()}.tmp"
+    with open(staged, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(staged, path)
+
+
+def evaluate_on_dataset(model, data_path=None):
+    """Return accuracy metrics of model on the CTG dataset."""
+    from dataset import load_dataset
+    X, y = load_dataset(data_path) if data_path else load_dataset()
+    return {
+        "dataset_accuracy": float((model.predict(X) == y).mean()),
+        "dataset_rows": int(len(y))
+    }
+
+
+def main():
+    """Write the manifest of a model artifact."""
+    parser = argparse.ArgumentParser(description='Write the sidecar manifest of a model artifact')
+    parser.add_argument('model', help='Pickled model or .forest artifact directory')
+    parser.add_argument('--accuracy', type=float,
+                        help='Held-out accuracy reported for the model (e.g. 0.9592)')
+    parser.add_argument('--data', default=None, help='Evaluation CSV (default: data/fetal_health.csv)')
+    parser.add_argument('--no-evaluate', action='store_true', help='Skip scoring the dataset')
+    args = parser.parse_args()
+
+    from inference_core import CLASS_LABELS, FEATURE_NAMES
+    from model_artifact import load_model
+
+    model = load_model(args.model)
+    metrics = {}
+    if args.accuracy is not None:
+        metrics["accuracy"] = args.accuracy
+    if not args.no_evaluate:
+        metrics.update(evaluate_on_dataset(model, args.data))
+    manifest = write_model_manifest(args.model, model, CLASS_LABELS, FEATURE_NAMES, metrics)
+    print(f"✅ Wrote {sidecar_path(args.model)}")
+    print(f"   Version: {manifest['sha256'][:12]}, {manifest['n_trees']} trees, "
+          f"{manifest['n_features']} features")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
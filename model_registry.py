@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Fetal Health Prediction System - Model Registry
+Keeps several model versions side by side, each with a manifest, and records
+which one is served (primary) and which ones are scored in shadow.
+
+Layout (MODEL_REGISTRY, e.g. models/registry):
+    registry.json             {"primary": "v1", "shadows": ["v2"]}
+    v1/version.json           manifest of version v1
+    v1/fetal_health.pkl       the artifact (a pickle or a .forest directory)
+
+Manage it with:
+    python model_registry.py add models/fetal_health.pkl --name v1 --primary
+    python model_registry.py add retrained.pkl --name v2 --shadow
+    python model_registry.py promote v2
+    python model_registry.py list
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+from model_artifact import model_version
+from model_manifest import read_model_manifest, sidecar_path, write_json
+
+INDEX_NAME = "registry.json"
+VERSION_MANIFEST = "version.json"
+
+
+class ModelRegistry:
+    """Model versions stored under one directory.
+
+    Each version lives in its own subdirectory with a version.json manifest
+    (name, artifact, content hash, source, creation time, description);
+    registry.json names the primary version and the shadow versions.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _index(self):
+        try:
+            with open(os.path.join(self.root, INDEX_NAME)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"primary": None, "shadows": []}
+
+    @property
+    def primary(self):
+        """Name of the version served by the applications."""
+        return self._index().get("primary")
+
+    @property
+    def shadows(self):
+        """Names of the versions scored in the background on live traffic."""
+        return list(self._index().get("shadows", []))
+
+    def versions(self):
+        """Names of all registered versions."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name, VERSION_MANIFEST)))
+
+    def manifest(self, name):
+        """Return the manifest of a version; raises KeyError if unknown."""
+        try:
+            with open(os.path.join(self.root, name, VERSION_MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"Unknown model version: {name}")
+
+    def artifact_path(self, name):
+        """Path of a version's model artifact."""
+        return os.path.join(self.root, name, self.manifest(name)["artifact"])
+
+    def add(self, source, name=None, description=""):
+        """Copy the artifact at source into the registry and return its manifest."""
+        sha = model_version(source)
+        name = name or sha
+        directory = os.path.join(self.root, name)
+        if os.path.exists(os.path.join(directory, VERSION_MANIFEST)):
+            raise ValueError(f"Model version {name} already exists")
+        os.makedirs(directory, exist_ok=True)
+
+        artifact = os.path.basename(os.path.normpath(source))
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(directory, artifact), dirs_exist_ok=True)
+        else:
+            shutil.copy2(source, os.path.join(directory, artifact))
+        # Keep the model manifest with its artifact
+        if read_model_manifest(source) is not None:
+            shutil.copy2(sidecar_path(source), sidecar_path(os.path.join(directory, artifact)))
+
+        manifest = {
+            "name": name,
+            "artifact": artifact,
+            "model_version": sha,
+            "source": os.path.abspath(source),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "description": description
+        }
+        # The manifest is written last, so a half-copied version is never listed
+        write_json(os.path.join(directory, VERSION_MANIFEST), manifest)
+        return manifest
+
+    def promote(self, name):
+        """Serve version name as the primary model (it stops being a shadow)."""
+        self.manifest(name)
+        index = self._index()
+        index["primary"] = name
+        index["shadows"] = [shadow for shadow in index.get("shadows", []) if shadow != name]
+        write_json(os.path.join(self.root, INDEX_NAME), index)
+
+    def set_shadows(self, names):
+        """Replace the list of shadow versions."""
+        for name in names:
+            self.manifest(name)
+        index = self._index()
+        index["shadows"] = [name for name in names if name != index.get("primary")]
+        write_json(os.path.join(self.root, INDEX_NAME), index)
+
+
+def build_model_registry():
+    """Open the registry at MODEL_REGISTRY, or return None when it is unset."""
+    root = os.environ.get('MODEL_REGISTRY')
+    return ModelRegistry(root) if root else None
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Manage the fetal health model registry')
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY', os.path.join('models', 'registry')),
+                        help='Registry directory (default: MODEL_REGISTRY or models/registry)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='Register a model artifact')
+    add.add_argument('artifact', help='Pickled model or .forest artifact directory')
+    add.add_argument('--name', help='Version name (default: content hash)')
+    add.add_argument('--description', default='', help='Free-form description')
+    role = add.add_mutually_exclusive_group()
+    role.add_argument('--primary', action='store_true', help='Serve it as the primary model')
+    role.add_argument('--shadow', action='store_true', help='Score it in shadow')
+
+    promote = commands.add_parser('promote', help='Serve a version as the primary model')
+    promote.add_argument('name')
+
+    shadow = commands.add_parser('shadow', help='Set the shadow versions (none to clear)')
+    shadow.add_argument('names', nargs='*')
+
+    commands.add_parser('list', help='List the registered versions')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    try:
+        if args.command == 'add':
+            manifest = registry.add(args.artifact, args.name, args.description)
+            print(f"✅ Registered {manifest['name']} ({manifest['model_version']})")
+            if args.primary:
+                registry.promote(manifest['name'])
+            elif args.shadow:
+                registry.set_shadows(registry.shadows + [manifest['name']])
+        elif args.command == 'promote':
+            registry.promote(args.name)
+            print(f"✅ {args.name} is now the primary model")
+        elif args.command == 'shadow':
+            registry.set_shadows(args.names)
+            print(f"✅ Shadow models: {', '.join(registry.shadows) or 'none'}")
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e.args[0]}")
+        return 1
+
+    primary, shadows = registry.primary, registry.shadows
+    for name in registry.versions():
+        manifest = registry.manifest(name)
+        role = "primary" if name == primary else "shadow" if name in shadows else ""
+        print(f"  {name:<16}{manifest['model_version']:<14}{role:<9}{manifest['created']}  {manifest['description']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Fetal Health Prediction System - Hot Model Reload
+Watches the model artifact, loads and validates a replacement in the
+background and swaps it in atomically, without restarting workers.
+"""
+
+import os
+import threading
+import time
+import numpy as np
+
+from engines import build_engine, engine_parts, SklearnEngine, DEFAULT_ENGINE
+from model_artifact import MANIFEST_NAME, load_model, model_version
+from coalescer import build_coalescer
+from process_local import ProcessLocal, start_daemon
+from startup_timing import StartupTimer
+
+
+class ServingModel:
+    """One loaded model version with everything needed to serve it.
+
+    Instances are not modified after construction. The applications publish
+    a new version by rebinding a single reference, and every request reads
+    that reference once, so it is scored, labelled and tagged by one
+    consistent model even while a reload swaps the next one in.
+    """
+
+    __slots__ = ('model', 'engine', 'coalescer', 'labels', 'version', 'path', 'loaded_at')
+
+    def __init__(self, model, engine, coalescer, labels, version, path):
+        self.model = model
+        self.engine = engine
+        self.coalescer = coalescer
+        self.labels = labels
+        self.version = version
+        self.path = path
+        self.loaded_at = time.time()
+
+    def predict_proba(self, X, out=None):
+        """Score single requests, micro-batched when coalescing is enabled."""
+        return (self.coalescer or self.engine).predict_proba(X, out)
+
+    def close(self):
+        """Release the coalescer thread once this version has been replaced."""
+        if self.coalescer is not None:
+            self.coalescer.close()
+
+
+def build_serving_model(path, class_labels, engine_name=None, timer=None):
+    """Load the artifact at path and build its engine and coalescer.
+
+    class_labels maps model classes to labels. Unpickling and engine build
+    times are recorded on timer when one is given.
+    """
+    timer = timer or StartupTimer()
+    with timer.phase("unpickle"):
+        model = load_model(path)
+    with timer.phase("engine_build"):
+        try:
+            engine = build_engine(model, engine_name, path)
+        except Exception as e:
+            print(f"❌ Error building inference engine: {e}")
+            engine = build_engine(model, DEFAULT_ENGINE)
+    return ServingModel(
+        model,
+        engine,
+        build_coalescer(engine),
+        [class_labels[c] for c in model.classes_],
+        model_version(path),
+        path
+    )
+
+
+def validate_serving_model(serving, X, expected_labels=None):
+    """Raise ValueError unless serving scores X consistently and correctly.
+
+    The engine must return one finite probability row per input over every
+    label, predict the same classes as the loaded model's own predict_proba
+    and match its probabilities up to float32 leaf storage
+    (INFERENCE_FLOAT32). With expected_labels (one per row of X) the model
+    must also label every row as expected, which is what catches a model
+    that is self-consistent but wrong.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if getattr(serving.model, 'n_features_in_', X.shape[1]) != X.shape[1]:
+        raise ValueError(f"Model expects {serving.model.n_features_in_} features, not {X.shape[1]}")
+    proba = serving.engine.predict_proba(X)
+    if proba.shape != (len(X), len(serving.labels)):
+        raise ValueError(f"Unexpected probability shape {proba.shape}")
+    if not np.all(np.isfinite(proba)) or not np.allclose(proba.sum(axis=1), 1.0):
+        raise ValueError("Probabilities are not finite distributions")
+    reference = serving.model.predict_proba(X)
+    if (not np.array_equal(proba.argmax(axis=1), reference.argmax(axis=1))
+            or not np.allclose(proba, reference, rtol=0, atol=1e-6)):
+        raise ValueError(f"{serving.engine.name} engine disagrees with the model")
+    if expected_labels is not None:
+        predicted = [serving.labels[i] for i in proba.argmax(axis=1)]
+        wrong = [(expected, label) for expected, label in zip(expected_labels, predicted) if expected != label]
+        if wrong:
+            raise ValueError("Model mislabels validation cases: " +
+                             ", ".join(f"{expected} as {label}" for expected, label in wrong))
+
+
+def release_forest(serving, X):
+    """Drop the sklearn trees of serving's model once its engine is validated on X.
+
+    Every engine except sklearn copies the trees into its own arrays or
+    compiled code, so afterwards they only cost memory in each worker.
+    The model keeps classes_ and n_features_in_ but can no longer predict
+    by itself. Returns False, keeping the trees, when the engine still
+    needs them; raises ValueError when the engine fails validation.
+    """
+    model = serving.model
+    if not hasattr(model, 'estimators_') or any(
+            isinstance(engine, SklearnEngine) for engine in engine_parts(serving.engine)):
+        return False
+    validate_serving_model(serving, X)
+    del model.estimators_
+    return True
+
+
+def artifact_signature(path):
+    """Return a value that changes whenever the artifact at path is replaced.
+
+    For an artifact directory the manifest is used, since the converter
+    writes it last. Returns None while the artifact does not exist.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class ModelWatcher:
+    """Poll a model artifact and hot-swap validated replacements.
+
+    load(path) builds a ServingModel, current() returns the one being
+    served and swap(candidate) publishes a new one. A changed artifact is
+    loaded and validated on validation_inputs in the watcher's thread,
+    which must be labelled validation_labels when those are given; only a
+    candidate that passes and carries a new version is swapped in.
+    An artifact that fails is retried once it changes again, e.g. when a
+    copy that was still in progress completes. Each process polls from
+    its own thread (see process_local).
+    """
+
+    def __init__(self, path, load, current, swap, validation_inputs, interval=5.0, validation_labels=None):
+        self.path = path
+        self.load = load
+        self.current = current
+        self.swap = swap
+        self.validation_inputs = np.asarray(validation_inputs, dtype=np.float64)
+        self.validation_labels = validation_labels
+        self.interval = interval
+        self._seen = artifact_signature(path)
+        self._poll_lock = threading.Lock()
+        # The polling thread and the event that stops it, per process
+        self._thread = ProcessLocal(self._start_thread, self._stop_thread)
+        self.checks = 0
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_reload = None
+
+    def ensure_running(self):
+        """Start the polling thread in this process if it is not running."""
+        self._thread.get()
+
+    def _start_thread(self):
+        stopped = threading.Event()
+        return stopped, start_daemon(self._run, "model-watcher", stopped)
+
+    @staticmethod
+    def _stop_thread(watcher):
+        stopped, thread = watcher
+        stopped.set()
+        thread.join()
+
+    def stop(self):
+        """Stop this process's polling thread after any poll in progress; ensure_running() restarts it."""
+        self._thread.stop()
+
+    def _run(self, stopped):
+        while not stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"❌ Model watcher error: {e}")
+
+    def poll(self):
+        """Check the artifact once; returns True if a new model was swapped in."""
+        with self._poll_lock:
+            self.checks += 1
+            signature = artifact_signature(self.path)
+            if signature is None or signature == self._seen:
+                return False
+            self._seen = signature
+
+            candidate = None
+            try:
+                candidate = self.load(self.path)
+                validate_serving_model(candidate, self.validation_inputs, self.validation_labels)
+            except Exception as e:
+                # A rejected candidate may already run a coalescer thread
+                if candidate is not None:
+                    candidate.close()
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"❌ Rejected new model at {self.path}: {e}")
+                return False
+
+            current = self.current()
+            if current is not None and candidate.version == current.version:
+                candidate.close()
+                return False
+
+            self.swap(candidate)
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload = time.time()
+            print(f"✅ Reloaded model {candidate.version} from {self.path}")
+            return True
+
+    def stats(self):
+        """Return reload counters for /health."""
+        return {
+            "interval_seconds": self.interval,
+            "checks": self.checks,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_reload": self.last_reload
+        }
+
+
+def build_model_watcher(path, load, current, swap, validation_inputs, validation_labels=None):
+    """Create a ModelWatcher polling every MODEL_RELOAD_INTERVAL seconds.
+
+    Returns None when MODEL_RELOAD_INTERVAL is 0.
+    """
+    interval = float(os.environ.get('MODEL_RELOAD_INTERVAL', 5))
+    if interval <= 0:
+        return None
+    return ModelWatcher(path, load, current, swap, validation_inputs, interval, validation_labels)
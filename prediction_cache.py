@@ -0,0 +1,163 @@
+"""
+Fetal Health Prediction System - Prediction Cache
+Bounded LRU cache of predictions keyed by where each feature falls among the
+forest's split thresholds.
+"""
+
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+
+
+def split_thresholds(model, n_features):
+    """Sorted split thresholds of each feature over every tree of a forest.
+
+    Reads the trees of a fitted forest or the node arrays of a memory-mapped
+    one; returns None for a model whose splits are not exposed.
+    """
+    if hasattr(model, 'estimators_'):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        feature = np.concatenate([tree.feature for tree in trees])
+        threshold = np.concatenate([tree.threshold for tree in trees])
+    elif hasattr(getattr(model, 'engine', None), 'threshold'):
+        engine = model.engine
+        # Leaves point back at themselves in the flat node arrays
+        split = np.asarray(engine.left) != np.arange(len(engine.left))
+        feature = np.where(split, engine.feature, -1)
+        threshold = np.asarray(engine.threshold)
+    else:
+        return None
+    return [np.unique(threshold[feature == j]).tolist() for j in range(n_features)]
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a time-to-live and model-version guard.
+
+    Entries of a forest are keyed by the bin each feature falls into among
+    that feature's split thresholds: inputs sharing a key take the same
+    path through every tree, so they get exactly the same prediction. Other
+    models are keyed by the exact values. Changing the model version clears
+    the cache so results of a previous model are never served.
+    """
+
+    def __init__(self, max_size=1024, ttl=300.0, version=None, thresholds=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = version
+        self._set_thresholds(thresholds)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _set_thresholds(self, thresholds):
+        self.thresholds = thresholds
+        # Read by key() as one reference, so a concurrent model change never
+        # pairs thresholds with the packer of another model
+        self._splits = (thresholds, struct.Struct(f"{len(thresholds)}f") if thresholds else None)
+
+    def key(self, features):
+        """Cache key of a feature vector in FEATURE_NAMES order."""
+        thresholds, float32 = self._splits
+        if thresholds is None:
+            # Adding 0.0 folds -0.0 into 0.0 so both share a key
+            return tuple(float(value) + 0.0 for value in features)
+        # The trees compare float32 inputs, as sklearn casts them, and send
+        # a value left when it is <= the threshold: the number of thresholds
+        # below the value fixes the outcome of every split on the feature
+        return tuple(map(bisect_left, thresholds, float32.unpack(float32.pack(*features))))
+
+    def get(self, features, version=None):
+        """Return the cached result for features, or None on a miss.
+
+        With a version, results are only returned while the cache holds
+        that model version.
+        """
+        key = self.key(features)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (version is not None and version != self.version):
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, features, value, version=None):
+        """Store the result for features, evicting the least recently used.
+
+        With a version, results of any other model version are dropped, so
+        a request still finishing on a replaced model cannot repopulate it.
+        """
+        key = self.key(features)
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, version=None, thresholds=None):
+        """Drop every entry, e.g. because the model changed.
+
+        thresholds are the split thresholds of the new model (see
+        split_thresholds), or None to key entries by the exact values.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+            self._set_thresholds(thresholds)
+            self.invalidations += 1
+
+    def ensure_version(self, version, thresholds=None):
+        """Invalidate the cache if it holds results of another model version."""
+        if version != self.version:
+            self.invalidate(version, thresholds)
+
+    def stats(self):
+        """Return hit/miss/eviction counters for /health."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self.version
+            }
+
+
+def build_prediction_cache(version=None):
+    """Create the cache sized by PREDICTION_CACHE_SIZE and PREDICTION_CACHE_TTL.
+
+    Returns None when PREDICTION_CACHE_SIZE is 0.
+    """
+    max_size = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+    if max_size <= 0:
+        return None
+    return PredictionCache(
+        max_size=max_size,
+        ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 300)),
+        version=version
+    )
@@ -0,0 +1,58 @@
+"""
+Fetal Health Prediction System - Per-Process Background Threads
+The coalescer, model watcher and shadow scorer each run background threads.
+Threads do not survive fork(): a gunicorn worker inherits the objects built
+in the master but none of their threads. ProcessLocal creates a thread (or
+pool) lazily in every process that uses it, so these components are safe to
+build before the workers fork.
+"""
+
+import os
+import threading
+
+
+class ProcessLocal:
+    """One resource per process, created on first use and released by stop().
+
+    get() returns this process's resource, calling create() the first time
+    it is needed in the process, including after a fork. stop() passes this
+    process's resource to release() (which should wait for its threads) and
+    the next get() creates a new one.
+    """
+
+    def __init__(self, create, release):
+        self._create = create
+        self._release = release
+        self._lock = threading.Lock()
+        self._resource = None
+        self._pid = None
+
+    def get(self):
+        """This process's resource, created if there is none yet."""
+        resource = self._resource
+        if self._pid == os.getpid():
+            return resource
+        with self._lock:
+            if self._pid != os.getpid():
+                self._resource = self._create()
+                self._pid = os.getpid()
+            return self._resource
+
+    def running(self):
+        """Whether this process has a resource."""
+        return self._pid == os.getpid()
+
+    def stop(self):
+        """Release this process's resource, if it has one."""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            resource, self._resource, self._pid = self._resource, None, None
+        self._release(resource)
+
+
+def start_daemon(target, name, *args):
+    """Start and return a daemon thread running target(*args)."""
+    thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+    thread.start()
+    return thread
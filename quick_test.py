@@ -45,6 +45,17 @@ def test_model_loading():
         print(f"❌ Model file not found: {model_path}")
         return False
     
+    # The sidecar manifest describes the model without unpickling it
+    from model_manifest import read_model_manifest
+    manifest = read_model_manifest(str(model_path))
+    if manifest is not None:
+        print(f"✅ Model manifest found")
+        print(f"   Type: {manifest['model_type']} ({manifest['n_trees']} trees)")
+        print(f"   Features: {manifest['n_features']}")
+        print(f"   Classes: {manifest['classes']}")
+        print(f"   Version: {manifest['sha256'][:12]}")
+        return True
+    
     try:
         import joblib
         model = joblib.load(model_path)
@@ -23,6 +23,7 @@ def run_main_app(port=5000, debug=False):
         # Production mode with Gunicorn
         subprocess.run([
             'gunicorn', 
+            '--config', 'gunicorn.conf.py',
             '--bind', f'0.0.0.0:{port}',
             '--workers', '2',
             '--timeout', '120',
@@ -42,48 +43,34 @@ def run_agent_app(port=5001, debug=False):
         # Production mode with Gunicorn
         subprocess.run([
             'gunicorn', 
+            '--config', 'gunicorn.conf.py',
             '--bind', f'0.0.0.0:{port}',
             '--workers', '2',
             '--timeout', '120',
             'agent_app:app'
         ])
 
-def run_both_apps(debug=False):
-    """Run both applications simultaneously."""
-    print("🚀 Starting both applications...")
-    
-    import threading
-    import time
-    
-    # Start main app in thread
-    main_thread = threading.Thread(
-        target=run_main_app, 
-        args=(5000, debug)
-    )
-    main_thread.daemon = True
-    main_thread.start()
-    
-    # Wait a moment then start agent
-    time.sleep(2)
-    
-    agent_thread = threading.Thread(
-        target=run_agent_app, 
-        args=(5001, debug)
-    )
-    agent_thread.daemon = True
-    agent_thread.start()
-    
-    print("✅ Both applications started!")
-    print("📊 Main App: http://localhost:5000")
-    print("🤖 Agent App: http://localhost:5001")
-    print("Press Ctrl+C to stop both applications")
+def run_both_apps(port=5000, debug=False):
+    """Run both applications from one server sharing a single model."""
+    print(f"🚀 Starting both applications on port {port}")
+    os.environ['PORT'] = str(port)
+    os.environ['DEBUG'] = str(debug).lower()
+    print(f"📊 Main App: http://localhost:{port}")
+    print(f"🤖 Agent App: http://localhost:{port}/agent")
     
-    try:
-        # Keep main thread alive
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("\n👋 Shutting down applications...")
+    if debug:
+        # Development mode
+        subprocess.run([sys.executable, 'server.py'])
+    else:
+        # Production mode with Gunicorn; one worker pool serves both apps
+        subprocess.run([
+            'gunicorn', 
+            '--config', 'gunicorn.conf.py',
+            '--bind', f'0.0.0.0:{port}',
+            '--workers', '2',
+            '--timeout', '120',
+            'server:app'
+        ])
 
 def run_tests():
     """Run the test suite."""
@@ -149,12 +136,24 @@ def check_model():
         print("Please ensure the model file is in the correct location.")
         return False
     
+    # The sidecar manifest describes the model without unpickling it
+    from model_manifest import read_model_manifest
+    manifest = read_model_manifest(str(model_path))
+    if manifest is not None:
+        print(f"✅ Model manifest found")
+        print(f"   Type: {manifest['model_type']} ({manifest['n_trees']} trees)")
+        print(f"   Features: {manifest['n_features']}")
+        print(f"   Classes: {', '.join(manifest['labels'])}")
+        print(f"   Version: {manifest['sha256'][:12]}")
+        return True
+    
     try:
         import joblib
         model = joblib.load(model_path)
         print(f"✅ Model loaded successfully")
         print(f"   Type: {type(model).__name__}")
         print(f"   Features: {getattr(model, 'n_features_in_', 'Unknown')}")
+        print(f"⚠️ No current manifest; write one with: python model_manifest.py {model_path}")
         return True
     except Exception as e:
         print(f"❌ Error loading model: {e}")
@@ -190,6 +189,7 @@ def setup_project():
         print("  python run.py --agent         # Run agent only") 
         print("  python run.py --both          # Run both apps")
         print("  python run.py --test          # Run tests")
+        print("  python run.py --profile-startup  # Profile a cold start")
     else:
         print("\n⚠️ Setup incomplete - model file issues detected")
     
@@ -208,13 +208,15 @@ def main():
     mode_group.add_argument('--agent', action='store_true',
                            help='Run AI agent only')
     mode_group.add_argument('--both', action='store_true',
-                           help='Run both applications')
+                           help='Run both applications in one server')
     mode_group.add_argument('--test', action='store_true',
                            help='Run test suite')
     mode_group.add_argument('--setup', action='store_true',
                            help='Set up project for first use')
     mode_group.add_argument('--check', action='store_true',
                            help='Check dependencies and model')
+    mode_group.add_argument('--profile-startup', action='store_true',
+                           help='Profile a cold start of both applications')
     
     # Options
     parser.add_argument('--port', type=int, default=5000,
@@ -225,6 +227,8 @@ def main():
                        help='Run in debug mode')
     parser.add_argument('--production', action='store_true',
                        help='Run in production mode with Gunicorn')
+    parser.add_argument('--profile-output', default='temp/startup_profile.json',
+                       help='Where --profile-startup writes its JSON report (default: temp/startup_profile.json)')
     
     args = parser.parse_args()
     
@@ -239,12 +243,15 @@ def main():
             check_model()
         elif args.test:
             sys.exit(run_tests())
+        elif args.profile_startup:
+            from startup_profile import run_profile
+            sys.exit(run_profile(args.profile_output))
         elif args.main:
             run_main_app(args.port, debug_mode)
         elif args.agent:
             run_agent_app(args.agent_port, debug_mode)
         elif args.both:
-            run_both_apps(debug_mode)
+            run_both_apps(args.port, debug_mode)
             
     except KeyboardInterrupt:
         print("\n👋 Application stopped by user")
@@ -0,0 +1,27 @@
+"""
+Fetal Health Prediction System - Combined Server
+Serves the main application and the AI agent from one WSGI application, so a
+single worker pool hosts both UIs on one shared inference core and each
+worker holds the model once.
+
+The main application is served at / and the agent under AGENT_PREFIX
+(default /agent, where the main pages already link to it):
+    gunicorn server:app --config gunicorn.conf.py --bind 0.0.0.0:5000
+"""
+
+import os
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+from app import app as main_app, warmup
+from agent_app import app as agent_app
+
+AGENT_PREFIX = '/' + os.environ.get('AGENT_PREFIX', '/agent').strip('/')
+
+app = DispatcherMiddleware(main_app, {AGENT_PREFIX: agent_app})
+
+if __name__ == "__main__":
+    from werkzeug.serving import run_simple
+    port = int(os.environ.get('PORT', 5000))
+    debug = os.environ.get('DEBUG', 'False').lower() == 'true'
+    warmup()
+    run_simple('0.0.0.0', port, app, use_reloader=debug, use_debugger=debug, threaded=True)
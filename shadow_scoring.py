@@ -0,0 +1,149 @@
+"""
+Fetal Health Prediction System - Shadow Scoring
+Scores live inputs on candidate models in a background pool and tracks how
+often they disagree with the primary model, without delaying responses.
+"""
+
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from process_local import ProcessLocal
+
+
+class _ShadowStats:
+    """Agreement counters of one shadow model."""
+
+    def __init__(self):
+        self.requests = 0
+        self.rows = 0
+        self.disagreements = 0
+        self.errors = 0
+        self.changes = Counter()
+
+
+class ShadowScorer:
+    """Score the primary model's inputs on shadow models off the request path.
+
+    submit() only copies the inputs and hands them to a thread pool; the
+    shadows' labels are compared with the primary labels there. At most
+    max_pending submissions wait at a time, further ones are dropped (and
+    counted) rather than queued without bound. A summary is printed every
+    log_every scored rows. Each process gets its own pool (see
+    process_local).
+    """
+
+    def __init__(self, shadows, max_workers=1, max_pending=1000, log_every=1000):
+        # {name: ServingModel}
+        self.shadows = dict(shadows)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.log_every = log_every
+        self._stats = {name: _ShadowStats() for name in self.shadows}
+        self._lock = threading.Lock()
+        self._pool = ProcessLocal(self._start_pool, lambda pool: pool.shutdown(wait=True))
+        self._pending = 0
+        self._dropped = 0
+        self._rows = 0
+
+    def _start_pool(self):
+        # Called from submit() with _lock held; rows pending in another
+        # process's pool are never scored here
+        self._pending = 0
+        return ThreadPoolExecutor(self.max_workers, thread_name_prefix="shadow-scoring")
+
+    def stop(self):
+        """Shut this process's pool down once the queued rows are scored; submit() creates a new one."""
+        self._pool.stop()
+
+    def submit(self, X, primary_labels):
+        """Queue rows X, labelled primary_labels by the primary model."""
+        with self._lock:
+            executor = self._pool.get()
+            if self._pending >= self.max_pending:
+                self._dropped += 1
+                return False
+            self._pending += 1
+        executor.submit(self._score, np.array(X, dtype=np.float64), list(primary_labels))
+        return True
+
+    def _score(self, X, primary_labels):
+        try:
+            for name, shadow in self.shadows.items():
+                stats = self._stats[name]
+                try:
+                    proba = shadow.engine.predict_proba(X)
+                except Exception as e:
+                    with self._lock:
+                        stats.errors += 1
+                    print(f"❌ Shadow model {name} failed: {e}")
+                    continue
+                labels = [shadow.labels[i] for i in proba.argmax(axis=1)]
+                changes = [(p, s) for p, s in zip(primary_labels, labels) if p != s]
+                with self._lock:
+                    stats.requests += 1
+                    stats.rows += len(X)
+                    stats.disagreements += len(changes)
+                    stats.changes.update(f"{p}->{s}" for p, s in changes)
+            with self._lock:
+                before, self._rows = self._rows, self._rows + len(X)
+                crossed = self._rows // self.log_every > before // self.log_every
+            if crossed:
+                self.log_summary()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self):
+        """Return per-shadow disagreement rates for /health."""
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "dropped": self._dropped,
+                "models": {
+                    name: {
+                        "model_version": self.shadows[name].version,
+                        "requests": s.requests,
+                        "rows": s.rows,
+                        "disagreements": s.disagreements,
+                        "disagreement_rate": s.disagreements / s.rows if s.rows else 0.0,
+                        "errors": s.errors,
+                        "changes": dict(s.changes)
+                    }
+                    for name, s in self._stats.items()
+                }
+            }
+
+    def log_summary(self):
+        """Print the disagreement rate of every shadow model."""
+        for name, stats in self.stats()["models"].items():
+            print(f"🔍 Shadow {name}: {stats['disagreements']}/{stats['rows']} rows disagree "
+                  f"({stats['disagreement_rate']:.2%}) with the primary model")
+
+
+def build_shadow_scorer(registry, load):
+    """Load the registry's shadow versions with load(path) into a ShadowScorer.
+
+    SHADOW_WORKERS, SHADOW_MAX_PENDING and SHADOW_LOG_EVERY size the pool,
+    its backlog and the summary interval. Returns None without a registry
+    or shadow versions; shadows that fail to load are skipped.
+    """
+    if registry is None or not registry.shadows:
+        return None
+    shadows = {}
+    for name in registry.shadows:
+        try:
+            shadows[name] = load(registry.artifact_path(name))
+            print(f"✅ Shadow model {name} loaded")
+        except Exception as e:
+            print(f"❌ Error loading shadow model {name}: {e}")
+    if not shadows:
+        return None
+    return ShadowScorer(
+        shadows,
+        max_workers=int(os.environ.get('SHADOW_WORKERS', 1)),
+        max_pending=int(os.environ.get('SHADOW_MAX_PENDING', 1000)),
+        log_every=int(os.environ.get('SHADOW_LOG_EVERY', 1000))
+    )
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Fetal Health Prediction System - Startup Profiler
+Cold-starts both applications in a fresh interpreter under -X importtime and
+reports the import tree, model unpickling, template loading and the time to
+the first successful /api/predict, so cold-start regressions can be tracked
+across releases.
+
+Run with:
+    python run.py --profile-startup --profile-output temp/startup_profile.json
+or directly with python startup_profile.py --output temp/startup_profile.json.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BASE_DIR, "temp", "startup_profile.json")
+
+# Runs in the profiled interpreter; the timings are printed as the last line
+_PROBE = r'''
+import json, time
+started = time.perf_counter()
+phases = {}
+
+mark = time.perf_counter()
+import app
+phases["import_app_seconds"] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+app.core.load()
+phases["model_load_seconds"] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+import agent_app
+phases["import_agent_app_seconds"] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+templates = 0
+for flask_app in (app.app, agent_app.app):
+    for name in flask_app.jinja_env.list_templates():
+        flask_app.jinja_env.get_template(name)
+        templates += 1
+phases["template_load_seconds"] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+response = app.app.test_client().post('/api/predict', json=app.SAMPLE_DATA)
+phases["first_predict_seconds"] = time.perf_counter() - mark
+phases["time_to_first_predict_seconds"] = time.perf_counter() - started
+
+print(json.dumps({
+    "phases": phases,
+    "templates": templates,
+    "first_predict_status": response.status_code,
+    "first_predict_success": bool((response.get_json() or {}).get("success")),
+    "startup": app.startup.report(),
+    "model_version": app.core.serving.version if app.core.serving else None
+}))
+'''
+
+
+def parse_importtime(lines):
+    """Build the import tree from -X importtime output.
+
+    Returns the top-level imports as {"module", "self_ms", "cumulative_ms",
+    "children"} nodes, children before their importers as Python reports
+    them; use sort_tree() to order them by cost.
+    """
+    pending = {}
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields
+        # Nested imports are indented two more spaces than their importer
+        depth = len(name) - len(name.lstrip(" "))
+        node = {
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "children": pending.pop(depth + 2, [])
+        }
+        pending.setdefault(depth, []).append(node)
+    return pending[min(pending)] if pending else []
+
+
+def sort_tree(nodes):
+    """Sort every level of an import tree by cumulative time, slowest first."""
+    for node in nodes:
+        sort_tree(node["children"])
+    nodes.sort(key=lambda node: -node["cumulative_ms"])
+    return nodes
+
+
+def profile_startup(python=sys.executable):
+    """Cold-start both applications in a subprocess and return the profile."""
+    started = time.perf_counter()
+    result = subprocess.run([python, "-X", "importtime", "-c", _PROBE], cwd=BASE_DIR,
+                            capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Profiled startup failed:\n{result.stderr[-2000:]}")
+
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = sort_tree(parse_importtime(result.stderr.splitlines()))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "wall_seconds": wall_seconds,
+        **probe,
+        "total_import_ms": sum(node["cumulative_ms"] for node in imports),
+        "imports": imports
+    }
+
+
+def print_import_tree(nodes, min_ms=5.0, max_depth=3, indent=0):
+    """Print the imports costing at least min_ms, up to max_depth levels."""
+    for node in nodes:
+        if node["cumulative_ms"] < min_ms:
+            break
+        print(f"  {'  ' * indent}{node['module']:<{40 - 2 * indent}}"
+              f"{node['cumulative_ms']:>9.1f} ms{node['self_ms']:>9.1f} ms self")
+        if indent + 1 < max_depth:
+            print_import_tree(node["children"], min_ms, max_depth, indent + 1)
+
+
+def print_profile(profile, min_ms=5.0):
+    """Print a startup profile."""
+    print(f"⏱️ Cold start in {profile['wall_seconds']:.2f} s "
+          f"(commit {profile['commit'] or 'unknown'}, Python {profile['python']})\n")
+    labels = [
+        ("import_app_seconds", "Import app"),
+        ("model_load_seconds", "Model load"),
+        ("import_agent_app_seconds", "Import agent_app"),
+        ("template_load_seconds", f"Templates ({profile['templates']})"),
+        ("first_predict_seconds", "First /api/predict"),
+        ("time_to_first_predict_seconds", "Time to first predict")
+    ]
+    for key, label in labels:
+        print(f"  {label:<24}{profile['phases'][key] * 1000:>9.1f} ms")
+    startup = profile["startup"]
+    for key in ("unpickle_seconds", "engine_build_seconds"):
+        if startup.get(key) is not None:
+            print(f"    {key[:-len('_seconds')]:<22}{startup[key] * 1000:>9.1f} ms")
+    status = "✅" if profile["first_predict_success"] else "❌"
+    print(f"  {status} /api/predict returned HTTP {profile['first_predict_status']}")
+
+    print(f"\n📦 Imports ({profile['total_import_ms']:.1f} ms, at least {min_ms:g} ms shown):")
+    print_import_tree(profile["imports"], min_ms)
+
+
+def run_profile(output=DEFAULT_OUTPUT, min_ms=5.0):
+    """Profile a cold start, print it and write it as JSON to output."""
+    print("🔍 Profiling a cold start of app and agent_app...\n")
+    profile = profile_startup()
+    print_profile(profile, min_ms)
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(profile, f, indent=2)
+        print(f"\n💾 Profile written to {output}")
+    return 0 if profile["first_predict_success"] else 1
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Profile the cold start of both applications')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Where to write the JSON profile')
+    parser.add_argument('--min-ms', type=float, default=5.0, help='Smallest import shown (default: 5 ms)')
+    args = parser.parse_args()
+    return run_profile(args.output, args.min_ms)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
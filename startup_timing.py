@@ -0,0 +1,48 @@
+"""
+Fetal Health Prediction System - Startup Timing
+Splits application startup into import, unpickling, engine build,
+first-prediction and warm-up time so slow worker boots can be traced to a
+phase.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Phases in the order they happen during startup
+STARTUP_PHASES = ("import", "unpickle", "engine_build", "first_prediction", "warmup")
+
+
+class StartupTimer:
+    """Records how long each startup phase of one application took."""
+
+    def __init__(self):
+        self._seconds = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        """Record the duration of a phase (the first measurement wins)."""
+        with self._lock:
+            self._seconds.setdefault(phase, seconds)
+
+    def has(self, phase):
+        """Whether a phase has been measured."""
+        return phase in self._seconds
+
+    @contextmanager
+    def phase(self, phase):
+        """Context manager timing the enclosed block as a phase.
+
+        Only a block that completes is recorded; one that raises leaves the
+        phase unmeasured, so it can be retried and timed again.
+        """
+        start = time.perf_counter()
+        yield
+        self.record(phase, time.perf_counter() - start)
+
+    def report(self):
+        """Return the phase durations in seconds for /health and /admin/warmup."""
+        report = {f"{phase}_seconds": self._seconds.get(phase) for phase in STARTUP_PHASES}
+        report["total_seconds"] = sum(self._seconds.values())
+        report["warmed_up"] = self.has("warmup")
+        return report
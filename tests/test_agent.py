@@ -95,6 +95,45 @@ def test_prediction_invalid_data(agent):
     assert result['success'] == False
     assert 'error' in result
 
+def test_prediction_from_json_body(agent):
+    """Test predictions from raw JSON bodies match dict input and reject unknown keys."""
+    import json
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+    sample = agent.get_sample_data()
+    result = agent.make_prediction_json(json.dumps(sample).encode())
+    assert result['success'] == True
+    assert result['confidence'] == agent.make_prediction(sample)['confidence']
+
+    result = agent.make_prediction_json(json.dumps(dict(sample, heart_rate=140)).encode())
+    assert result['success'] == False
+    assert 'heart_rate' in result['error']
+
+def test_prediction_batch(agent):
+    """Test batch prediction with valid and invalid records."""
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+
+    cases = list(agent.get_example_cases().values())
+    invalid_data = dict(cases[0], histogram_median=999.0)
+    result = agent.make_prediction_batch(cases + [invalid_data])
+
+    assert result['success'] == True
+    assert result['count'] == 4
+    assert result['valid_count'] == 3
+    for case, batch_result in zip(cases, result['results']):
+        assert batch_result['prediction'] == agent.make_prediction(case)['prediction']
+    assert "between" in result['results'][3]['error']
+
+    columns = {f: [case[f] for case in cases + [invalid_data]] for f in agent.feature_names}
+    assert agent.make_prediction_batch(columns)['results'] == result['results']
+
+    rows = [[case[f] for f in agent.feature_names] for case in cases]
+    rows[1][0] = "0.002"
+    result = agent.make_prediction_batch(rows)
+    assert result['valid_count'] == 2
+    assert "Invalid data type" in result['results'][1]['error']
+
 def test_query_processing_help(agent):
     """Test query processing for help command."""
     response = agent.process_query("help")
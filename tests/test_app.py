@@ -93,6 +93,80 @@ def test_api_predict_invalid_data(client):
     assert data['success'] == False
     assert 'error' in data
 
+def test_api_predict_rejects_unknown_features(client):
+    """Test the prediction API rejects unknown features and malformed JSON."""
+    sample_data = json.loads(client.get('/api/sample').data)
+    response = client.post('/api/predict', json=dict(sample_data, heart_rate=140))
+    data = json.loads(response.data)
+    assert data['success'] == False
+    assert 'heart_rate' in data['error']
+
+    response = client.post('/api/predict', data='{"accelerations": ',
+                           content_type='application/json')
+    assert response.status_code == 400
+    assert 'Invalid JSON' in json.loads(response.data)['error']
+
+def test_api_predict_batch(client):
+    """Test batch prediction API with mixed valid and invalid records."""
+    sample_data = json.loads(client.get('/api/sample').data)
+    invalid_data = dict(sample_data, prolongued_decelerations=999)
+
+    response = client.post('/api/predict/batch',
+                          data=json.dumps({'records': [sample_data, invalid_data, sample_data]}),
+                          content_type='application/json')
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['success'] == True
+    assert data['count'] == 3
+    assert data['valid_count'] == 2
+    assert data['results'][0]['prediction'] in ['NORMAL', 'SUSPECT', 'PATHOLOGICAL']
+    assert data['results'][1]['success'] == False
+    assert 'prolongued_decelerations' in data['results'][1]['error']
+
+def test_api_predict_batch_columns(client):
+    """Test columnar batches score like the same records sent as rows."""
+    sample_data = json.loads(client.get('/api/sample').data)
+    records = [sample_data, dict(sample_data, histogram_median=999.0), dict(sample_data, accelerations='x')]
+    columns = {feature: [record[feature] for record in records] for feature in sample_data}
+
+    by_rows = client.post('/api/predict/batch', json={'records': records}).get_json()
+    by_columns = client.post('/api/predict/batch', json=columns).get_json()
+    if not by_rows['success']:
+        pytest.skip("Model not loaded")
+    assert by_columns['valid_count'] == 1
+    assert by_columns['results'] == by_rows['results']
+
+    del columns['accelerations']
+    data = client.post('/api/predict/batch', json=columns).get_json()
+    assert data['success'] == False
+    assert 'accelerations' in data['error']
+
+def test_make_prediction_batch_matches_single():
+    """Test batch predictions agree with single-record predictions."""
+    from app import make_prediction, make_prediction_batch, FEATURE_NAMES
+    from agent import FetalHealthAgent
+
+    cases = list(FetalHealthAgent().get_example_cases().values())
+    batch = make_prediction_batch([[case[f] for f in FEATURE_NAMES] for case in cases])
+
+    assert batch['success'] == True
+    for case, result in zip(cases, batch['results']):
+        single = make_prediction(case)
+        assert result['prediction'] == single['prediction']
+        assert result['confidence'] == single['confidence']
+
+def test_make_prediction_matches_model_predict():
+    """Test the label derived from predict_proba matches model.predict."""
+    import numpy as np
+    from app import make_prediction, load_inference_model, CLASS_LABELS, FEATURE_NAMES
+    from agent import FetalHealthAgent
+
+    model = load_inference_model()
+    for case in FetalHealthAgent().get_example_cases().values():
+        X = np.array([[case[f] for f in FEATURE_NAMES]])
+        assert make_prediction(case)['prediction'] == CLASS_LABELS[model.predict(X)[0]]
+
 def test_form_submission(client):
     """Test form submission with valid data."""
     form_data = {
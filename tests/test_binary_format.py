@@ -0,0 +1,97 @@
+"""
+Test suite for the binary batch format
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import binary_format
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_format import (pack_request, unpack_request, pack_response, unpack_response,
+                           CONTENT_TYPE, REJECTED)
+from inference_core import FEATURE_NAMES, EXAMPLE_CASES
+from app import app
+
+@pytest.fixture
+def client():
+    """Create test client."""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def X():
+    """The example cases as a feature matrix."""
+    return np.array([[case[f] for f in FEATURE_NAMES] for case in EXAMPLE_CASES.values()])
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_request_round_trip(X, dtype):
+    """Test request bodies unpack into a read-only view of the packed rows."""
+    body = pack_request(X, dtype)
+    rows = unpack_request(body, len(FEATURE_NAMES))
+    assert rows.dtype == dtype and not rows.flags.writeable
+    np.testing.assert_array_equal(rows, X.astype(dtype))
+
+def test_malformed_requests(X):
+    """Test truncated bodies, other feature counts and value sizes are rejected."""
+    body = pack_request(X)
+    for broken, n_features in ((body[:-1], 8), (body[:10], 8), (body, 7),
+                               (pack_request(X, np.float16), 8)):
+        with pytest.raises(ValueError):
+            unpack_request(broken, n_features)
+
+def test_response_round_trip():
+    """Test response bodies carry codes, probabilities and violation masks."""
+    probabilities = np.array([[0.2, 0.7, 0.1], [np.nan] * 3])
+    body = pack_response(probabilities, np.array([1, REJECTED]), np.array([0, 5]), np.float64)
+    codes, unpacked, violations = unpack_response(body)
+    assert codes.tolist() == [1, REJECTED] and violations.tolist() == [0, 5]
+    np.testing.assert_array_equal(unpacked, probabilities)
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_binary_endpoint_matches_batch(client, X, dtype):
+    """Test /api/predict/binary scores like /api/predict/batch and rejects bad rows."""
+    bad = np.vstack([X, X[:1]])
+    bad[-1, 0] = 999.0
+    response = client.post('/api/predict/binary', data=pack_request(bad, dtype),
+                           content_type=CONTENT_TYPE)
+    if response.status_code == 503:
+        pytest.skip("Model not loaded")
+    assert response.status_code == 200
+    labels = response.headers['X-Class-Labels'].split(',')
+    codes, probabilities, violations = unpack_response(response.data)
+
+    results = client.post('/api/predict/batch', json={"records": X.tolist()}).get_json()['results']
+    assert [labels[code] for code in codes[:-1]] == [result['prediction'] for result in results]
+    assert probabilities.dtype == dtype
+    np.testing.assert_allclose(probabilities[0], [results[0]['confidence'][label] for label in labels],
+                               rtol=1e-6)
+    assert codes[-1] == REJECTED and violations[-1] == 1 and np.isnan(probabilities[-1]).all()
+
+def test_float32_rows_at_the_bounds_pass(client):
+    """Test float32 rows accept the float32 nearest each range bound, like JSON does."""
+    from inference_core import FEATURE_RANGES
+    from dataset import load_dataset
+    X, _ = load_dataset()
+    edges = np.array([[FEATURE_RANGES[f][i] for f in FEATURE_NAMES] for i in (0, 1)])
+    rows = np.vstack([np.asarray(X, dtype=np.float64), edges])
+    response = client.post('/api/predict/binary', data=pack_request(rows, np.float32),
+                           content_type=CONTENT_TYPE)
+    if response.status_code == 503:
+        pytest.skip("Model not loaded")
+    codes, _, violations = unpack_response(response.data)
+    assert not violations.any()
+    assert REJECTED not in codes
+
+def test_binary_endpoint_errors(client, X):
+    """Test the endpoint requires octet-stream bodies with a valid header."""
+    assert client.post('/api/predict/binary', json=X.tolist()).status_code == 415
+    response = client.post('/api/predict/binary', data=b'FHRQ', content_type=CONTENT_TYPE)
+    assert response.status_code == 400
+    assert response.get_json()['success'] == False
+
+if __name__ == '__main__':
+    pytest.main([__file__])
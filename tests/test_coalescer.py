@@ -0,0 +1,88 @@
+"""
+Test suite for the prediction coalescer
+"""
+
+import pytest
+import sys
+import os
+import threading
+import numpy as np
+
+# Add parent directory to path to import coalescer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coalescer import PredictionCoalescer, build_coalescer
+from engines import build_engine
+from dataset import load_dataset
+from agent import FetalHealthAgent
+
+@pytest.fixture(scope="module")
+def engine():
+    """Build a flat engine over the trained forest."""
+    agent = FetalHealthAgent()
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+    return build_engine(agent.model, 'flat')
+
+def test_coalescer_disabled_by_default(engine, monkeypatch):
+    """Test coalescing is opt-in."""
+    monkeypatch.delenv('PREDICTION_COALESCE', raising=False)
+    assert build_coalescer(engine) is None
+
+def test_coalescer_from_environment(engine, monkeypatch):
+    """Test the window and row limit come from the environment."""
+    monkeypatch.setenv('PREDICTION_COALESCE', 'true')
+    monkeypatch.setenv('COALESCE_WINDOW_MS', '5')
+    monkeypatch.setenv('COALESCE_MAX_ROWS', '16')
+    coalescer = build_coalescer(engine)
+    assert coalescer.max_rows == 16
+    assert coalescer.max_wait == pytest.approx(0.005)
+
+def test_concurrent_requests_are_batched(engine):
+    """Test concurrent callers get their own rows' probabilities."""
+    X, _ = load_dataset(limit=32)
+    coalescer = PredictionCoalescer(engine, max_rows=64, max_wait=0.05)
+    results = [None] * len(X)
+
+    def score(i):
+        results[i] = coalescer.predict_proba(X[i:i + 1])
+
+    threads = [threading.Thread(target=score, args=(i,)) for i in range(len(X))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert np.array_equal(np.concatenate(results), engine.predict_proba(X))
+    stats = coalescer.stats()
+    assert stats['requests'] == len(X)
+    assert stats['rows'] == len(X)
+    assert stats['batches'] < len(X)
+
+def test_engine_errors_reach_caller(engine):
+    """Test a failing batch raises in every waiting caller."""
+    coalescer = PredictionCoalescer(engine, max_rows=64, max_wait=0.001)
+    with pytest.raises(Exception):
+        coalescer.predict_proba(np.zeros((1, 3)))
+
+def test_close_drains_queue(engine):
+    """Test close() scores what is queued and later calls bypass the queue."""
+    X, _ = load_dataset(limit=8)
+    coalescer = PredictionCoalescer(engine, max_rows=64, max_wait=0.05)
+    results = [None] * len(X)
+
+    def call(i):
+        results[i] = coalescer.predict_proba(X[i:i + 1])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(X))]
+    for thread in threads:
+        thread.start()
+    coalescer.close()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert all(result is not None for result in results)
+    assert np.array_equal(np.vstack(results), engine.predict_proba(X))
+    assert np.array_equal(coalescer.predict_proba(X[:1]), engine.predict_proba(X[:1]))
+
+if __name__ == '__main__':
+    pytest.main([__file__])
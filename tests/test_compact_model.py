@@ -0,0 +1,70 @@
+"""
+Test suite for the forest compaction tool
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import compact_model
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_model import prune_tree, build_forest, compact
+from dataset import load_dataset
+from agent import FetalHealthAgent
+
+@pytest.fixture(scope="module")
+def model():
+    """Load the trained forest once for all compaction tests."""
+    agent = FetalHealthAgent()
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+    return agent.model
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Load the CTG records in model feature order."""
+    return load_dataset()
+
+def test_prune_without_depth_limit_is_exact(model, dataset):
+    """Test merging redundant splits leaves probabilities unchanged."""
+    X, _ = dataset
+    forest = build_forest(model, [prune_tree(e) for e in model.estimators_[:10]])
+    reference = build_forest(model, model.estimators_[:10])
+    assert np.array_equal(forest.predict_proba(X), reference.predict_proba(X))
+
+def test_prune_depth_limit(model, dataset):
+    """Test depth-limited trees stay within the limit and still predict."""
+    X, _ = dataset
+    pruned = prune_tree(model.estimators_[0], max_depth=5)
+    assert pruned.tree_.max_depth <= 5
+    assert pruned.tree_.node_count < model.estimators_[0].tree_.node_count
+    assert pruned.predict_proba(X).shape == (len(X), 3)
+
+def test_compact_meets_target(model, dataset):
+    """Test the compact forest is smaller and within the accuracy delta."""
+    X, y = dataset
+    forest, report = compact(model, X, y, max_delta=0.005, min_trees=5, depths=[None, 8])
+    assert forest is not None
+    assert report['compact']['accuracy'] >= report['target_accuracy']
+    assert report['compact']['nodes'] < report['original']['nodes']
+    assert report['savings']['pickle_bytes'] > 0
+
+def test_compact_stays_within_delta_of_original(model, dataset):
+    """Test the delta is measured against the original model on the same records."""
+    X, y = dataset
+    forest, report = compact(model, X, y, max_delta=0.005, min_trees=5, depths=[None, 8])
+    original = float((model.predict(X) == y).mean())
+    assert report['baseline_accuracy'] == pytest.approx(original)
+    assert float((forest.predict(X) == y).mean()) >= original - 0.005
+
+def test_compact_impossible_target(model, dataset):
+    """Test an unreachable target yields no model."""
+    X, y = dataset
+    forest, report = compact(model, X, y, baseline=1.01, max_delta=0.0, depths=[4])
+    assert forest is None
+    assert 'compact' not in report
+
+if __name__ == '__main__':
+    pytest.main([__file__])
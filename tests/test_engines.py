@@ -0,0 +1,192 @@
+"""
+Test suite for the inference engines
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import engines
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engines import build_engine
+from dataset import load_dataset
+from agent import FetalHealthAgent
+
+@pytest.fixture(scope="module")
+def model():
+    """Load the trained forest once for all engine tests."""
+    agent = FetalHealthAgent()
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+    return agent.model
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Load the CTG records in model feature order."""
+    return load_dataset()
+
+def test_unknown_engine(model):
+    """Test an unknown engine name is rejected."""
+    with pytest.raises(ValueError):
+        build_engine(model, "does-not-exist")
+
+def test_engine_from_environment(model, monkeypatch):
+    """Test INFERENCE_ENGINE selects the engine."""
+    monkeypatch.setenv('INFERENCE_ENGINE', 'flat')
+    assert build_engine(model).name == 'flat'
+
+def test_flat_engine_parity(model, dataset):
+    """Test the flat engine reproduces sklearn probabilities bit for bit."""
+    X, _ = dataset
+    engine = build_engine(model, 'flat')
+    assert np.array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+def test_flat_engine_single_row(model, dataset):
+    """Test the flat engine on single-row inputs."""
+    X, _ = dataset
+    engine = build_engine(model, 'flat')
+    for row in X[:50]:
+        assert np.array_equal(engine.predict_proba(row[np.newaxis]),
+                              model.predict_proba(row[np.newaxis]))
+
+def test_codegen_engine_parity(model, dataset):
+    """Test the generated engine reproduces sklearn probabilities bit for bit."""
+    X, _ = dataset
+    engine = build_engine(model, 'codegen')
+    assert np.array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+def test_codegen_engine_cache(model, tmp_path, monkeypatch):
+    """Test compiled engines are cached on disk keyed by the model hash."""
+    model_path = FetalHealthAgent().model_path
+    monkeypatch.setenv('ENGINE_CACHE_DIR', str(tmp_path))
+
+    first = build_engine(model, 'codegen', model_path)
+    second = build_engine(model, 'codegen', model_path)
+
+    assert not first.loaded_from_cache
+    assert second.loaded_from_cache
+    assert os.path.exists(second.cache_path)
+    row = np.array([[0.0, 73.0, 43.0, 73.0, 121.0, 2.4, 120.0, 0.0]])
+    assert np.array_equal(first.predict_proba(row), second.predict_proba(row))
+
+    # Another scikit-learn release may read the leaf values differently
+    import sklearn
+    monkeypatch.setattr(sklearn, '__version__', '1.3.2')
+    assert not build_engine(model, 'codegen', model_path).loaded_from_cache
+
+def test_quickscorer_engine_parity(model, dataset):
+    """Test the bitvector engine reproduces sklearn probabilities bit for bit."""
+    X, _ = dataset
+    engine = build_engine(model, 'quickscorer')
+    assert np.array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+def test_quickscorer_exit_leaves_match_flat(model, dataset):
+    """Test the bitvector exit leaves land on the same leaf values."""
+    X, _ = dataset
+    quickscorer = build_engine(model, 'quickscorer')
+    flat = build_engine(model, 'flat')
+    per_tree = quickscorer.leaf_value[np.arange(quickscorer.n_trees), quickscorer.apply(X[:100])]
+    assert np.array_equal(per_tree, flat.value[flat.apply(X[:100])])
+
+def test_gemm_engine_parity(model, dataset):
+    """Test the matrix engine reproduces sklearn probabilities bit for bit."""
+    X, _ = dataset
+    engine = build_engine(model, 'gemm')
+    assert np.array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+def test_batch_engine_dispatch(model, monkeypatch):
+    """Test BATCH_ENGINE takes over inputs above the row threshold."""
+    monkeypatch.setenv('INFERENCE_ENGINE', 'flat')
+    monkeypatch.setenv('BATCH_ENGINE', 'gemm')
+    monkeypatch.setenv('BATCH_ENGINE_MIN_ROWS', '100')
+    engine = build_engine(model)
+    assert engine.name == 'flat+gemm'
+    assert engine.small.name == 'flat'
+    assert engine.large.name == 'gemm'
+    assert engine.min_rows == 100
+
+def test_float32_thresholds_keep_splits(model, dataset):
+    """Test float32 thresholds send every row to the same leaves."""
+    from engines import FlatForestEngine
+    X, _ = dataset
+    full = FlatForestEngine(model)
+    compact = FlatForestEngine(model, float32=True)
+    assert compact.threshold.dtype == np.float32
+    assert np.array_equal(compact.apply(X), full.apply(X))
+
+def test_float32_engines_no_class_flips(model, dataset):
+    """Test float32 leaf storage never changes a predicted class."""
+    from benchmark import float32_parity_report
+    X, _ = dataset
+    report = float32_parity_report(model, X)
+    assert set(report) == {'flat', 'quickscorer', 'gemm'}
+    for result in report.values():
+        assert result['class_flips'] == 0
+        assert result['max_abs_diff'] < 1e-6
+        assert result['float32_bytes'] < result['float64_bytes']
+        assert result['forest_bytes'] > 0
+
+def test_float32_from_environment(model, monkeypatch):
+    """Test INFERENCE_FLOAT32 switches supporting engines to float32."""
+    monkeypatch.setenv('INFERENCE_FLOAT32', 'true')
+    assert build_engine(model, 'flat').value.dtype == np.float32
+    assert build_engine(model, 'sklearn').name == 'sklearn'
+
+def test_benchmark_reports_parity(model, dataset):
+    """Test the benchmark runs every engine and checks parity."""
+    from benchmark import run_benchmark
+    X, _ = dataset
+    results = run_benchmark(model, X[:20], ['sklearn', 'quickscorer'], repeats=2)
+    assert all(result['parity'] for result in results.values())
+
+@pytest.mark.parametrize('name', ['sklearn', 'flat', 'codegen', 'quickscorer', 'gemm'])
+def test_engine_writes_into_output_buffer(model, dataset, name):
+    """Test every engine fills a caller's output buffer with the same probabilities."""
+    X, _ = dataset
+    engine = build_engine(model, name)
+    out = np.empty((1, len(model.classes_)))
+    for row in X[:5]:
+        proba = engine.predict_proba(row[np.newaxis], out)
+        assert proba is out
+        np.testing.assert_allclose(out, engine.predict_proba(row[np.newaxis]))
+
+def test_core_reuses_thread_buffers(dataset):
+    """Test single-record predictions reuse one input and output row per thread."""
+    import threading
+    from inference_core import InferenceCore
+    core = InferenceCore()
+    if not core.load():
+        pytest.skip("Model not loaded")
+    features = dataset[0][0].tolist()
+    first = core.predict(features)
+    X, proba = core.buffers.X, core.buffers.proba
+    assert core.predict(features) == first
+    assert core.buffers.X is X and core.buffers.proba is proba
+
+    seen = []
+    thread = threading.Thread(target=lambda: (core.predict(features), seen.append(core.buffers.X)))
+    thread.start()
+    thread.join()
+    assert seen[0] is not X
+
+def test_benchmark_reports_allocations(model, dataset):
+    """Test the allocation benchmark compares both single-record paths."""
+    from benchmark import allocation_report
+    X, _ = dataset
+    report = allocation_report(model, X[:1], ['flat'], repeats=2)
+    assert set(report['flat']) == {'fresh', 'buffered'}
+    assert report['flat']['buffered']['peak_bytes'] >= 0
+
+def test_agent_with_flat_engine():
+    """Test the agent predicts through a selected engine."""
+    agent = FetalHealthAgent(engine='flat')
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+    assert agent.engine.name == 'flat'
+    result = agent.make_prediction(agent.get_sample_data())
+    assert result['success'] == True
+
+if __name__ == '__main__':
+    pytest.main([__file__])
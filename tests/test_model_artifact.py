@@ -0,0 +1,89 @@
+"""
+Test suite for the memory-mapped model artifact
+"""
+
+import pytest
+import sys
+import os
+import json
+import numpy as np
+
+# Add parent directory to path to import model_artifact
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_artifact import export_forest, load_model, model_version, MappedForest, MANIFEST_NAME
+from engines import build_engine
+from dataset import load_dataset
+from agent import FetalHealthAgent
+
+@pytest.fixture(scope="module")
+def model():
+    """Load the trained forest once for all artifact tests."""
+    agent = FetalHealthAgent()
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+    return agent.model
+
+@pytest.fixture(scope="module")
+def artifact(model, tmp_path_factory):
+    """Convert the model into an artifact directory."""
+    path = str(tmp_path_factory.mktemp("models") / "fetal_health.forest")
+    export_forest(model, path)
+    return path
+
+def test_artifact_is_memory_mapped(artifact):
+    """Test the node arrays are mapped rather than read into memory."""
+    forest = load_model(artifact)
+    assert isinstance(forest, MappedForest)
+    for array in forest.engine.to_arrays().values():
+        assert isinstance(array, np.memmap)
+        assert not array.flags.writeable
+
+def test_artifact_parity(model, artifact):
+    """Test the mapped forest reproduces sklearn probabilities bit for bit."""
+    X, _ = load_dataset()
+    forest = load_model(artifact)
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(forest.predict(X[:20]), model.predict(X[:20]))
+
+def test_artifact_uses_its_own_engine(artifact):
+    """Test engine selection keeps the mapped flat engine."""
+    forest = load_model(artifact)
+    assert build_engine(forest, 'quickscorer') is forest.engine
+
+def test_artifact_version(artifact):
+    """Test the version comes from the manifest hash."""
+    with open(os.path.join(artifact, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    assert model_version(artifact) == manifest['sha256'][:12]
+
+def test_agent_loads_artifact(artifact):
+    """Test the agent predicts from a mapped artifact."""
+    agent = FetalHealthAgent(model_path=artifact)
+    result = agent.make_prediction(agent.get_sample_data())
+    assert result['success'] == True
+
+def test_rejects_foreign_manifest(tmp_path):
+    """Test a directory with another manifest format is rejected."""
+    with open(tmp_path / MANIFEST_NAME, 'w') as f:
+        json.dump({"format": "something-else"}, f)
+    with pytest.raises(ValueError):
+        MappedForest(str(tmp_path))
+
+def test_export_over_mapped_artifact(model, tmp_path):
+    """Test re-exporting leaves a loaded artifact's mapped arrays untouched."""
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = load_dataset()
+    path = str(tmp_path / "fetal_health.forest")
+    export_forest(model, path)
+    forest = load_model(path)
+    before = forest.predict_proba(X)
+
+    other = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=1).fit(X, y)
+    export_forest(other, path)
+    assert np.array_equal(forest.predict_proba(X), before)
+    assert np.array_equal(load_model(path).predict_proba(X), other.predict_proba(X))
+    assert os.listdir(tmp_path) == ["fetal_health.forest"]
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,121 @@
+"""
+Test suite for the model manifest sidecar
+"""
+
+import pytest
+import sys
+import os
+import json
+import shutil
+import subprocess
+import joblib
+
+# Add parent directory to path to import model_manifest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_manifest import read_model_manifest, write_model_manifest, sidecar_path, artifact_sha256
+from model_artifact import model_version, export_forest
+from engines import file_sha256
+from inference_core import InferenceCore, CLASS_LABELS, FEATURE_NAMES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "models", "fetal_health.pkl")
+
+@pytest.fixture(scope="module")
+def model():
+    """The trained model."""
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("Model not available")
+    return joblib.load(MODEL_PATH)
+
+@pytest.fixture
+def artifact(tmp_path, model):
+    """A copy of the trained model with a freshly written manifest."""
+    path = str(tmp_path / "fetal_health.pkl")
+    shutil.copy2(MODEL_PATH, path)
+    write_model_manifest(path, model, CLASS_LABELS, FEATURE_NAMES, {"accuracy": 0.9592})
+    return path
+
+def test_manifest_describes_model(artifact, model):
+    """Test the manifest records hash, feature order, classes, trees and metrics."""
+    manifest = read_model_manifest(artifact)
+    assert manifest["sha256"] == file_sha256(artifact)
+    assert manifest["feature_names"] == FEATURE_NAMES
+    assert manifest["classes"] == [1.0, 2.0, 3.0]
+    assert manifest["labels"] == ["NORMAL", "SUSPECT", "PATHOLOGICAL"]
+    assert manifest["n_trees"] == len(model.estimators_)
+    assert manifest["n_features"] == 8
+    assert manifest["metrics"] == {"accuracy": 0.9592}
+    assert sum(manifest["feature_importances"].values()) == pytest.approx(1.0)
+
+def test_hash_read_from_manifest(artifact):
+    """Test the version comes from a current manifest without hashing the artifact."""
+    path = sidecar_path(artifact)
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest["sha256"] = "0123456789ab" + "0" * 52
+    with open(path, 'w') as f:
+        json.dump(manifest, f)
+    assert artifact_sha256(artifact) == manifest["sha256"]
+    assert model_version(artifact) == "0123456789ab"
+
+def test_stale_manifest_ignored(artifact, tmp_path, model):
+    """Test a replaced artifact invalidates the manifest, a touched copy does not."""
+    os.utime(artifact, ns=(0, 1))
+    assert read_model_manifest(artifact)["sha256"] == file_sha256(artifact)
+
+    smaller = str(tmp_path / "smaller.pkl")
+    joblib.dump(model, smaller, compress=3)
+    os.replace(smaller, artifact)
+    assert read_model_manifest(artifact) is None
+    assert model_version(artifact) == file_sha256(artifact)[:12]
+
+def test_touched_artifact_hashed_once(artifact, monkeypatch):
+    """Test a copied artifact is re-hashed once, not on every read."""
+    import model_manifest
+    hashes = []
+    hash_artifact = model_manifest._hash_artifact
+    monkeypatch.setattr(model_manifest, '_hash_artifact', lambda path: hashes.append(path) or hash_artifact(path))
+    os.utime(artifact, ns=(0, 1))
+    for _ in range(3):
+        assert read_model_manifest(artifact)["sha256"] == file_sha256(artifact)
+        assert model_version(artifact) == file_sha256(artifact)[:12]
+    assert len(hashes) == 1
+
+    # Rewriting the sidecar is picked up on the next read
+    with open(sidecar_path(artifact)) as f:
+        manifest = json.load(f)
+    manifest["metrics"]["accuracy"] = 0.5
+    with open(sidecar_path(artifact), 'w') as f:
+        json.dump(manifest, f)
+    assert read_model_manifest(artifact)["metrics"]["accuracy"] == 0.5
+
+def test_mapped_artifact_manifest(tmp_path, model):
+    """Test memory-mapped artifacts get a manifest with their own hash."""
+    from model_artifact import MappedForest
+    path = str(tmp_path / "fetal_health.forest")
+    export_forest(model, path)
+    manifest = write_model_manifest(path, MappedForest(path), CLASS_LABELS, FEATURE_NAMES)
+    assert manifest["n_trees"] == len(model.estimators_)
+    assert manifest["feature_importances"] is None
+    assert read_model_manifest(path)["sha256"][:12] == model_version(path)
+
+def test_core_reports_manifest_before_loading(artifact):
+    """Test /health figures come from the manifest before the model is loaded."""
+    core = InferenceCore(artifact)
+    assert core.serving is None
+    assert core.manifest()["n_trees"] == 100
+    assert core.stats()["model_manifest"]["sha256"] == file_sha256(artifact)
+
+def test_check_model_without_unpickling():
+    """Test run.py's model check reads the shipped manifest."""
+    if read_model_manifest(MODEL_PATH) is None:
+        pytest.skip("No manifest shipped with the model")
+    code = "import run, sys; ok = run.check_model(); print(ok, 'joblib' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    assert "Version:" in output
+    assert output.strip().splitlines()[-1] == "True False"
+
+if __name__ == '__main__':
+    pytest.main([__file__])
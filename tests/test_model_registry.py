@@ -0,0 +1,108 @@
+"""
+Test suite for the model registry and shadow scoring
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+import joblib
+import numpy as np
+
+# Add parent directory to path to import model_registry
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import ModelRegistry
+from model_reload import ServingModel
+from shadow_scoring import ShadowScorer
+from compact_model import build_forest
+from dataset import load_dataset
+from agent import FetalHealthAgent, EXAMPLE_CASES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "models", "fetal_health.pkl")
+
+@pytest.fixture
+def registry(tmp_path):
+    """A registry holding the trained model (v1, primary) and a 5-tree cut (v2, shadow)."""
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("Model not available")
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.add(MODEL_PATH, name="v1", description="trained forest")
+    registry.promote("v1")
+    smaller = tmp_path / "smaller.pkl"
+    joblib.dump(build_forest(joblib.load(MODEL_PATH), joblib.load(MODEL_PATH).estimators_[:5]), smaller)
+    registry.add(str(smaller), name="v2")
+    registry.set_shadows(["v2"])
+    return registry
+
+def wait_for_shadows(scorer, timeout=10):
+    """Wait until the shadow pool has scored everything submitted."""
+    deadline = time.time() + timeout
+    while scorer.stats()['pending'] and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_registry_layout(registry):
+    """Test versions, manifests and roles are recorded."""
+    assert registry.versions() == ["v1", "v2"]
+    assert registry.primary == "v1"
+    assert registry.shadows == ["v2"]
+    manifest = registry.manifest("v1")
+    assert manifest["description"] == "trained forest"
+    assert os.path.isfile(registry.artifact_path("v1"))
+    with pytest.raises(KeyError):
+        registry.manifest("v3")
+    with pytest.raises(ValueError):
+        registry.add(MODEL_PATH, name="v1")
+
+def test_promote_removes_shadow(registry):
+    """Test promoting a shadow makes it primary and stops shadowing it."""
+    registry.promote("v2")
+    assert registry.primary == "v2"
+    assert registry.shadows == []
+
+def test_agent_serves_primary_and_shadows(registry, monkeypatch):
+    """Test the agent serves the primary version and shadow-scores its inputs."""
+    monkeypatch.setenv('MODEL_REGISTRY', registry.root)
+    monkeypatch.setenv('MODEL_RELOAD_INTERVAL', '0')
+    agent = FetalHealthAgent()
+    assert agent.model_path == registry.artifact_path("v1")
+    assert len(agent.model.estimators_) == 100
+
+    X, _ = load_dataset(limit=200)
+    primary = [r['prediction'] for r in agent.make_prediction_batch(X)['results']]
+    for case in EXAMPLE_CASES.values():
+        primary.append(agent.make_prediction(case)['prediction'])
+        X = np.vstack([X, [[case[f] for f in agent.feature_names]]])
+    wait_for_shadows(agent.shadow_scorer)
+
+    stats = agent.shadow_scorer.stats()['models']['v2']
+    shadow = joblib.load(registry.artifact_path("v2"))
+    expected = sum(p != agent.labels[int(c) - 1] for p, c in zip(primary, shadow.predict(X)))
+    assert stats['rows'] == len(X)
+    assert stats['disagreements'] == expected
+
+def test_shadow_backlog_is_bounded():
+    """Test submissions beyond max_pending are dropped instead of queued."""
+    release = threading.Event()
+
+    class SlowEngine:
+        name = "slow"
+        def predict_proba(self, X):
+            release.wait(5)
+            return np.tile([1.0, 0.0, 0.0], (len(X), 1))
+
+    shadow = ServingModel(None, SlowEngine(), None, ["NORMAL", "SUSPECT", "PATHOLOGICAL"], "slow", None)
+    scorer = ShadowScorer({"slow": shadow}, max_workers=1, max_pending=2)
+    accepted = [scorer.submit([[0.0] * 8], ["SUSPECT"]) for _ in range(4)]
+    release.set()
+    wait_for_shadows(scorer)
+    stats = scorer.stats()
+    assert accepted == [True, True, False, False]
+    assert stats['dropped'] == 2
+    assert stats['models']['slow']['disagreements'] == 2
+    assert stats['models']['slow']['changes'] == {"SUSPECT->NORMAL": 2}
+
+if __name__ == '__main__':
+    pytest.main([__file__])
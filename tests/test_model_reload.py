@@ -0,0 +1,215 @@
+"""
+Test suite for hot model reload
+"""
+
+import pytest
+import sys
+import os
+import shutil
+import threading
+import joblib
+import numpy as np
+
+# Add parent directory to path to import model_reload
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_reload import validate_serving_model, artifact_signature
+from compact_model import build_forest
+from prediction_cache import PredictionCache
+from agent import FetalHealthAgent, EXAMPLE_CASES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "models", "fetal_health.pkl")
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    """An agent serving a private copy of the model, without a polling thread."""
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("Model not available")
+    monkeypatch.setenv('MODEL_RELOAD_INTERVAL', '3600')
+    path = tmp_path / "fetal_health.pkl"
+    shutil.copy(MODEL_PATH, path)
+    agent = FetalHealthAgent(model_path=str(path))
+    if agent.model is None:
+        pytest.skip("Model not loaded")
+    return agent
+
+def replace_model(agent, model):
+    """Atomically replace the agent's model file with model."""
+    staged = agent.model_path + ".new"
+    joblib.dump(model, staged)
+    os.replace(staged, agent.model_path)
+
+def test_reload_swaps_new_model(agent):
+    """Test a replaced artifact is validated and served with its version."""
+    old_version = agent.model_version
+    smaller = build_forest(agent.model, agent.model.estimators_[:10])
+    replace_model(agent, smaller)
+
+    assert agent.model_watcher.poll() == True
+    assert agent.model_version != old_version
+    assert len(agent.model.estimators_) == 10
+    result = agent.make_prediction(EXAMPLE_CASES["NORMAL"])
+    assert result['model_version'] == agent.model_version
+    assert agent.model_watcher.stats()['reloads'] == 1
+
+def test_unchanged_artifact_is_not_reloaded(agent):
+    """Test polling an untouched or rewritten identical artifact keeps the model."""
+    serving = agent.serving
+    assert agent.model_watcher.poll() == False
+    shutil.copy(agent.model_path, agent.model_path + ".new")
+    os.replace(agent.model_path + ".new", agent.model_path)
+    assert agent.model_watcher.poll() == False
+    assert agent.serving is serving
+
+def test_broken_artifact_is_rejected(agent):
+    """Test a corrupt artifact leaves the current model serving."""
+    serving = agent.serving
+    with open(agent.model_path, 'wb') as f:
+        f.write(b"not a model")
+    assert agent.model_watcher.poll() == False
+    assert agent.serving is serving
+    assert agent.model_watcher.stats()['failures'] == 1
+    assert agent.make_prediction(EXAMPLE_CASES["SUSPECT"])['success'] == True
+
+def test_mislabelling_model_is_rejected(agent):
+    """Test a self-consistent model that mislabels the example cases is not swapped in."""
+    import copy
+    serving = agent.serving
+    shuffled = copy.copy(agent.model)
+    shuffled.classes_ = agent.model.classes_[[2, 0, 1]]
+    replace_model(agent, shuffled)
+    assert agent.model_watcher.poll() == False
+    assert agent.serving is serving
+    assert "mislabels" in agent.model_watcher.stats()['last_error']
+
+def test_artifact_appearing_after_start_is_loaded(tmp_path, monkeypatch):
+    """Test a worker started before the artifact exists serves it once it appears."""
+    from inference_core import InferenceCore
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("Model not available")
+    monkeypatch.setenv('MODEL_RELOAD_INTERVAL', '3600')
+    monkeypatch.delenv('MODEL_REGISTRY', raising=False)
+    path = str(tmp_path / "fetal_health.pkl")
+    core = InferenceCore(model_path=path)
+    assert core.load() is None
+    assert core.model_watcher is not None
+    shutil.copy(MODEL_PATH, path)
+    assert core.model_watcher.poll() == True
+    assert core.current() is not None
+
+def test_no_dropped_requests_during_swap(agent):
+    """Test concurrent requests all succeed and report one of the two versions."""
+    old_version = agent.model_version
+    replace_model(agent, build_forest(agent.model, agent.model.estimators_[:10]))
+    responses = []
+
+    def call():
+        for case in list(EXAMPLE_CASES.values()) * 20:
+            responses.append(agent.make_prediction(case))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    agent.model_watcher.poll()
+    for thread in threads:
+        thread.join()
+
+    assert all(response['success'] for response in responses)
+    assert {r['model_version'] for r in responses} <= {old_version, agent.model_version}
+
+def test_validation_rejects_disagreeing_engine(agent):
+    """Test validation fails when the engine does not reproduce the model."""
+    class WrongEngine:
+        name = "wrong"
+        def predict_proba(self, X):
+            return np.tile([0.0, 0.0, 1.0], (len(X), 1))
+
+    serving = agent.serving
+    inputs = [[case[f] for f in agent.feature_names] for case in EXAMPLE_CASES.values()]
+    validate_serving_model(serving, inputs)
+    broken = type(serving)(serving.model, WrongEngine(), None, serving.labels, "x", serving.path)
+    with pytest.raises(ValueError):
+        validate_serving_model(broken, inputs)
+
+def test_rejected_candidate_is_closed(agent, tmp_path):
+    """Test a candidate that fails validation has its coalescer closed."""
+    from model_reload import ModelWatcher
+    closed = []
+
+    class WrongEngine:
+        name = "wrong"
+        def predict_proba(self, X, out=None):
+            return np.tile([0.0, 0.0, 1.0], (len(X), 1))
+
+    class Coalescer:
+        def close(self):
+            closed.append(True)
+
+    serving = agent.serving
+    path = tmp_path / "candidate.pkl"
+    path.write_bytes(b"model")
+    watcher = ModelWatcher(
+        str(path),
+        load=lambda p: type(serving)(serving.model, WrongEngine(), Coalescer(), serving.labels, "x", p),
+        current=lambda: serving,
+        swap=lambda candidate: None,
+        validation_inputs=[[case[f] for f in agent.feature_names] for case in EXAMPLE_CASES.values()]
+    )
+    path.write_bytes(b"replaced model")
+    assert watcher.poll() == False
+    assert watcher.failures == 1
+    assert closed == [True]
+
+def test_array_engine_releases_forest(tmp_path, monkeypatch):
+    """Test an array engine serves without the sklearn trees, through a reload too."""
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("Model not available")
+    monkeypatch.setenv('MODEL_RELOAD_INTERVAL', '3600')
+    path = tmp_path / "fetal_health.pkl"
+    shutil.copy(MODEL_PATH, path)
+    model = joblib.load(MODEL_PATH)
+    agent = FetalHealthAgent(model_path=str(path), engine='flat')
+    assert not hasattr(agent.model, 'estimators_')
+    assert agent.prediction_cache.key([0.0] * 8) is not None
+    result = agent.make_prediction(EXAMPLE_CASES["SUSPECT"])
+    features = [[EXAMPLE_CASES["SUSPECT"][f] for f in agent.feature_names]]
+    assert list(result['confidence'].values()) == pytest.approx(model.predict_proba(features)[0].tolist(), abs=0.005)
+
+    replace_model(agent, build_forest(model, model.estimators_[:10]))
+    assert agent.model_watcher.poll() == True
+    assert not hasattr(agent.model, 'estimators_')
+
+def test_stop_background_before_fork(tmp_path, monkeypatch):
+    """Test warm-up threads stop for gunicorn's fork and restart on next use."""
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("Model not available")
+    monkeypatch.setenv('PREDICTION_COALESCE', 'true')
+    agent = FetalHealthAgent(model_path=MODEL_PATH)
+    agent.warmup()
+    workers = [agent.model_watcher._thread, agent.serving.coalescer._worker]
+    started = [worker.get()[1] for worker in workers]
+    assert all(thread.is_alive() for thread in started)
+
+    agent.core.stop_background()
+    assert not any(thread.is_alive() for thread in started)
+    assert not any(worker.running() for worker in workers)
+    assert agent.make_prediction(EXAMPLE_CASES["NORMAL"])['success'] == True
+    assert all(worker.running() for worker in workers)
+    agent.core.stop_background()
+
+def test_artifact_signature_missing(tmp_path):
+    """Test a missing artifact has no signature."""
+    assert artifact_signature(str(tmp_path / "missing.pkl")) is None
+
+def test_cache_ignores_other_versions():
+    """Test cached results are only read and written for the current version."""
+    cache = PredictionCache(version="new")
+    cache.put([0.0] * 8, "old result", version="old")
+    assert cache.get([0.0] * 8) is None
+    cache.put([0.0] * 8, "new result", version="new")
+    assert cache.get([0.0] * 8, version="old") is None
+    assert cache.get([0.0] * 8, version="new") == "new result"
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,117 @@
+"""
+Test suite for the prediction cache
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path to import prediction_cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prediction_cache import PredictionCache, build_prediction_cache, split_thresholds
+from app import FEATURE_NAMES
+
+SAMPLE = [0.002, 50.0, 45.0, 134.0, 130.0, 25.0, 120.0, 0.01]
+
+@pytest.fixture(scope="module")
+def model():
+    """Load the trained model."""
+    from model_artifact import load_model
+    from inference_core import default_model_path
+    path = default_model_path()
+    if not os.path.exists(path):
+        pytest.skip("Model not found")
+    return load_model(path)
+
+def test_split_thresholds(model):
+    """Test thresholds are collected per feature from every tree."""
+    from engines import FlatForestEngine
+    thresholds = split_thresholds(model, len(FEATURE_NAMES))
+    tree = model.estimators_[0].tree_
+    assert tree.threshold[0] in thresholds[tree.feature[0]]
+    assert all(t == sorted(t) for t in thresholds)
+
+    class Mapped:
+        engine = FlatForestEngine(model)
+    assert split_thresholds(Mapped(), len(FEATURE_NAMES)) == thresholds
+    assert split_thresholds(object(), len(FEATURE_NAMES)) is None
+
+def test_cache_hits_match_model_across_thresholds(model):
+    """Test a hit matches the model for inputs just either side of a threshold."""
+    import numpy as np
+    thresholds = split_thresholds(model, len(FEATURE_NAMES))
+    cache = PredictionCache(thresholds=thresholds)
+    j = FEATURE_NAMES.index('abnormal_short_term_variability')
+    for threshold in thresholds[j]:
+        below = np.float32(threshold)
+        if below > threshold:
+            below = np.nextafter(below, np.float32(-np.inf))
+        above = np.nextafter(below, np.float32(np.inf))
+        for value in (below, above):
+            features = list(SAMPLE)
+            features[j] = float(value)
+            expected = model.predict_proba(np.array([features]))[0].tolist()
+            if cache.get(features) is None:
+                cache.put(features, expected)
+            assert cache.get(features) == expected
+    assert cache.hits >= 2 * len(thresholds[j])
+
+def test_exact_key_without_thresholds():
+    """Test models without exposed splits are keyed by the exact values."""
+    cache = PredictionCache()
+    cache.put(SAMPLE, "NORMAL")
+    nearby = list(SAMPLE)
+    nearby[1] = 50.04
+    assert cache.get(nearby) is None
+    assert cache.get([-0.0 if v == 0 else v for v in SAMPLE]) == "NORMAL"
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted at the size bound."""
+    cache = PredictionCache(max_size=2)
+    first, second, third = ([float(i)] * 8 for i in range(3))
+    cache.put(first, 1)
+    cache.put(second, 2)
+    cache.get(first)
+    cache.put(third, 3)
+    assert cache.get(second) is None
+    assert cache.get(first) == 1
+    assert cache.evictions == 1
+
+def test_ttl_expiry():
+    """Test entries expire after the TTL."""
+    cache = PredictionCache(ttl=0.01)
+    cache.put(SAMPLE, "NORMAL")
+    time.sleep(0.02)
+    assert cache.get(SAMPLE) is None
+    assert cache.expirations == 1
+
+def test_model_change_invalidates():
+    """Test a new model version clears cached predictions."""
+    cache = PredictionCache(version="a")
+    cache.put(SAMPLE, "NORMAL")
+    cache.ensure_version("a")
+    assert cache.get(SAMPLE) == "NORMAL"
+    cache.ensure_version("b")
+    assert cache.get(SAMPLE) is None
+    assert cache.stats()['model_version'] == "b"
+
+def test_cache_disabled(monkeypatch):
+    """Test PREDICTION_CACHE_SIZE=0 disables the cache."""
+    monkeypatch.setenv('PREDICTION_CACHE_SIZE', '0')
+    assert build_prediction_cache() is None
+
+def test_health_reports_cache_counters():
+    """Test /health exposes the cache counters."""
+    from app import app
+    client = app.test_client()
+    sample = client.get('/api/sample').get_json()
+    client.post('/api/predict', json=sample)
+    client.post('/api/predict', json=sample)
+    stats = client.get('/health').get_json()['prediction_cache']
+    assert stats['hits'] >= 1
+    assert 'evictions' in stats
+
+if __name__ == '__main__':
+    pytest.main([__file__])
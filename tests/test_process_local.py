@@ -0,0 +1,58 @@
+"""
+Test suite for per-process background threads
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+# Add parent directory to path to import process_local
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_local import ProcessLocal, start_daemon
+
+@pytest.fixture
+def local():
+    """A ProcessLocal over a thread that waits for its event."""
+    def create():
+        stopped = threading.Event()
+        return stopped, start_daemon(stopped.wait, "test-process-local")
+
+    def release(resource):
+        stopped, thread = resource
+        stopped.set()
+        thread.join()
+
+    local = ProcessLocal(create, release)
+    yield local
+    local.stop()
+
+def test_created_once_per_process(local):
+    """Test the resource is created on first use and then reused."""
+    assert not local.running()
+    first = local.get()
+    assert local.get() is first
+    assert local.running() and first[1].is_alive()
+
+def test_stop_releases_and_restarts(local):
+    """Test stop() releases the resource and the next get() creates a new one."""
+    first = local.get()
+    local.stop()
+    assert not first[1].is_alive() and not local.running()
+    local.stop()
+    assert local.get() is not first
+
+def test_recreated_after_fork(local, monkeypatch):
+    """Test a forked process creates its own resource instead of reusing the parent's."""
+    parent = local.get()
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    child = local.get()
+    assert child is not parent
+    assert local.get() is child
+    monkeypatch.undo()
+    parent[0].set()
+    child[0].set()
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,68 @@
+"""
+Test suite for the combined server
+"""
+
+import pytest
+import sys
+import os
+from werkzeug.test import Client
+
+# Add parent directory to path to import server
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import app, AGENT_PREFIX
+import app as main_module
+import agent_app as agent_module
+
+@pytest.fixture
+def client():
+    """Create a test client for the combined WSGI application."""
+    return Client(app)
+
+def test_apps_share_one_core():
+    """Test the agent scores with the main application's inference core."""
+    assert agent_module.agent.core is main_module.core
+
+def test_main_routes_at_root(client):
+    """Test the main application is served at the root."""
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'Fetal Health Prediction System' in response.data
+    sample = client.get('/api/sample').get_json()
+    assert client.post('/api/predict', json=sample).get_json()['success'] == True
+
+def test_agent_routes_under_prefix(client):
+    """Test the agent is mounted under the prefix with working links."""
+    response = client.get(f'{AGENT_PREFIX}/agent')
+    assert response.status_code == 200
+    assert f"{AGENT_PREFIX}/api/chat".encode() in response.data
+    response = client.post(f'{AGENT_PREFIX}/api/chat', json={'message': 'help'})
+    assert response.get_json()['success'] == True
+
+def test_same_model_version_on_both(client):
+    """Test both applications report the same loaded model."""
+    sample = client.get(f'{AGENT_PREFIX}/api/sample').get_json()
+    agent_result = client.post(f'{AGENT_PREFIX}/api/predict', json=sample).get_json()
+    main_result = client.post('/api/predict', json=sample).get_json()
+    if not main_result['success']:
+        pytest.skip("Model not loaded")
+    assert agent_result['model_version'] == main_result['model_version']
+    assert agent_result['confidence'] == main_result['confidence']
+    assert client.get(f'{AGENT_PREFIX}/health').get_json()['model_version'] == \
+        client.get('/health').get_json()['model_version']
+
+def test_binary_predictions_on_both(client):
+    """Test both applications answer binary batches identically."""
+    import numpy as np
+    from binary_format import pack_request, CONTENT_TYPE
+    sample = client.get(f'{AGENT_PREFIX}/api/sample').get_json()
+    body = pack_request(np.array([list(sample.values())] * 3))
+    main_response = client.post('/api/predict/binary', data=body, content_type=CONTENT_TYPE)
+    if main_response.status_code == 503:
+        pytest.skip("Model not loaded")
+    agent_response = client.post(f'{AGENT_PREFIX}/api/predict/binary', data=body, content_type=CONTENT_TYPE)
+    assert agent_response.status_code == 200
+    assert agent_response.data == main_response.data
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,145 @@
+"""
+Test suite for lazy model loading and startup timing
+"""
+
+import pytest
+import subprocess
+import sys
+import os
+
+# Add parent directory to path to import startup_timing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from startup_timing import StartupTimer, STARTUP_PHASES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_timer_records_phases():
+    """Test phases are timed once and summed into the report."""
+    timer = StartupTimer()
+    with timer.phase("unpickle"):
+        pass
+    timer.record("unpickle", 99.0)
+    with pytest.raises(RuntimeError):
+        with timer.phase("engine_build"):
+            raise RuntimeError("failed")
+    assert not timer.has("engine_build")
+    report = timer.report()
+    assert 0 <= report['unpickle_seconds'] < 99.0
+    assert report['first_prediction_seconds'] is None
+    assert report['warmed_up'] == False
+    assert set(report) == {f"{p}_seconds" for p in STARTUP_PHASES} | {'total_seconds', 'warmed_up'}
+
+def test_import_does_not_load_model():
+    """Test importing app.py leaves the model unloaded until first use."""
+    code = "import app; print(app.core.serving is None, app.startup.has('import'), app.startup.has('unpickle'))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "True True False"
+
+def test_admin_warmup():
+    """Test POST /admin/warmup loads the model and reports every phase."""
+    from app import app
+    response = app.test_client().post('/admin/warmup')
+    data = response.get_json()
+    if not data['success']:
+        pytest.skip("Model not loaded")
+    startup = data['startup']
+    assert startup['warmed_up'] == True
+    for phase in STARTUP_PHASES:
+        assert startup[f"{phase}_seconds"] is not None
+    health = app.test_client().get('/health').get_json()
+    assert health['startup']['warmed_up'] == True
+    assert health['ready'] == True
+    assert health['warmup']['rows'] >= 4
+
+def test_warm_up_scores_every_engine(monkeypatch):
+    """Test warm-up covers both dispatch engines, the inputs and dataset rows."""
+    from inference_core import InferenceCore, EXAMPLE_CASES
+    monkeypatch.setenv('INFERENCE_ENGINE', 'flat')
+    monkeypatch.setenv('BATCH_ENGINE', 'gemm')
+    monkeypatch.setenv('WARMUP_SAMPLE_ROWS', '5')
+    monkeypatch.setenv('MODEL_RELOAD_INTERVAL', '0')
+    monkeypatch.delenv('MODEL_REGISTRY', raising=False)
+    core = InferenceCore()
+    if core.load() is None:
+        pytest.skip("Model not loaded")
+    assert core.ready == False
+    assert core.warm_up(list(EXAMPLE_CASES.values())) == True
+    assert core.ready == True
+    assert core.stats()['warmup'] == {"rows": len(EXAMPLE_CASES) + 5, "engines": ["flat", "gemm"]}
+    assert core.startup.report()['warmup_seconds'] is not None
+    # Later calls return at once without scoring again
+    seconds = core.startup.report()['warmup_seconds']
+    core.warm_up([])
+    assert core.startup.report()['warmup_seconds'] == seconds
+
+def test_failed_warm_up_is_not_ready(monkeypatch):
+    """Test an engine failing during warm-up leaves the core unready and retryable."""
+    from inference_core import InferenceCore, EXAMPLE_CASES
+    monkeypatch.setenv('WARMUP_SAMPLE_ROWS', '5')
+    monkeypatch.setenv('MODEL_RELOAD_INTERVAL', '0')
+    monkeypatch.delenv('MODEL_REGISTRY', raising=False)
+    core = InferenceCore()
+    current = core.load()
+    if current is None:
+        pytest.skip("Model not loaded")
+    engine = current.engine
+    score = engine.predict_proba
+
+    def fail_on_batches(X, out=None):
+        if len(X) > 1:
+            raise RuntimeError("engine failure")
+        return score(X, out)
+
+    monkeypatch.setattr(engine, 'predict_proba', fail_on_batches)
+    assert core.warm_up(list(EXAMPLE_CASES.values())) == False
+    assert core.ready == False
+    assert core.startup.report()['warmed_up'] == False
+    assert core.warmup_inputs is None
+
+    monkeypatch.setattr(engine, 'predict_proba', score)
+    assert core.warm_up(list(EXAMPLE_CASES.values())) == True
+    assert core.ready == True
+
+def test_parse_importtime_tree():
+    """Test -X importtime output is nested and sorted by cumulative time."""
+    from startup_profile import parse_importtime, sort_tree
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   numpy.core",
+        "import time:       400 |        500 | numpy",
+        "import time:        50 |         50 |   flask.json",
+        "import time:       200 |        250 | flask",
+        "import time:        10 |         10 | json",
+        "warning: not an import line"
+    ]
+    tree = sort_tree(parse_importtime(lines))
+    assert [node["module"] for node in tree] == ["numpy", "flask", "json"]
+    assert tree[0]["cumulative_ms"] == 0.5
+    assert tree[0]["children"][0]["module"] == "numpy.core"
+    assert tree[1]["children"][0]["self_ms"] == 0.05
+
+def test_profile_startup():
+    """Test the profiler cold-starts both apps up to a successful prediction."""
+    from startup_profile import profile_startup
+    profile = profile_startup()
+    if not profile["first_predict_success"]:
+        pytest.skip("Model not loaded")
+    assert profile["templates"] >= 1
+    for key in ("import_app_seconds", "model_load_seconds", "template_load_seconds", "first_predict_seconds"):
+        assert profile["phases"][key] > 0
+    assert "app" in [node["module"] for node in profile["imports"]]
+    assert profile["startup"]["unpickle_seconds"] is not None
+
+def test_agent_app_warmup():
+    """Test the agent application exposes the same warm-up hook."""
+    from agent_app import app
+    data = app.test_client().post('/admin/warmup').get_json()
+    if not data['success']:
+        pytest.skip("Agent model not loaded")
+    assert data['startup']['unpickle_seconds'] is not None
+    assert data['startup']['warmed_up'] == True
+
+if __name__ == '__main__':
+    pytest.main([__file__])
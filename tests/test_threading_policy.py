@@ -0,0 +1,56 @@
+"""
+Test suite for the inference threading policy
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import threading_policy
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from threading_policy import ThreadingPolicy
+
+def test_policy_from_environment(monkeypatch):
+    """Test the policy is configured from the environment."""
+    monkeypatch.setenv('INFERENCE_THREADS', '4')
+    monkeypatch.setenv('INFERENCE_PARALLEL_MIN_ROWS', '500')
+    monkeypatch.setenv('INFERENCE_BLAS_THREADS', '2')
+    policy = ThreadingPolicy.from_env()
+    assert policy.parallel_threads == 4
+    assert policy.parallel_min_rows == 500
+    assert policy.blas_threads == 2
+
+def test_small_inputs_stay_single_threaded():
+    """Test only large batches are spread over threads."""
+    policy = ThreadingPolicy(parallel_threads=4, parallel_min_rows=100)
+    assert policy.n_jobs_for(1) == 1
+    assert policy.n_jobs_for(99) == 1
+    assert policy.n_jobs_for(100) == 4
+
+def test_parallel_context_sets_joblib_threads():
+    """Test the per-call context drives joblib's default n_jobs."""
+    from joblib import effective_n_jobs
+    policy = ThreadingPolicy(parallel_threads=3, parallel_min_rows=10)
+    with policy.parallel(1):
+        assert effective_n_jobs(None) == 1
+    with policy.parallel(10):
+        assert effective_n_jobs(None) == 3
+
+def test_prepare_clears_model_n_jobs():
+    """Test the pickled n_jobs no longer overrides the policy."""
+    class Model:
+        n_jobs = -1
+    model = Model()
+    ThreadingPolicy().prepare(model)
+    assert model.n_jobs is None
+
+def test_health_reports_threading():
+    """Test /health exposes the threading policy."""
+    from app import app
+    data = app.test_client().get('/health').get_json()
+    assert data['threading']['parallel_threads'] >= 1
+    assert 'threadpools' in data['threading']
+
+if __name__ == '__main__':
+    pytest.main([__file__])
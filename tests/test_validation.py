@@ -0,0 +1,160 @@
+"""
+Test suite for the compiled input validator
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import validation
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validation import FeatureValidator
+from inference_core import FEATURE_NAMES, FEATURE_RANGES, EXAMPLE_CASES
+
+@pytest.fixture
+def validator():
+    """Validator compiled from the application's feature ranges."""
+    return FeatureValidator(FEATURE_NAMES, FEATURE_RANGES)
+
+@pytest.fixture
+def record():
+    """A valid record."""
+    return dict(EXAMPLE_CASES["NORMAL"])
+
+def test_violation_bitmasks(validator, record):
+    """Test each row reports the bits of its out-of-range features."""
+    X = np.array([[record[f] for f in FEATURE_NAMES]] * 3)
+    X[1, 0] = 1.0
+    X[2, 7] = -1.0
+    X[2, 3] = np.nan
+    masks = validator.violations(X)
+    assert masks.tolist() == [0, 1, (1 << 7) | (1 << 3)]
+    assert validator.features(masks[2]) == [3, 7]
+    # The bounds themselves are valid
+    assert validator.violations(validator.lower) == 0
+    assert validator.violations(validator.upper) == 0
+
+def test_float32_bounds(validator):
+    """Test float32 rows are checked against bounds in float32."""
+    upper = np.array([[high for _, high in validator.ranges]])
+    assert (upper.astype(np.float32) > upper).any()
+    assert validator.violations(upper.astype(np.float32))[0] == 0
+    assert validator.violations(np.nextafter(upper.astype(np.float32), np.float32(np.inf)))[0] == \
+        (1 << len(FEATURE_NAMES)) - 1
+
+def test_matches_per_feature_checks(validator):
+    """Test the vectorized check agrees with comparing every value."""
+    rng = np.random.default_rng(0)
+    X = rng.uniform(validator.lower - 1, validator.upper + 1, size=(500, len(FEATURE_NAMES)))
+    masks = validator.violations(X)
+    for row, mask in zip(X, masks):
+        expected = sum(1 << j for j, (low, high) in enumerate(validator.ranges) if not low <= row[j] <= high)
+        assert mask == expected
+
+def test_check_record(validator, record):
+    """Test single records report missing, non-numeric and out-of-range values."""
+    values, missing, invalid, violated = validator.check(record)
+    assert values == [record[f] for f in FEATURE_NAMES]
+    assert (missing, invalid, violated) == (0, 0, 0)
+
+    record['histogram_mode'] = '120'
+    record['histogram_median'] = 500.0
+    del record['accelerations']
+    values, missing, invalid, violated = validator.check(record)
+    assert values[FEATURE_NAMES.index('histogram_mode')] == 120.0
+    assert missing == 1 << FEATURE_NAMES.index('accelerations')
+    assert invalid == 0
+    assert violated == missing | 1 << FEATURE_NAMES.index('histogram_median')
+
+    # Strict conversion only accepts numbers
+    values, missing, invalid, violated = validator.check(record, strict=True)
+    assert invalid == 1 << FEATURE_NAMES.index('histogram_mode')
+    assert np.isnan(values[FEATURE_NAMES.index('histogram_mode')])
+    assert violated & invalid
+
+def test_generated_check_matches_arrays(validator):
+    """Test the generated single-record check agrees with the array check."""
+    rng = np.random.default_rng(1)
+    X = rng.uniform(validator.lower - 1, validator.upper + 1, size=(200, len(FEATURE_NAMES)))
+    X[0] = validator.lower
+    X[1] = validator.upper
+    for row, mask in zip(X, validator.violations(X)):
+        values, _, _, violated = validator.check(dict(zip(FEATURE_NAMES, row.tolist())), strict=True)
+        assert violated == mask
+        assert values == row.tolist()
+
+def test_to_matrix(validator, record):
+    """Test batches convert in one call and fall back per record on errors."""
+    X, missing, invalid, objects = validator.to_matrix([record, record])
+    assert X.shape == (2, len(FEATURE_NAMES))
+    assert objects.all() and not missing.any() and not invalid.any()
+
+    broken = dict(record, histogram_variance=None)
+    X, missing, invalid, objects = validator.to_matrix([record, broken, "not a record"])
+    assert objects.tolist() == [True, True, False]
+    assert invalid.tolist() == [0, 1 << FEATURE_NAMES.index('histogram_variance'), 0]
+    assert not np.isnan(X[0]).any() and np.isnan(X[2]).all()
+    assert validator.violations(X)[0] == 0
+
+def test_from_columns(validator, record):
+    """Test columns convert and range-check to the same masks as rows."""
+    records = [record, dict(record, histogram_mode=None), dict(record, accelerations=1.0)]
+    columns = {f: [r[f] for r in records] for f in FEATURE_NAMES}
+    X, invalid, violated = validator.from_columns(columns)
+    rows, _, row_invalid, _ = validator.to_matrix(records)
+    np.testing.assert_array_equal(X, rows)
+    assert invalid.tolist() == row_invalid.tolist()
+    assert violated.tolist() == validator.violations(rows).tolist()
+
+    strict_invalid = validator.from_columns(dict(columns, histogram_median=['130', 130, 130]), strict=True)[1]
+    assert strict_invalid[0] == 1 << FEATURE_NAMES.index('histogram_median')
+
+    for broken in ({**columns, 'heart_rate': [1, 2, 3]}, dict(columns, accelerations=[0.0]),
+                   {f: columns[f] for f in FEATURE_NAMES[1:]}, dict(columns, accelerations=0.0)):
+        with pytest.raises(ValueError):
+            validator.from_columns(broken)
+
+def test_from_rows(validator, record):
+    """Test rows of values convert like records, with strict rejecting strings."""
+    row = [record[f] for f in FEATURE_NAMES]
+    X, invalid = validator.from_rows([row, row])
+    np.testing.assert_array_equal(X, validator.to_matrix([record, record])[0])
+    assert not invalid.any()
+
+    text = [str(value) for value in row]
+    assert not validator.from_rows([row, text])[1].any()
+    X, invalid = validator.from_rows([row, text], strict=True)
+    assert invalid.tolist() == [0, (1 << len(FEATURE_NAMES)) - 1]
+    assert np.isnan(X[1]).all()
+    assert validator.batch([row, text], strict=True)[3][1] == invalid[1]
+
+    for broken in ([row, row[1:]], [row, "not a row"]):
+        with pytest.raises(ValueError):
+            validator.from_rows(broken)
+
+@pytest.mark.parametrize('decoder', ['orjson', 'json'])
+def test_parse_request_body(validator, record, decoder, monkeypatch):
+    """Test bodies decode into feature rows and flag unknown and missing keys."""
+    import json
+    import validation
+    if decoder == 'json':
+        monkeypatch.setattr(validation, 'orjson', None)
+    body = json.dumps(record).encode()
+    data, values, missing, invalid, violated, unknown = validator.parse(body)
+    assert data == record and values == [record[f] for f in FEATURE_NAMES]
+    assert (missing, invalid, violated, unknown) == (0, 0, 0, [])
+
+    extra = dict(record, heart_rate=140)
+    del extra['accelerations']
+    _, _, missing, _, violated, unknown = validator.parse(json.dumps(extra).encode())
+    assert missing == violated == 1 << FEATURE_NAMES.index('accelerations')
+    assert unknown == ['heart_rate']
+
+    for body in (b'{', b'[1, 2]'):
+        with pytest.raises(ValueError):
+            validator.parse(body)
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,71 @@
+"""
+Test suite for worker statistics and the gunicorn preload hooks
+"""
+
+import pytest
+import sys
+import os
+import gc
+import importlib.util
+
+# Add parent directory to path to import worker_stats
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker_stats import mark_worker_start, mark_worker_ready, worker_report
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_gunicorn_config():
+    """Import gunicorn.conf.py as a module."""
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", os.path.join(BASE_DIR, "gunicorn.conf.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class FakeLog:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message):
+        self.messages.append(message)
+
+    warning = info
+
+class FakeServer:
+    def __init__(self, wsgi_app):
+        self.log = FakeLog()
+        self.app = type("App", (), {"wsgi": lambda _self: wsgi_app})()
+
+def test_worker_report_startup_time():
+    """Test the boot clock measures start to ready."""
+    mark_worker_start(preloaded=True)
+    mark_worker_ready()
+    report = worker_report()
+    assert report['pid'] == os.getpid()
+    assert report['preloaded'] == True
+    assert report['startup_seconds'] >= 0
+    assert report['memory']
+
+def test_when_ready_warms_and_freezes():
+    """Test the preload hook warms the app and freezes the heap."""
+    from app import app
+    config = load_gunicorn_config()
+    if not config.preload_app:
+        pytest.skip("Preloading disabled")
+    server = FakeServer(app)
+    try:
+        config.when_ready(server)
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+    assert any("warmed up" in message for message in server.log.messages)
+
+def test_health_reports_worker():
+    """Test /health exposes worker memory and startup figures."""
+    from app import app
+    data = app.test_client().get('/health').get_json()
+    assert data['worker']['pid'] == os.getpid()
+    assert 'memory' in data['worker']
+
+if __name__ == '__main__':
+    pytest.main([__file__])
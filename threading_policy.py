@@ -0,0 +1,91 @@
+"""
+Fetal Health Prediction System - Inference Threading Policy
+Keeps per-request inference single-threaded and caps native thread pools so
+gunicorn workers do not oversubscribe the host's cores.
+"""
+
+import os
+import threading
+
+
+class ThreadingPolicy:
+    """How many threads inference may use, configured from the environment.
+
+    Inputs with fewer than parallel_min_rows rows are scored on the calling
+    thread; spinning up joblib workers for a handful of rows costs more than
+    the trees themselves. Larger batches fan the forest's trees out over
+    parallel_threads threads. BLAS/OpenMP pools are capped at blas_threads
+    per process.
+    """
+
+    def __init__(self, parallel_threads=1, parallel_min_rows=1000, blas_threads=1):
+        self.parallel_threads = parallel_threads
+        self.parallel_min_rows = parallel_min_rows
+        self.blas_threads = blas_threads
+        self.blas_limited = False
+
+    @classmethod
+    def from_env(cls):
+        """Build the policy from INFERENCE_THREADS, INFERENCE_PARALLEL_MIN_ROWS
+        and INFERENCE_BLAS_THREADS."""
+        return cls(
+            parallel_threads=int(os.environ.get('INFERENCE_THREADS', 1)),
+            parallel_min_rows=int(os.environ.get('INFERENCE_PARALLEL_MIN_ROWS', 1000)),
+            blas_threads=int(os.environ.get('INFERENCE_BLAS_THREADS', 1))
+        )
+
+    def limit_native_threads(self):
+        """Cap BLAS/OpenMP thread pools for the whole process."""
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            return
+        threadpool_limits(limits=self.blas_threads)
+        self.blas_limited = True
+
+    def prepare(self, model):
+        """Clear the model's own n_jobs so the policy decides per call."""
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = None
+
+    def n_jobs_for(self, n_rows):
+        """Number of joblib threads to use for an input of n_rows rows."""
+        return self.parallel_threads if n_rows >= self.parallel_min_rows else 1
+
+    def parallel(self, n_rows):
+        """Context manager setting joblib's thread count for one call."""
+        from joblib import parallel_config
+        return parallel_config(backend='threading', n_jobs=self.n_jobs_for(n_rows))
+
+    def report(self):
+        """Return the policy and the live native thread pools for /health."""
+        report = {
+            "parallel_threads": self.parallel_threads,
+            "parallel_min_rows": self.parallel_min_rows,
+            "blas_threads": self.blas_threads,
+            "blas_limited": self.blas_limited,
+            "threadpools": []
+        }
+        try:
+            from threadpoolctl import threadpool_info
+            report["threadpools"] = [
+                {"api": pool.get("internal_api"), "num_threads": pool.get("num_threads")}
+                for pool in threadpool_info()
+            ]
+        except ImportError:
+            pass
+        return report
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_threading_policy():
+    """Return the process-wide policy, capping native threads on first use."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = ThreadingPolicy.from_env()
+            _policy.limit_native_threads()
+        return _policy
@@ -0,0 +1,303 @@
+"""
+Fetal Health Prediction System - Input Validation
+Range checks compiled from FEATURE_RANGES: batches are validated against
+lower and upper bound arrays with two comparisons, single records by a
+function generated from the same ranges. Failures come back as per-row
+bitmasks of the offending features and messages are only formatted for the
+rows that fail. Request bodies can be decoded straight into a feature row
+with parse(), which uses orjson when it is installed, and columnar batches
+are converted and checked one column at a time with from_columns().
+"""
+
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # the standard library decoder is used instead
+    orjson = None
+
+# Values accepted by strict validation (bool is an int, as isinstance has it)
+NUMBER_TYPES = (int, float)
+
+
+def generate_check_source(feature_names, ranges, strict=False):
+    """Python source of check_record(record) -> (values, violation mask).
+
+    The generated function reads every feature, converts it to float and
+    sets bit j of the mask when feature j is outside its range; NaN is
+    outside every range. It raises KeyError, TypeError or ValueError for a
+    record that is incomplete or holds something other than a number.
+    """
+    names = [f"v{j}" for j in range(len(feature_names))]
+    lines = ["def check_record(record):"]
+    lines += [f"    {name} = record[{feature!r}]" for name, feature in zip(names, feature_names)]
+    if strict:
+        lines.append(f"    if not ({' and '.join(f'isinstance({name}, NUMBER_TYPES)' for name in names)}):")
+        lines.append("        raise TypeError('expected numbers')")
+    lines += [f"    {name} = float({name})" for name in names]
+    lines.append("    mask = 0")
+    for j, (name, (low, high)) in enumerate(zip(names, ranges)):
+        lines.append(f"    if not ({float(low)!r} <= {name} <= {float(high)!r}):")
+        lines.append(f"        mask |= {1 << j}")
+    lines.append(f"    return [{', '.join(names)}], mask")
+    return "\n".join(lines) + "\n"
+
+
+def decode_json(body):
+    """Decode a JSON document from bytes; raises ValueError when it is not JSON."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class FeatureValidator:
+    """Convert and range-check records in a fixed feature order.
+
+    Bit j of every mask refers to feature_names[j]. Values that are
+    missing or not numbers are NaN in converted rows, which the range check
+    also flags, so the masks of missing and invalid values tell the
+    applications which message to format for a set bit. strict accepts
+    only numbers (int, float); otherwise strings holding numbers are
+    converted as well.
+    """
+
+    def __init__(self, feature_names, feature_ranges):
+        self.feature_names = list(feature_names)
+        self.known = frozenset(self.feature_names)
+        self.ranges = [tuple(feature_ranges[f]) for f in self.feature_names]
+        self.lower = np.array([low for low, _ in self.ranges], dtype=np.float64)
+        self.upper = np.array([high for _, high in self.ranges], dtype=np.float64)
+        self.bits = np.left_shift(1, np.arange(len(self.feature_names), dtype=np.int64))
+        self._dtype_bounds = {}
+        self._check = {strict: self._compile(strict) for strict in (False, True)}
+
+    def _compile(self, strict):
+        namespace = {"NUMBER_TYPES": NUMBER_TYPES}
+        code = compile(generate_check_source(self.feature_names, self.ranges, strict), "<validator>", "exec")
+        exec(code, namespace)
+        return namespace["check_record"]
+
+    def violations(self, X):
+        """Bitmask of the features outside their range, per row of X (or for one row).
+
+        X is compared in its own precision against the bounds rounded to
+        it, so a float32 row holding the float32 nearest a bound passes.
+        """
+        X = np.asarray(X)
+        lower, upper = self._bounds(X.dtype)
+        outside = ~((X >= lower) & (X <= upper))
+        return outside @ self.bits
+
+    def _bounds(self, dtype):
+        """Lower and upper bound arrays in dtype, converted once per dtype."""
+        bounds = self._dtype_bounds.get(dtype)
+        if bounds is None:
+            bounds = self._dtype_bounds[dtype] = (
+                (self.lower, self.upper) if dtype.kind != 'f'
+                else (self.lower.astype(dtype), self.upper.astype(dtype))
+            )
+        return bounds
+
+    def features(self, mask):
+        """Indices of the features set in mask."""
+        return [j for j in range(len(self.feature_names)) if int(mask) >> j & 1]
+
+    def check(self, record, strict=False):
+        """Convert and validate one record dict.
+
+        Returns (values in feature order, missing mask, invalid mask,
+        violation mask); the record is valid when the violation mask is 0.
+        Complete records of numbers take the generated check only.
+        """
+        try:
+            values, violated = self._check[strict](record)
+            return values, 0, 0, violated
+        except (KeyError, ValueError, TypeError, OverflowError):
+            pass
+        row, missing, invalid = self._convert(record, strict)
+        return row.tolist(), missing, invalid, int(self.violations(row))
+
+    def parse(self, body, strict=False):
+        """Decode a JSON request body and check it as one record.
+
+        Returns (record, values, missing mask, invalid mask, violation mask,
+        unknown keys). The decoded object goes through the generated check
+        directly, and keys other than the features are only looked for when
+        the record does not hold exactly the features. Raises ValueError
+        when body is not a JSON object.
+        """
+        try:
+            record = decode_json(body)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}") from e
+        if not isinstance(record, dict):
+            raise ValueError("Expected a JSON object")
+        values, missing, invalid, violated = self.check(record, strict)
+        if len(record) == len(self.feature_names) and not missing:
+            return record, values, missing, invalid, violated, []
+        return record, values, missing, invalid, violated, self.unknown(record)
+
+    def unknown(self, record):
+        """Keys of record that are not features, in record order."""
+        return [key for key in record if key not in self.known]
+
+    def from_columns(self, columns, strict=False):
+        """Convert a columnar batch {feature: [values]} into an (N, 8) matrix.
+
+        Each column is converted with one array call and range-checked as a
+        whole; only a column that fails to convert is converted value by
+        value. Returns (X, invalid masks, violation masks) per row, with
+        unusable values left as NaN. Raises ValueError when a feature column
+        is missing or unknown, not a list, or the columns differ in length.
+        """
+        unknown = self.unknown(columns)
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(unknown)}")
+        missing = [f for f in self.feature_names if f not in columns]
+        if missing:
+            raise ValueError(f"Missing features: {', '.join(missing)}")
+        if not all(isinstance(columns[f], list) for f in self.feature_names):
+            raise ValueError("Expected a list of values for every feature")
+        lengths = {len(columns[f]) for f in self.feature_names}
+        if len(lengths) != 1:
+            raise ValueError("Feature columns have different lengths")
+        n = lengths.pop()
+        if not n:
+            raise ValueError("No records provided")
+
+        X = np.empty((n, len(self.feature_names)))
+        invalid = np.zeros(n, dtype=np.int64)
+        violated = np.zeros(n, dtype=np.int64)
+        for j, (feature, (low, high)) in enumerate(zip(self.feature_names, self.ranges)):
+            column = X[:, j]
+            try:
+                values = np.asarray(columns[feature]) if strict else np.asarray(columns[feature], dtype=np.float64)
+                if values.dtype.kind not in 'fiub' or values.ndim != 1:
+                    raise TypeError("expected numbers")
+                column[:] = values
+                # NaN may stand for None, which needs the slow path to be reported
+                if np.isnan(column).any():
+                    raise ValueError("NaN in column")
+            except (ValueError, TypeError, OverflowError):
+                invalid |= self._convert_values(columns[feature], column, strict).astype(np.int64) << j
+            violated |= ~((column >= low) & (column <= high)) << j
+        return X, invalid, violated
+
+    @staticmethod
+    def _convert_values(values, target, strict):
+        """Convert a failing column or row value by value into target; returns the invalid positions."""
+        invalid = np.zeros(len(target), dtype=bool)
+        for i, value in enumerate(values):
+            if strict and not isinstance(value, NUMBER_TYPES):
+                target[i], invalid[i] = np.nan, True
+                continue
+            try:
+                target[i] = float(value)
+            except (ValueError, TypeError, OverflowError):
+                target[i], invalid[i] = np.nan, True
+        return invalid
+
+    def from_rows(self, rows, strict=False):
+        """Convert rows of values in feature order (a list of lists or an array) into an (N, 8) matrix.
+
+        Numeric batches are converted in a single array call; otherwise each
+        row is converted value by value. Returns (X, invalid masks) per row,
+        with unusable values left as NaN. Raises ValueError when a row does
+        not hold one value per feature.
+        """
+        n_features = len(self.feature_names)
+        shape_error = f"Expected an (N, {n_features}) array of features"
+        try:
+            X = np.asarray(rows) if strict else np.asarray(rows, dtype=np.float64)
+            if X.dtype.kind in 'fiub' and X.ndim == 2 and X.shape[1] == n_features:
+                return X.astype(np.float64, copy=False), np.zeros(len(X), dtype=np.int64)
+        except (ValueError, TypeError, OverflowError):
+            pass
+
+        X = np.full((len(rows), n_features), np.nan)
+        invalid = np.zeros(len(rows), dtype=np.int64)
+        for i, row in enumerate(rows):
+            if isinstance(row, (str, bytes, dict)) or not hasattr(row, '__len__') or len(row) != n_features:
+                raise ValueError(shape_error)
+            invalid[i] = self._convert_values(row, X[i], strict) @ self.bits
+        return X, invalid
+
+    def batch(self, records, strict=False):
+        """Convert and range-check a batch given as record dicts, rows of values or columns.
+
+        records is a list of record dicts (see to_matrix), a list or array of
+        rows in feature order (see from_rows) or {feature: [values]} columns
+        (see from_columns). Returns (X, missing masks, invalid masks,
+        violation masks, objects) per row; objects flags the rows that came
+        from a usable record. Raises ValueError for a batch of the wrong shape.
+        """
+        if isinstance(records, dict):
+            # Columns are converted and range-checked one whole column at a time
+            X, invalid, violated = self.from_columns(records, strict)
+            return X, np.zeros(len(X), dtype=np.int64), invalid, violated, np.ones(len(X), dtype=bool)
+        if isinstance(records, np.ndarray) or not isinstance(records[0], dict):
+            X, invalid = self.from_rows(records, strict)
+            missing, objects = np.zeros(len(X), dtype=np.int64), np.ones(len(X), dtype=bool)
+        else:
+            X, missing, invalid, objects = self.to_matrix(records, strict)
+        # Validate ranges for the whole batch at once
+        return X, missing, invalid, self.violations(X), objects
+
+    def record(self, records, i):
+        """Row i of a batch passed to batch(), as a record dict (None if it is not one)."""
+        if isinstance(records, dict):
+            return {feature: records[feature][i] for feature in self.feature_names}
+        record = records[i]
+        if isinstance(record, dict):
+            return record
+        if isinstance(record, (str, bytes)) or not hasattr(record, '__len__'):
+            return None
+        return dict(zip(self.feature_names, record))
+
+    def _convert(self, record, strict):
+        """Convert a failing record feature by feature, recording why values are unusable."""
+        row = np.full(len(self.feature_names), np.nan)
+        missing = invalid = 0
+        for j, feature in enumerate(self.feature_names):
+            if feature not in record:
+                missing |= 1 << j
+                continue
+            value = record[feature]
+            if strict and not isinstance(value, NUMBER_TYPES):
+                invalid |= 1 << j
+                continue
+            try:
+                row[j] = float(value)
+            except (ValueError, TypeError, OverflowError):
+                invalid |= 1 << j
+        return row, missing, invalid
+
+    def to_matrix(self, records, strict=False):
+        """Convert a list of record dicts into an (N, 8) matrix.
+
+        Returns (X, missing masks, invalid masks, objects) where objects
+        flags the records that are dicts at all; rows of other records are
+        NaN. Complete batches are converted in a single array call; only
+        when that fails are the records converted one by one. Pass X to
+        violations() for the range check.
+        """
+        n = len(records)
+        missing = np.zeros(n, dtype=np.int64)
+        invalid = np.zeros(n, dtype=np.int64)
+        try:
+            values = [[record[f] for f in self.feature_names] for record in records]
+            X = np.array(values) if strict else np.array(values, dtype=np.float64)
+            # NaN may stand for None, which needs the slow path to be reported
+            if (X.dtype.kind in 'fiub' and X.shape == (n, len(self.feature_names))
+                    and not np.isnan(X).any()):
+                return X.astype(np.float64, copy=False), missing, invalid, np.ones(n, dtype=bool)
+        except (KeyError, ValueError, TypeError, OverflowError, IndexError):
+            pass
+
+        X = np.full((n, len(self.feature_names)), np.nan)
+        objects = np.array([isinstance(record, dict) for record in records], dtype=bool)
+        for i in np.flatnonzero(objects):
+            X[i], missing[i], invalid[i], _ = self.check(records[i], strict)
+        return X, missing, invalid, objects
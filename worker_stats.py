@@ -0,0 +1,57 @@
+"""
+Fetal Health Prediction System - Worker Statistics
+Startup timing and memory figures for the current (gunicorn worker) process.
+"""
+
+import os
+import time
+
+# Boot milestones of this process; reset in each worker after fork
+_timeline = {
+    "pid": os.getpid(),
+    "started": time.time(),
+    "ready": None,
+    "preloaded": False
+}
+
+
+def mark_worker_start(preloaded=False):
+    """Record that a worker process began booting (call right after fork)."""
+    _timeline.update(pid=os.getpid(), started=time.time(), ready=None, preloaded=preloaded)
+
+
+def mark_worker_ready():
+    """Record that the worker finished loading the application."""
+    _timeline["ready"] = time.time()
+
+
+def memory_usage():
+    """Return this process's memory in kB, split into shared and private pages.
+
+    Uses /proc/self/smaps_rollup on Linux, where copy-on-write pages still
+    shared with the gunicorn master show up as Shared_*; elsewhere only the
+    peak RSS is available.
+    """
+    try:
+        usage = {}
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    usage[key.lower() + "_kb"] = int(rest.split()[0])
+        return usage
+    except OSError:
+        import resource
+        return {"max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def worker_report():
+    """Return pid, boot time and memory of this process for /health."""
+    ready = _timeline["ready"]
+    return {
+        "pid": _timeline["pid"],
+        "preloaded": _timeline["preloaded"],
+        "startup_seconds": ready - _timeline["started"] if ready else None,
+        "uptime_seconds": time.time() - _timeline["started"],
+        "memory": memory_usage()
+    }